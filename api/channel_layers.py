@@ -0,0 +1,322 @@
+# api/channel_layers.py
+"""
+Channel layer multi-processus au-dessus de PostgreSQL LISTEN/NOTIFY.
+
+Aucun service en plus de la base : chaque processus ASGI garde ses files et ses
+groupes en mémoire (InMemoryChannelLayer) et ouvre une connexion d'écoute.
+
+- group_send(groupe) : NOTIFY sur le canal PostgreSQL du groupe ; chaque processus
+  ayant au moins un membre local du groupe l'écoute (LISTEN au premier group_add,
+  UNLISTEN au dernier group_discard) et remet le message à ses membres locaux.
+- send(canal spécifique) : les noms de canaux portent l'id du processus
+  ("specific.<process>!<aléa>") ; un message pour un autre processus part en NOTIFY
+  sur le canal de ce processus.
+- NOTIFY est limité à 8000 octets : un message plus gros est déposé dans une table
+  UNLOGGED (channel_layer_payload) et seul son id est notifié.
+
+Les canaux nommés sans "!" restent locaux au processus (comme InMemoryChannelLayer) :
+l'application n'utilise que des groupes et des canaux spécifiques.
+
+Aucun appel psycopg2 bloquant sur la boucle asyncio : connexion, LISTEN/UNLISTEN et
+lecture des gros messages passent par des threads dédiés ; la boucle ne fait que
+poll() (non bloquant, réveillé par add_reader) et remet les messages dans l'ordre
+de réception.
+
+Layer optionnel (CHANNEL_LAYER=postgres) : voir api/tests.py, PostgresChannelLayerTests.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import string
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.layers import InMemoryChannelLayer
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Limite de NOTIFY (8000 octets) moins une marge
+MAX_NOTIFY_PAYLOAD = 7900
+PAYLOAD_TABLE = "channel_layer_payload"
+
+
+class PostgresChannelLayer(InMemoryChannelLayer):
+
+    def __init__(
+        self,
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        database="default",
+        dsn=None,
+        **kwargs
+    ):
+        super().__init__(
+            expiry=expiry,
+            group_expiry=group_expiry,
+            capacity=capacity,
+            channel_capacity=channel_capacity,
+            **kwargs
+        )
+        self.database = database
+        self.dsn = dsn
+        self.process_id = uuid.uuid4().hex[:12]
+        self._listener = None
+        self._listener_loop = None
+        self._listener_lock = None
+        self._listening = set()
+        self._inbox = None
+        self._pump_task = None
+        # Les NOTIFY partent d'un thread dédié (psycopg2 est bloquant), dans l'ordre d'envoi ;
+        # la connexion d'écoute a le sien (connexion, LISTEN/UNLISTEN)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pg-channel-layer")
+        self._listener_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pg-channel-listener")
+        self._sender = None
+        self._payload_table_ready = False
+
+    # Connexions
+
+    def _connect(self):
+        import psycopg2
+
+        if self.dsn:
+            conn = psycopg2.connect(self.dsn)
+        else:
+            conn = psycopg2.connect(**connections[self.database].get_connection_params())
+        conn.autocommit = True
+        return conn
+
+    @staticmethod
+    def _pg_channel(kind, name):
+        # Identifiant PostgreSQL sûr et court (63 octets max) quel que soit le nom
+        return f"cl_{kind}_{hashlib.sha1(name.encode()).hexdigest()[:24]}"
+
+    def _process_channel(self, process_id):
+        return self._pg_channel("p", process_id)
+
+    def _group_channel(self, group):
+        return self._pg_channel("g", group)
+
+    def _listener_ready(self, loop):
+        return self._listener is not None and self._listener_loop is loop and not self._listener.closed
+
+    async def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if self._listener_ready(loop):
+            return
+        # Un verrou par boucle : les connexions simultanées n'ouvrent qu'une écoute
+        if self._listener_lock is None or self._listener_lock[0] is not loop:
+            self._listener_lock = (loop, asyncio.Lock())
+        async with self._listener_lock[1]:
+            if self._listener_ready(loop):
+                return
+            self._close_listener()
+            pg_channels = [self._process_channel(self.process_id), *self._listening]
+            conn = await loop.run_in_executor(self._listener_executor, self._open_listener, pg_channels)
+            self._listener = conn
+            self._listener_loop = loop
+            self._inbox = asyncio.Queue()
+            self._pump_task = loop.create_task(self._pump())
+            loop.add_reader(conn.fileno(), self._on_readable)
+            # Notifications arrivées pendant l'ouverture
+            self._collect_notifies()
+
+    def _open_listener(self, pg_channels):
+        conn = self._connect()
+        with conn.cursor() as cursor:
+            for pg_channel in pg_channels:
+                cursor.execute(f'LISTEN "{pg_channel}"')
+        return conn
+
+    def _close_listener(self):
+        if self._listener is None:
+            return
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            self._pump_task = None
+        try:
+            self._listener_loop.remove_reader(self._listener.fileno())
+        except Exception:
+            pass
+        try:
+            self._listener.close()
+        except Exception:
+            pass
+        self._listener = None
+        self._listener_loop = None
+
+    @staticmethod
+    def _execute_listen(conn, statement):
+        with conn.cursor() as cursor:
+            cursor.execute(statement)
+
+    async def _listen(self, pg_channel, listen=True):
+        conn = self._listener
+        if conn is None:
+            return
+        statement = f'{"LISTEN" if listen else "UNLISTEN"} "{pg_channel}"'
+        await asyncio.get_running_loop().run_in_executor(
+            self._listener_executor, self._execute_listen, conn, statement
+        )
+        # La requête a pu lire des notifications sans que add_reader ne se réveille
+        if conn is self._listener:
+            self._collect_notifies()
+
+    # Réception des NOTIFY (boucle asyncio du serveur)
+
+    def _on_readable(self):
+        try:
+            self._listener.poll()
+        except Exception:
+            logger.exception("Connexion d'écoute du channel layer perdue, reconnexion")
+            loop = self._listener_loop
+            self._close_listener()
+            loop.create_task(self._ensure_listener())
+            return
+        self._collect_notifies()
+
+    def _collect_notifies(self):
+        while self._listener.notifies:
+            self._inbox.put_nowait(self._listener.notifies.pop(0).payload)
+
+    async def _pump(self):
+        """Remet les messages reçus dans l'ordre ; les gros messages sont lus hors de la boucle"""
+        loop = asyncio.get_running_loop()
+        while True:
+            payload = await self._inbox.get()
+            try:
+                if payload.startswith("@"):
+                    payload = await loop.run_in_executor(self._executor, self._fetch_payload, int(payload[1:]))
+                    if payload is None:
+                        # Expiré avant d'être lu
+                        continue
+                self._dispatch(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Message de channel layer illisible")
+
+    def _fetch_payload(self, payload_id):
+        # Thread d'émission : la connexion d'envoi n'est utilisée que par lui
+        if self._sender is None or self._sender.closed:
+            self._sender = self._connect()
+        with self._sender.cursor() as cursor:
+            cursor.execute(f"SELECT payload FROM {PAYLOAD_TABLE} WHERE id = %s", [payload_id])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _dispatch(self, payload):
+        envelope = json.loads(payload)
+        if "group" in envelope:
+            targets = list(self.groups.get(envelope["group"], {}))
+        else:
+            targets = [envelope["channel"]]
+        for channel in targets:
+            self._deliver(channel, envelope["message"])
+
+    def _deliver(self, channel, message):
+        queue = self.channels.setdefault(channel, asyncio.Queue())
+        if queue.qsize() >= self.capacity:
+            # File pleine : le message est perdu, comme avec les autres layers
+            return
+        queue.put_nowait((time.time() + self.expiry, message))
+
+    # Émission
+
+    def _notify_sync(self, pg_channel, payload):
+        for attempt in range(2):
+            try:
+                if self._sender is None or self._sender.closed:
+                    self._sender = self._connect()
+                with self._sender.cursor() as cursor:
+                    if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+                        payload = self._store_payload(cursor, payload)
+                    cursor.execute("SELECT pg_notify(%s, %s)", [pg_channel, payload])
+                return
+            except Exception:
+                if self._sender is not None:
+                    self._sender.close()
+                self._sender = None
+                if attempt:
+                    raise
+
+    def _store_payload(self, cursor, payload):
+        if not self._payload_table_ready:
+            cursor.execute(
+                f"CREATE UNLOGGED TABLE IF NOT EXISTS {PAYLOAD_TABLE} ("
+                "id bigserial PRIMARY KEY, payload text NOT NULL, "
+                "created_at timestamptz NOT NULL DEFAULT now())"
+            )
+            self._payload_table_ready = True
+        cursor.execute(
+            f"DELETE FROM {PAYLOAD_TABLE} WHERE created_at < now() - make_interval(secs => %s)",
+            [self.expiry],
+        )
+        cursor.execute(f"INSERT INTO {PAYLOAD_TABLE} (payload) VALUES (%s) RETURNING id", [payload])
+        return f"@{cursor.fetchone()[0]}"
+
+    async def _notify(self, pg_channel, envelope):
+        payload = json.dumps(envelope)
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._notify_sync, pg_channel, payload
+        )
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        if "!" in channel:
+            process_id = channel.split("!", 1)[0].rsplit(".", 1)[-1]
+            if process_id != self.process_id:
+                await self._notify(self._process_channel(process_id), {"channel": channel, "message": message})
+                return
+        await super().send(channel, message)
+
+    async def receive(self, channel):
+        await self._ensure_listener()
+        return await super().receive(channel)
+
+    async def new_channel(self, prefix="specific"):
+        return "%s.%s!%s" % (
+            prefix.rstrip("."),
+            self.process_id,
+            "".join(random.choice(string.ascii_letters) for i in range(12)),
+        )
+
+    async def group_add(self, group, channel):
+        await super().group_add(group, channel)
+        await self._ensure_listener()
+        pg_channel = self._group_channel(group)
+        if pg_channel not in self._listening:
+            self._listening.add(pg_channel)
+            await self._listen(pg_channel)
+
+    async def group_discard(self, group, channel):
+        await super().group_discard(group, channel)
+        pg_channel = self._group_channel(group)
+        if not self.groups.get(group) and pg_channel in self._listening:
+            self._listening.discard(pg_channel)
+            await self._listen(pg_channel, listen=False)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        assert self.valid_group_name(group), "Invalid group name"
+        await self._notify(self._group_channel(group), {"group": group, "message": message})
+
+    async def flush(self):
+        await super().flush()
+        for pg_channel in list(self._listening):
+            await self._listen(pg_channel, listen=False)
+        self._listening.clear()
+
+    async def close(self):
+        self._close_listener()
+        if self._sender is not None:
+            sender, self._sender = self._sender, None
+            await asyncio.get_running_loop().run_in_executor(self._executor, sender.close)
@@ -0,0 +1,44 @@
+# api/conditional.py
+"""
+GET conditionnels (ETag / Last-Modified) pour les lectures que l'application
+refait à chaque reprise.
+
+Les vues calculent un ETag à partir de colonnes déjà chargées (updated_at,
+compteurs, version de contenu de l'église) *avant* de sérialiser : si le client
+envoie If-None-Match / If-Modified-Since correspondant, on répond 304 sans corps.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(
+        "|".join(str(part) for part in parts).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def most_recent(*timestamps):
+    timestamps = [t for t in timestamps if t is not None]
+    return max(timestamps) if timestamps else None
+
+
+def with_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """Réponse 304 si le client a déjà cette version de la ressource, sinon None"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+    )
+    if response is None:
+        return None
+    return with_validators(response, etag, last_modified)
@@ -1,8 +1,13 @@
 import json
+import uuid
+
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from .models import ChatMessage, ChatRoom
-from .serializers import ChatMessageSerializer
+from django.utils import timezone
+
+from .models import ChatMessage, ChatRoomMembership
+from .services import chat_outbound, chat_presence, chat_read, chat_writer
+from .services.chat_history import InvalidCursor
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -12,6 +17,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         self.room_id = self.scope['url_route']['kwargs']['room_id']
         self.room_group_name = f'chat_{self.room_id}'
         self.user = self.scope['user']
+        self.outbound = None
 
         # Verify user has access to this room
         has_access = await self.check_room_access()
@@ -25,6 +31,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
         await self.accept()
+        # Toutes les trames sortantes passent par une file bornée (clients lents)
+        self.outbound = chat_outbound.OutboundQueue(self)
+        self.outbound.start()
+        await chat_presence.registry.join(self.room_id, self)
 
     async def disconnect(self, close_code):
         # Remove from group
@@ -32,18 +42,36 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        await chat_presence.registry.leave(self.room_id, self)
+        if self.outbound is not None:
+            self.outbound.stop()
+        # Les messages de cette connexion encore en tampon sont écrits avant de partir
+        await chat_writer.writer.flush()
 
     async def receive(self, text_data):
         """Receive message from WebSocket"""
         try:
             data = json.loads(text_data)
+            if data.get('type') == 'read':
+                await self.mark_read(data.get('message_id'))
+                return
+            if data.get('type') == 'typing':
+                chat_presence.registry.typing(self.room_id, self.user)
+                return
+
             message_text = data.get('message', '').strip()
 
             if not message_text:
                 return
 
-            # Save message to database
-            message_obj = await self.save_message(message_text)
+            # Id et date fixés ici : diffusion immédiate, écriture groupée ensuite
+            message_obj = ChatMessage(
+                id=uuid.uuid4(),
+                room_id=self.room_id,
+                user_id=self.user.id,
+                message=message_text,
+                created_at=timezone.now(),
+            )
 
             # Broadcast to group
             await self.channel_layer.group_send(
@@ -57,30 +85,59 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     'created_at': message_obj.created_at.isoformat(),
                 }
             )
+            chat_writer.writer.add(message_obj)
         except json.JSONDecodeError:
             pass
 
     async def chat_message(self, event):
         """Handle chat message event"""
-        await self.send(text_data=json.dumps({
+        self._send_frame({
             'type': 'message',
             'id': event['message_id'],
             'user_id': event['user_id'],
             'user_name': event['user_name'],
             'message': event['message'],
             'created_at': event['created_at'],
-        }))
+        })
+
+    async def send_presence(self, online):
+        """Liste des présents du salon (poussée par chat_presence à chaque changement)"""
+        self._send_frame({
+            'type': 'presence',
+            'online': [{'user_id': user_id, 'user_name': name} for user_id, name in online.items()],
+        })
+
+    async def send_typing(self, users):
+        self._send_frame({'type': 'typing', 'users': users})
+
+    def _send_frame(self, frame):
+        if self.outbound is not None:
+            self.outbound.put(frame)
+
+    async def mark_read(self, message_id):
+        """Frame {"type": "read", "message_id": ...} : avance le curseur de lecture"""
+        # Le message peut encore attendre dans le tampon d'écriture
+        await chat_writer.writer.flush()
+        result = await self.advance_read_cursor(message_id)
+        if result is None:
+            self._send_frame({'type': 'error', 'error': 'Message introuvable dans ce salon'})
+            return
+        self._send_frame({'type': 'read', **result})
 
     @database_sync_to_async
-    def save_message(self, message_text):
-        """Save message to database"""
-        room = ChatRoom.objects.get(id=self.room_id)
-        message = ChatMessage.objects.create(
-            room=room,
-            user=self.user,
-            message=message_text
-        )
-        return message
+    def advance_read_cursor(self, message_id):
+        membership = ChatRoomMembership.objects.filter(room_id=self.room_id, user_id=self.user.id).first()
+        if membership is None:
+            return None
+        try:
+            membership = chat_read.mark_read(membership, message_id)
+        except InvalidCursor:
+            return None
+        return {
+            'last_read_message_id': str(membership.last_read_message_id) if membership.last_read_message_id else None,
+            'last_read_at': membership.last_read_at.isoformat(),
+            'unread_count': chat_read.unread_count(membership),
+        }
 
     @database_sync_to_async
     def check_room_access(self):
@@ -88,8 +145,5 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if not self.user.is_authenticated:
             return False
 
-        try:
-            room = ChatRoom.objects.get(id=self.room_id)
-            return room.user_has_access(self.user)
-        except ChatRoom.DoesNotExist:
-            return False
+        # Une seule lecture sur l'index unique (salon, utilisateur)
+        return ChatRoomMembership.objects.filter(room_id=self.room_id, user_id=self.user.id).exists()
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import retention
+
+LOCK_KEY = "retention:lock"
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive les lignes brutes plus anciennes que leur horizon de rétention "
+        "(settings.RETENTION_DAYS) dans des fichiers JSONL compressés, par lots. "
+        "Reprenable : relancer poursuit là où le passage précédent s'est arrêté."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--policy",
+            dest="policies",
+            action="append",
+            choices=sorted(retention.POLICIES),
+            help="Politique à appliquer (répétable). Par défaut : toutes.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=retention.CHUNK_SIZE,
+            help="Nombre de lignes par lot (un fichier par lot)",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.5,
+            metavar="SECONDES",
+            help="Pause entre deux lots, pour limiter la charge en journée",
+        )
+        parser.add_argument(
+            "--max-seconds",
+            type=float,
+            help="Arrêter le passage après cette durée (reprise au suivant)",
+        )
+
+    def handle(self, *args, **options):
+        # Un seul passage à la fois : deux passages archiveraient les mêmes lignes
+        if not cache.add(LOCK_KEY, True, timeout=6 * 3600):
+            raise CommandError("Un archivage est déjà en cours")
+        try:
+            archived = retention.run(
+                names=options["policies"],
+                chunk_size=options["chunk_size"],
+                pause=options["pause"],
+                max_seconds=options["max_seconds"],
+            )
+        finally:
+            cache.delete(LOCK_KEY)
+
+        for name, count in archived.items():
+            self.stdout.write(f"{name} : {count} ligne(s) archivée(s)")
+        self.stdout.write(self.style.SUCCESS(f"{sum(archived.values())} ligne(s) archivée(s) au total"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Church
+from api.services import recommender
+
+
+class Command(BaseCommand):
+    help = "Recalcule le modèle de recommandation item-à-item (ContentNeighbor) par église"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--church",
+            dest="church_ids",
+            action="append",
+            help="Id d'une église (répétable). Par défaut : toutes.",
+        )
+        parser.add_argument("--top-k", type=int, default=recommender.TOP_K)
+        parser.add_argument("--coview-days", type=int, default=recommender.COVIEW_DAYS)
+
+    def handle(self, *args, **options):
+        church_ids = options["church_ids"] or Church.objects.values_list("id", flat=True).iterator()
+
+        churches = 0
+        neighbors = 0
+        for church_id in church_ids:
+            neighbors += recommender.build_church_model(
+                church_id,
+                top_k=options["top_k"],
+                coview_days=options["coview_days"],
+            )
+            churches += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{churches} église(s) traitée(s), {neighbors} voisin(s) enregistré(s)"
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.services import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Applique la décroissance aux scores de tendance (ContentScore) et purge les "
+        "scores négligeables. --rebuild recalcule tout depuis les vues et likes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recalculer tous les scores depuis ContentViewDaily et ContentLike",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            total = trending.rebuild_all()
+            self.stdout.write(self.style.SUCCESS(f"{total} score(s) reconstruit(s)"))
+            return
+
+        updated, deleted = trending.decay_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"{updated} score(s) re-décru(s), {deleted} purgé(s)"
+        ))
@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Church, User
+from api.services import content_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe en masse des contenus dans une église depuis un fichier JSON Lines ou CSV "
+        "(une ligne par contenu, mêmes champs que create_content)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("church_id", help="Id de l'église destinataire")
+        parser.add_argument("path", help="Fichier .jsonl / .ndjson ou .csv")
+        parser.add_argument("--format", choices=content_import.FORMATS, help="Par défaut : d'après l'extension")
+        parser.add_argument("--user", help="Numéro de téléphone de l'auteur (created_by)")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=content_import.BATCH_SIZE,
+            help="Nombre de lignes insérées par lot",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Valider sans rien écrire")
+
+    def handle(self, *args, **options):
+        church = Church.objects.filter(id=options["church_id"]).first()
+        if church is None:
+            raise CommandError(f"Église introuvable : {options['church_id']}")
+
+        created_by = None
+        if options["user"]:
+            created_by = User.objects.filter(phone_number=options["user"]).first()
+            if created_by is None:
+                raise CommandError(f"Utilisateur introuvable : {options['user']}")
+
+        fmt = options["format"] or content_import.detect_format(options["path"])
+        if fmt is None:
+            raise CommandError("Format inconnu : préciser --format jsonl ou --format csv")
+
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as lines:
+                result = content_import.import_contents(
+                    church,
+                    content_import.read_rows(lines, fmt),
+                    created_by=created_by,
+                    batch_size=options["batch_size"],
+                    dry_run=options["dry_run"],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in result["errors"]:
+            self.stderr.write(f"Ligne {error['row']} : {json.dumps(error['errors'], ensure_ascii=False)}")
+        verb = "importable(s)" if options["dry_run"] else "importé(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} contenu(s) {verb}, {len(result['errors'])} ligne(s) en erreur"
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.services import chat_membership, chat_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les accès matérialisés aux salons de chat (ChatRoomMembership) "
+        "et leurs résumés (dernier message, nombre de membres). "
+        "Utile après des mises à jour en masse qui contournent les signaux."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=chat_membership.BATCH_SIZE,
+            help="Nombre de salons lus par lot",
+        )
+
+    def handle(self, *args, **options):
+        added, removed = chat_membership.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{added} accès ajouté(s), {removed} retiré(s)"))
+        rooms = chat_summary.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{rooms} résumé(s) de salon recalculé(s)"))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Church
+from api.services.feed import rebuild_church_feed
+
+
+class Command(BaseCommand):
+    help = "Reconstruit le fil d'actualité matérialisé (ChurchFeedEntry) des églises"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--church",
+            dest="church_ids",
+            action="append",
+            help="Id d'une église à reconstruire (répétable). Par défaut : toutes.",
+        )
+
+    def handle(self, *args, **options):
+        church_ids = options["church_ids"]
+        if church_ids:
+            found = set(Church.objects.filter(id__in=church_ids).values_list("id", flat=True))
+            missing = [cid for cid in church_ids if cid not in {str(f) for f in found}]
+            if missing:
+                raise CommandError(f"Église(s) introuvable(s) : {', '.join(missing)}")
+        else:
+            found = Church.objects.values_list("id", flat=True).iterator()
+
+        churches = 0
+        created = 0
+        for church_id in found:
+            created += rebuild_church_feed(church_id)
+            churches += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{churches} fil(s) reconstruit(s), {created} entrée(s) ajoutée(s)"
+        ))
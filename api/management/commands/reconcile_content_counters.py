@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from api.models import Comment, Content, ContentLike, ContentViewDaily
+from api.services import content_version
+
+
+def _count_subquery(model):
+    rows = (
+        model.objects.filter(content=OuterRef("pk"))
+        .values("content")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les compteurs dénormalisés de Content (likes_count, comments_count, "
+        "views_count) à partir des likes, commentaires et rollups de vues"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--church", dest="church_id", help="Limiter à une église")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Afficher le nombre de contenus en écart sans les corriger",
+        )
+
+    def handle(self, *args, **options):
+        views = (
+            ContentViewDaily.objects.filter(content=OuterRef("pk"))
+            .values("content")
+            .annotate(total=Sum("views"))
+            .values("total")
+        )
+        actual = {
+            "likes_count": _count_subquery(ContentLike),
+            "comments_count": _count_subquery(Comment),
+            "views_count": Coalesce(Subquery(views), 0),
+        }
+
+        qs = Content.objects.all()
+        if options["church_id"]:
+            qs = qs.filter(church_id=options["church_id"])
+
+        drifted = qs.annotate(**{f"actual_{name}": expr for name, expr in actual.items()}).filter(
+            ~Q(likes_count=F("actual_likes_count"))
+            | ~Q(comments_count=F("actual_comments_count"))
+            | ~Q(views_count=F("actual_views_count"))
+        )
+        drifted_ids = list(drifted.values_list("id", flat=True))
+
+        if options["dry_run"] or not drifted_ids:
+            self.stdout.write(f"{len(drifted_ids)} contenu(s) en écart")
+            return
+
+        # Recalcul en une requête UPDATE ... SET x = (SELECT ...) par lot d'ids
+        for start in range(0, len(drifted_ids), 1000):
+            batch = drifted_ids[start:start + 1000]
+            Content.objects.filter(id__in=batch).update(**actual)
+            content_version.bump_for_contents(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"{len(drifted_ids)} contenu(s) corrigé(s)"))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services import content_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les statistiques de contenus pré-agrégées (ContentStatRollup) des églises "
+        "modifiées depuis le dernier passage. À lancer toutes les quelques minutes (cron), "
+        "ou --loop pour un worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=content_stats.BATCH_SIZE,
+            help="Nombre d'églises recalculées par lot",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recalculer toutes les églises, modifiées ou non",
+        )
+        parser.add_argument(
+            "--loop",
+            type=float,
+            metavar="SECONDES",
+            help="Tourner en continu avec cet intervalle entre deux passes",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            refreshed = content_stats.refresh_dirty(
+                batch_size=options["batch_size"], everything=options["all"]
+            )
+            if refreshed or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(f"{refreshed} église(s) recalculée(s)"))
+            if not options["loop"]:
+                return
+            time.sleep(options["loop"])
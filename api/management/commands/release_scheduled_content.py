@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services import release
+
+
+class Command(BaseCommand):
+    help = (
+        "Sort les contenus Coming Soon dont la date est passée (is_released) et notifie "
+        "leurs abonnés par lots. À lancer chaque minute (cron), ou --loop pour un worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=release.BATCH_SIZE,
+            help="Taille des lots de contenus et de notifications",
+        )
+        parser.add_argument(
+            "--loop",
+            type=float,
+            metavar="SECONDES",
+            help="Tourner en continu avec cet intervalle entre deux passes",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released, notified = release.run_release_pass(batch_size=options["batch_size"])
+            if released or notified or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{released} contenu(s) sorti(s), {notified} abonné(s) notifié(s)"
+                ))
+            if not options["loop"]:
+                return
+            time.sleep(options["loop"])
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_church_feeds(apps, schema_editor):
+    """Fan-out initial de tous les contenus publiés (mêmes règles que api/services/feed.py)"""
+    Church = apps.get_model('api', 'Church')
+    ChurchCollaboration = apps.get_model('api', 'ChurchCollaboration')
+    Content = apps.get_model('api', 'Content')
+    ChurchFeedEntry = apps.get_model('api', 'ChurchFeedEntry')
+
+    parent_of = dict(Church.objects.values_list('id', 'parent_id'))
+    children_of = {}
+    for church_id, parent_id in parent_of.items():
+        if parent_id:
+            children_of.setdefault(parent_id, []).append(church_id)
+
+    collaborators_of = {}
+    accepted = ChurchCollaboration.objects.filter(status='ACCEPTED').values_list(
+        'initiator_church_id', 'target_church_id'
+    )
+    for a, b in accepted:
+        collaborators_of.setdefault(a, set()).add(b)
+        collaborators_of.setdefault(b, set()).add(a)
+
+    audiences = {}
+
+    def audience(church_id, is_public):
+        key = (church_id, is_public)
+        if key not in audiences:
+            ids = {church_id}
+            if parent_of.get(church_id):
+                ids.add(parent_of[church_id])
+            stack = list(children_of.get(church_id, []))
+            while stack:
+                child = stack.pop()
+                if child not in ids:
+                    ids.add(child)
+                    stack.extend(children_of.get(child, []))
+            if is_public:
+                ids.update(collaborators_of.get(church_id, ()))
+            audiences[key] = ids
+        return audiences[key]
+
+    batch = []
+    contents = Content.objects.filter(published=True).values_list(
+        'id', 'church_id', 'is_public', 'created_at', 'planned_release_date'
+    )
+    for content_id, church_id, is_public, created_at, planned_release_date in contents.iterator():
+        for feed_church_id in audience(church_id, is_public):
+            batch.append(ChurchFeedEntry(
+                church_id=feed_church_id,
+                content_id=content_id,
+                source_church_id=church_id,
+                created_at=created_at,
+                planned_release_date=planned_release_date,
+            ))
+        if len(batch) >= 1000:
+            ChurchFeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    ChurchFeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_alter_subscription_subscription_plan_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='serviceconfiguration',
+            options={'ordering': ['service_type'], 'verbose_name': 'Configuration de Service', 'verbose_name_plural': 'Configurations'},
+        ),
+        migrations.CreateModel(
+            name='ChurchFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('planned_release_date', models.DateTimeField(blank=True, null=True)),
+                ('church', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='api.church')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='api.content')),
+                ('source_church', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.church')),
+            ],
+            options={
+                'ordering': ['-created_at', '-content'],
+                'indexes': [models.Index(fields=['church', '-created_at', '-content'], name='api_churchf_church__1e43e0_idx')],
+                'unique_together': {('church', 'content')},
+            },
+        ),
+        migrations.RunPython(backfill_church_feeds, migrations.RunPython.noop),
+    ]
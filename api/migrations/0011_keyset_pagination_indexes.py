@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_churchfeedentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['church', 'planned_release_date'], name='api_content_church__250a6e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentnotification',
+            index=models.Index(fields=['content', '-subscribed_at'], name='api_content_content_aa0aad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentnotification',
+            index=models.Index(fields=['user', 'is_notified', '-subscribed_at'], name='api_content_user_id_196373_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='programmecontentnotification',
+            index=models.Index(fields=['programme', 'user', '-created_at'], name='api_program_program_9df36d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='programmemember',
+            index=models.Index(fields=['programme', '-joined_at'], name='api_program_program_9a4678_idx'),
+        ),
+    ]
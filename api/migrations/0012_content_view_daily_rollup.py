@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_daily_views(apps, schema_editor):
+    ContentView = apps.get_model('api', 'ContentView')
+    ContentViewDaily = apps.get_model('api', 'ContentViewDaily')
+    from django.db.models import Count
+    from django.db.models.functions import TruncDate
+
+    rows = (
+        ContentView.objects
+        .annotate(day=TruncDate('viewed_at'))
+        .values('content_id', 'day')
+        .annotate(views=Count('id'))
+        .order_by()
+    )
+    ContentViewDaily.objects.bulk_create(
+        (ContentViewDaily(content_id=r['content_id'], day=r['day'], views=r['views']) for r in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='contentview',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='contentview',
+            index=models.Index(fields=['user', '-viewed_at'], name='api_content_user_id_500042_idx'),
+        ),
+        migrations.AddField(
+            model_name='contentviewdaily',
+            name='content',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='api.content'),
+        ),
+        migrations.AddIndex(
+            model_name='contentviewdaily',
+            index=models.Index(fields=['day'], name='api_content_day_9e70ee_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='contentviewdaily',
+            unique_together={('content', 'day')},
+        ),
+        migrations.RunPython(backfill_daily_views, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:29
+
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    from django.db.models import Count, OuterRef, Subquery, Sum
+    from django.db.models.functions import Coalesce
+
+    Content = apps.get_model('api', 'Content')
+    ContentLike = apps.get_model('api', 'ContentLike')
+    Comment = apps.get_model('api', 'Comment')
+    ContentViewDaily = apps.get_model('api', 'ContentViewDaily')
+
+    def per_content(model, aggregate):
+        rows = model.objects.filter(content=OuterRef('pk')).values('content').annotate(total=aggregate).values('total')
+        return Coalesce(Subquery(rows), 0)
+
+    Content.objects.update(
+        likes_count=per_content(ContentLike, Count('id')),
+        comments_count=per_content(Comment, Count('id')),
+        views_count=per_content(ContentViewDaily, Sum('views')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_content_view_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['-likes_count'], name='api_content_likes_c_ff14fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['-views_count'], name='api_content_views_c_3d6c80_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['church', '-likes_count'], name='api_content_church__dc6326_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['church', '-views_count'], name='api_content_church__ef55a7_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
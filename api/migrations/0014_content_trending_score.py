@@ -0,0 +1,73 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_scores(apps, schema_editor):
+    """Même calcul que api.services.trending.rebuild_all, sur les modèles historiques"""
+    import datetime
+    import math
+    from collections import defaultdict
+    from django.conf import settings
+    from django.utils import timezone
+
+    Content = apps.get_model('api', 'Content')
+    ContentLike = apps.get_model('api', 'ContentLike')
+    ContentScore = apps.get_model('api', 'ContentScore')
+    ContentViewDaily = apps.get_model('api', 'ContentViewDaily')
+
+    half_life = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 48) * 3600
+    epoch = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    now = timezone.now()
+
+    def decayed(weight, at):
+        return weight * 2 ** (-(now - at).total_seconds() / half_life)
+
+    totals = defaultdict(float)
+    for content_id, day, views in ContentViewDaily.objects.values_list('content_id', 'day', 'views').iterator():
+        at = timezone.make_aware(datetime.datetime.combine(day, datetime.time(12)))
+        totals[content_id] += decayed(views, at)
+    for content_id, liked_at in ContentLike.objects.values_list('content_id', 'liked_at').iterator():
+        totals[content_id] += decayed(2, liked_at)
+
+    churches = dict(Content.objects.values_list('id', 'church_id'))
+    ContentScore.objects.bulk_create(
+        [
+            ContentScore(
+                content_id=content_id,
+                church_id=churches[content_id],
+                score=score,
+                scored_at=now,
+                rank=math.log2(score) + (now - epoch).total_seconds() / half_life,
+            )
+            for content_id, score in totals.items()
+            if score >= 1e-3 and content_id in churches
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_content_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentScore',
+            fields=[
+                ('content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='api.content')),
+                ('score', models.FloatField(default=0)),
+                ('scored_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('rank', models.FloatField(default=0)),
+                ('church', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.church')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['church', '-rank'], name='api_content_church__b8b41d_idx'), models.Index(fields=['-rank'], name='api_content_rank_c58e45_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
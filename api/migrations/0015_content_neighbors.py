@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_content_trending_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='api.content')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.content')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content', '-score'], name='api_content_content_bfc008_idx')],
+                'unique_together': {('content', 'neighbor')},
+            },
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:10
+
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # Configurations insensibles aux accents (unaccent puis stemming)
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'christlumen_fr') THEN
+            CREATE TEXT SEARCH CONFIGURATION christlumen_fr (COPY = french);
+            ALTER TEXT SEARCH CONFIGURATION christlumen_fr
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+        END IF;
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'christlumen_en') THEN
+            CREATE TEXT SEARCH CONFIGURATION christlumen_en (COPY = english);
+            ALTER TEXT SEARCH CONFIGURATION christlumen_en
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, english_stem;
+        END IF;
+    END
+    $$
+    """,
+    "ALTER TABLE api_content ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION api_content_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('christlumen_fr', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('christlumen_en', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('christlumen_fr', coalesce(NEW.description, '')), 'B') ||
+            setweight(to_tsvector('christlumen_en', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_content_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description ON api_content
+        FOR EACH ROW EXECUTE FUNCTION api_content_search_vector_update()
+    """,
+    # Remplissage initial (déclenche le trigger)
+    "UPDATE api_content SET title = title",
+    "CREATE INDEX api_content_search_vector_idx ON api_content USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS api_content_search_vector_idx",
+    "DROP TRIGGER IF EXISTS api_content_search_vector_trigger ON api_content",
+    "DROP FUNCTION IF EXISTS api_content_search_vector_update()",
+    "ALTER TABLE api_content DROP COLUMN IF EXISTS search_vector",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS christlumen_fr",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS christlumen_en",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_content_fts USING fts5(
+        title, description,
+        content='api_content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_content_fts_insert AFTER INSERT ON api_content BEGIN
+        INSERT INTO api_content_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_content_fts_delete AFTER DELETE ON api_content BEGIN
+        INSERT INTO api_content_fts(api_content_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_content_fts_update AFTER UPDATE OF title, description ON api_content BEGIN
+        INSERT INTO api_content_fts(api_content_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO api_content_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO api_content_fts(api_content_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS api_content_fts_update",
+    "DROP TRIGGER IF EXISTS api_content_fts_delete",
+    "DROP TRIGGER IF EXISTS api_content_fts_insert",
+    "DROP TABLE IF EXISTS api_content_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_content_neighbors'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
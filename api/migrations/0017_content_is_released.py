@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:36
+
+from django.db import migrations, models
+
+
+def backfill_is_released(apps, schema_editor):
+    from django.utils import timezone
+
+    Content = apps.get_model('api', 'Content')
+    Content.objects.filter(
+        published=True,
+        planned_release_date__isnull=False,
+        planned_release_date__gt=timezone.now(),
+    ).update(is_released=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_content_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='is_released',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(backfill_is_released, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['is_released', '-created_at'], name='api_content_is_rele_155c06_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['church', 'is_released', '-created_at'], name='api_content_church__f1b81d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['is_released', 'planned_release_date'], name='api_content_is_rele_324a6d_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_content_is_released'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChurchContentVersion',
+            fields=[
+                ('church', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='content_version', serialize=False, to='api.church')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('modified_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='playlist',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
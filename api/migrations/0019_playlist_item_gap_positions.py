@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:52
+
+from django.db import migrations, models
+
+GAP = 1024
+
+
+def spread_positions(apps, schema_editor):
+    """Positions existantes (souvent toutes à 0) -> GAP, 2*GAP... dans l'ordre actuel (place libre en tête)"""
+    PlaylistItem = apps.get_model('api', 'PlaylistItem')
+    changed = []
+    playlist_id = None
+    index = 0
+    for item in PlaylistItem.objects.order_by('playlist_id', 'position', 'id').iterator():
+        if item.playlist_id != playlist_id:
+            playlist_id = item.playlist_id
+            index = 0
+        if item.position != (index + 1) * GAP:
+            item.position = (index + 1) * GAP
+            changed.append(item)
+        index += 1
+    PlaylistItem.objects.bulk_update(changed, ['position'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_conditional_requests'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='playlistitem',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.RunPython(spread_positions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='playlistitem',
+            index=models.Index(fields=['playlist', 'position'], name='api_playlis_playlis_1ec2bc_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_playlist_item_gap_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='churchcontentversion',
+            name='stats_version',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ContentStatRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateTimeField()),
+                ('type', models.CharField(max_length=20)),
+                ('contents', models.PositiveIntegerField(default=0)),
+                ('likes', models.PositiveBigIntegerField(default=0)),
+                ('views', models.PositiveBigIntegerField(default=0)),
+                ('comments', models.PositiveBigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('church', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='content_stat_rollups', to='api.church')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('church', 'month', 'type'), name='uniq_content_stat_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_content_stat_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('policy', models.CharField(db_index=True, max_length=50)),
+                ('path', models.CharField(max_length=500)),
+                ('rows', models.PositiveIntegerField()),
+                ('oldest', models.DateTimeField()),
+                ('newest', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('policy', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('key', models.CharField(max_length=64)),
+                ('rows', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('policy', 'day', 'key'), name='uniq_archived_daily_count')],
+            },
+        ),
+    ]
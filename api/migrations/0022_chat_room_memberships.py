@@ -0,0 +1,65 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_memberships(apps, schema_editor):
+    """Accès existants, mêmes règles que api/services/chat_membership.py"""
+    ChatRoom = apps.get_model('api', 'ChatRoom')
+    ChatRoomMembership = apps.get_model('api', 'ChatRoomMembership')
+    ChurchAdmin = apps.get_model('api', 'ChurchAdmin')
+    ChurchCommission = apps.get_model('api', 'ChurchCommission')
+    ProgrammeMember = apps.get_model('api', 'ProgrammeMember')
+    User = apps.get_model('api', 'User')
+
+    rows = []
+    for room in ChatRoom.objects.iterator():
+        user_ids = set(
+            ChurchAdmin.objects.filter(church_id=room.church_id, role='OWNER').values_list('user_id', flat=True)
+        )
+        if room.room_type == 'CHURCH':
+            members = User.objects.filter(current_church_id=room.church_id).values_list('id', flat=True)
+        elif room.room_type == 'PASTOR':
+            members = ChurchAdmin.objects.filter(church_id=room.church_id, role='PASTOR').values_list('user_id', flat=True)
+        elif room.room_type == 'COMMISSION' and room.commission_id:
+            members = ChurchCommission.objects.filter(
+                church_id=room.church_id, commission_id=room.commission_id
+            ).values_list('user_id', flat=True)
+        elif room.room_type == 'PROGRAMME' and room.programme_id:
+            members = ProgrammeMember.objects.filter(programme_id=room.programme_id).values_list('user_id', flat=True)
+        elif room.room_type == 'CUSTOM':
+            members = room.members.values_list('id', flat=True)
+        else:
+            members = []
+        user_ids.update(members)
+        rows.extend(ChatRoomMembership(room_id=room.id, user_id=user_id) for user_id in user_ids)
+        if len(rows) >= 5000:
+            ChatRoomMembership.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+            rows = []
+    ChatRoomMembership.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_retention_archives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatRoomMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='api.chatroom')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'room'], name='api_chatroo_user_id_17a0ce_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'user'), name='uniq_chat_room_membership')],
+            },
+        ),
+        migrations.RunPython(fill_memberships, migrations.RunPython.noop),
+    ]
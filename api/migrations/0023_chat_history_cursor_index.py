@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_chat_room_memberships'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='api_chatmes_room_id_c47c7b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['room', '-created_at', '-id'], name='api_chatmes_room_id_d0b71e_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_chat_message_preset_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroommembership',
+            name='last_read_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='chatroommembership',
+            name='last_read_message_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
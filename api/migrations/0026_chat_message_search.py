@@ -0,0 +1,90 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    # Configurations christlumen_fr / christlumen_en créées par 0016_content_search
+    "ALTER TABLE api_chatmessage ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION api_chatmessage_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            to_tsvector('christlumen_fr', coalesce(NEW.message, '')) ||
+            to_tsvector('christlumen_en', coalesce(NEW.message, ''));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_chatmessage_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF message ON api_chatmessage
+        FOR EACH ROW EXECUTE FUNCTION api_chatmessage_search_vector_update()
+    """,
+    # Remplissage initial (déclenche le trigger)
+    "UPDATE api_chatmessage SET message = message",
+    "CREATE INDEX api_chatmessage_search_vector_idx ON api_chatmessage USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS api_chatmessage_search_vector_idx",
+    "DROP TRIGGER IF EXISTS api_chatmessage_search_vector_trigger ON api_chatmessage",
+    "DROP FUNCTION IF EXISTS api_chatmessage_search_vector_update()",
+    "ALTER TABLE api_chatmessage DROP COLUMN IF EXISTS search_vector",
+]
+
+# La clé primaire est un UUID : l'index FTS5 suit le rowid implicite de la table
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_chatmessage_fts USING fts5(
+        message,
+        content='api_chatmessage', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_chatmessage_fts_insert AFTER INSERT ON api_chatmessage BEGIN
+        INSERT INTO api_chatmessage_fts(rowid, message) VALUES (new.rowid, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_chatmessage_fts_delete AFTER DELETE ON api_chatmessage BEGIN
+        INSERT INTO api_chatmessage_fts(api_chatmessage_fts, rowid, message)
+        VALUES ('delete', old.rowid, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_chatmessage_fts_update AFTER UPDATE OF message ON api_chatmessage BEGIN
+        INSERT INTO api_chatmessage_fts(api_chatmessage_fts, rowid, message)
+        VALUES ('delete', old.rowid, old.message);
+        INSERT INTO api_chatmessage_fts(rowid, message) VALUES (new.rowid, new.message);
+    END
+    """,
+    "INSERT INTO api_chatmessage_fts(api_chatmessage_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_update",
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_delete",
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_insert",
+    "DROP TABLE IF EXISTS api_chatmessage_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_chat_read_cursors'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_summaries(apps, schema_editor):
+    """Résumés existants, mêmes règles que api/services/chat_summary.py"""
+    ChatRoom = apps.get_model('api', 'ChatRoom')
+    ChatMessage = apps.get_model('api', 'ChatMessage')
+    ChatRoomMembership = apps.get_model('api', 'ChatRoomMembership')
+    for room in ChatRoom.objects.only('id').iterator(chunk_size=500):
+        values = {'members_count': ChatRoomMembership.objects.filter(room_id=room.id).count()}
+        last = ChatMessage.objects.filter(room_id=room.id).order_by('-created_at', '-id').first()
+        if last is not None:
+            text = ' '.join((last.message or '').split())
+            if len(text) > 200:
+                text = text[:199] + '…'
+            if not text:
+                text = '[image]' if last.image_url else '[audio]' if last.audio_url else ''
+            values.update(
+                last_message_id=last.id,
+                last_message_at=last.created_at,
+                last_message_preview=text,
+                last_message_user_id=last.user_id,
+            )
+        ChatRoom.objects.filter(id=room.id).update(**values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_chat_message_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='members_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['church', '-last_message_at'], name='api_chatroo_church__751797_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatroommembership',
+            index=models.Index(fields=['room', '-joined_at'], name='api_chatroo_room_id_530a2b_idx'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+from importlib import import_module
+
+from django.db import migrations
+
+
+# Le rowid implicite de api_chatmessage (clé primaire UUID) peut être renuméroté par
+# VACUUM : l'index FTS5 est désormais indexé par une clé entière stable
+SQLITE_FORWARD = [
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_update",
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_delete",
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_insert",
+    "DROP TABLE IF EXISTS api_chatmessage_fts",
+    """
+    CREATE TABLE IF NOT EXISTS api_chatmessage_fts_key (
+        fts_rowid INTEGER PRIMARY KEY,
+        message_id char(32) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS api_chatmessage_fts USING fts5(
+        message,
+        content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_chatmessage_fts_insert AFTER INSERT ON api_chatmessage BEGIN
+        INSERT INTO api_chatmessage_fts_key(message_id) VALUES (new.id);
+        INSERT INTO api_chatmessage_fts(rowid, message)
+        SELECT fts_rowid, new.message FROM api_chatmessage_fts_key WHERE message_id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_chatmessage_fts_delete AFTER DELETE ON api_chatmessage BEGIN
+        INSERT INTO api_chatmessage_fts(api_chatmessage_fts, rowid, message)
+        SELECT 'delete', fts_rowid, old.message FROM api_chatmessage_fts_key WHERE message_id = old.id;
+        DELETE FROM api_chatmessage_fts_key WHERE message_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_chatmessage_fts_update AFTER UPDATE OF message ON api_chatmessage BEGIN
+        INSERT INTO api_chatmessage_fts(api_chatmessage_fts, rowid, message)
+        SELECT 'delete', fts_rowid, old.message FROM api_chatmessage_fts_key WHERE message_id = old.id;
+        INSERT INTO api_chatmessage_fts(rowid, message)
+        SELECT fts_rowid, new.message FROM api_chatmessage_fts_key WHERE message_id = new.id;
+    END
+    """,
+    # Remplissage initial
+    "INSERT INTO api_chatmessage_fts_key(message_id) SELECT id FROM api_chatmessage",
+    """
+    INSERT INTO api_chatmessage_fts(rowid, message)
+    SELECT k.fts_rowid, m.message FROM api_chatmessage_fts_key k
+    JOIN api_chatmessage m ON m.id = k.message_id
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_update",
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_delete",
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_insert",
+    "DROP TABLE IF EXISTS api_chatmessage_fts",
+    "DROP TABLE IF EXISTS api_chatmessage_fts_key",
+]
+
+
+def forward(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQLITE_FORWARD:
+        schema_editor.execute(sql)
+
+
+def backward(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    previous = import_module('api.migrations.0026_chat_message_search')
+    for sql in SQLITE_BACKWARD + previous.SQLITE_FORWARD:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_chat_room_summaries'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import Q
+
+
+def mark_released_subscriptions_notified(apps, schema_editor):
+    """
+    Abonnements antérieurs au worker de sortie : is_notified n'était jamais mis à jour.
+    Ceux dont le contenu est déjà sorti sont marqués notifiés, sinon la première passe
+    de release_scheduled_content notifierait tout l'historique.
+    """
+    from django.utils import timezone
+
+    ContentNotification = apps.get_model('api', 'ContentNotification')
+    now = timezone.now()
+    ContentNotification.objects.filter(
+        Q(content__planned_release_date__isnull=True) | Q(content__planned_release_date__lte=now),
+        is_notified=False,
+        content__published=True,
+    ).update(is_notified=True, notified_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_chat_message_search_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_released_subscriptions_notified, migrations.RunPython.noop),
+    ]
@@ -239,6 +239,8 @@ class Content(models.Model):
         ("PHYSICAL", "Physique"),
     ]
 
+    COUNTER_FIELDS = ("likes_count", "views_count", "comments_count")
+
     church = models.ForeignKey("Church", on_delete=models.CASCADE)
     delivery_type = models.CharField(max_length=20, choices=DELIVERY_CHOICES, default="DIGITAL")
     
@@ -286,6 +288,15 @@ class Content(models.Model):
         db_index=True,
         help_text="Date prévue de publication (Coming Soon)"
     )
+    # Faux tant qu'un contenu publié attend sa date de sortie : recalculé à chaque save()
+    # et basculé à True par la commande release_scheduled_content quand la date arrive
+    is_released = models.BooleanField(default=True)
+
+    # Compteurs d'engagement dénormalisés : modifiés uniquement par des UPDATE F()
+    # (likes, commentaires, flush des vues) et recalculés par reconcile_content_counters
+    likes_count = models.PositiveIntegerField(default=0)
+    views_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
 
     # Ticket tiers stored directly on Content (prix et quantités par type)
     # Exemple: classic, vip, premium
@@ -321,6 +332,19 @@ class Content(models.Model):
             if total_tier_qty > self.capacity:
                 raise ValidationError("Sum of tier quantities exceeds content capacity")
 
+        self.is_released = not self.is_coming_soon()
+        if kwargs.get("update_fields") is not None:
+            update_fields = set(kwargs["update_fields"])
+            if update_fields & {"published", "planned_release_date"}:
+                kwargs["update_fields"] = list(update_fields | {"is_released"})
+
+        # Ne jamais réécrire les compteurs avec une valeur lue plus tôt (écraserait les F())
+        if not self._state.adding and not kwargs.get("force_insert") and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+
         super().save(*args, **kwargs)
 
     def available_tickets(self):
@@ -349,7 +373,18 @@ class Content(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["start_at"]), models.Index(fields=["-created_at"])]
+        indexes = [
+            models.Index(fields=["start_at"]),
+            models.Index(fields=["-created_at"]),
+            models.Index(fields=["church", "planned_release_date"]),
+            models.Index(fields=["is_released", "-created_at"]),
+            models.Index(fields=["church", "is_released", "-created_at"]),
+            models.Index(fields=["is_released", "planned_release_date"]),
+            models.Index(fields=["-likes_count"]),
+            models.Index(fields=["-views_count"]),
+            models.Index(fields=["church", "-likes_count"]),
+            models.Index(fields=["church", "-views_count"]),
+        ]
   
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -367,18 +402,73 @@ class Playlist(models.Model):
     description = models.TextField(blank=True)
     cover_image_url = models.URLField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
 class PlaylistItem(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE)
     content = models.ForeignKey(Content, on_delete=models.CASCADE)
+    # Positions espacées (multiples de playlist_order.GAP) : un déplacement prend le milieu
+    # de ses voisins et n'écrit qu'une ligne (voir api/services/playlist_order.py)
     position = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        ordering = ["position", "id"]
+        indexes = [models.Index(fields=["playlist", "position"])]
+
 class ContentView(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.ForeignKey(Content, on_delete=models.CASCADE)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # Horodaté à la réception (les vues sont insérées en différé par lots)
+    viewed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "-viewed_at"])]
+
+
+class ContentViewDaily(models.Model):
+    """Nombre de vues par contenu et par jour (alimenté au flush du buffer de vues)"""
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name="daily_views")
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [["content", "day"]]
+        indexes = [models.Index(fields=["day"])]
+
+
+class ContentScore(models.Model):
+    """
+    Score de tendance à décroissance exponentielle (voir api/services/trending.py).
+    `score` est la valeur exacte à `scored_at` ; `rank` = log2(score) + temps en
+    demi-vies, comparable entre lignes sans les re-décroître (tri top-N par index).
+    """
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, primary_key=True, related_name="trending_score")
+    church = models.ForeignKey("Church", on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField(default=0)
+    scored_at = models.DateTimeField(default=timezone.now)
+    rank = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["church", "-rank"]),
+            models.Index(fields=["-rank"]),
+        ]
+
+
+class ContentNeighbor(models.Model):
+    """
+    Voisins les plus proches d'un contenu (modèle item-à-item précalculé par
+    la commande build_recommendations, voir api/services/recommender.py)
+    """
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name="neighbors")
+    neighbor = models.ForeignKey(Content, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = [["content", "neighbor"]]
+        indexes = [models.Index(fields=["content", "-score"])]
 
 class ContentLike(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -397,6 +487,7 @@ class Category(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
 class OTP(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -1006,6 +1097,10 @@ class ChatRoom(models.Model):
         ('PROGRAMME', 'Programme'),
         ('CUSTOM', 'Personnalisé'),
     )
+
+    SUMMARY_FIELDS = (
+        "last_message_id", "last_message_at", "last_message_preview", "last_message_user", "members_count",
+    )
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     church = models.ForeignKey("Church", on_delete=models.CASCADE, related_name="chat_rooms")
@@ -1025,109 +1120,73 @@ class ChatRoom(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey("User", on_delete=models.SET_NULL, null=True, related_name="created_chat_rooms")
 
+    # Résumé dénormalisé pour les listes (api/services/chat_summary.py)
+    last_message_id = models.UUIDField(null=True, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=200, blank=True, default="")
+    last_message_user = models.ForeignKey(
+        "User", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    members_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ["-updated_at"]
         indexes = [
             models.Index(fields=["church", "room_type"]),
             models.Index(fields=["commission"]),
+            models.Index(fields=["church", "-last_message_at"]),
         ]
 
     def __str__(self):
         return f"{self.church.title} - {self.get_room_type_display()} - {self.name}"
+
+    def save(self, *args, **kwargs):
+        # Ne jamais réécrire le résumé avec une valeur lue plus tôt (tenu par chat_summary)
+        if not self._state.adding and not kwargs.get("force_insert") and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.SUMMARY_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     def user_has_access(self, user):
-        """Check if a user has access to this room"""
-        from django.db.models import Q
-        
+        """Check if a user has access to this room (ligne de ChatRoomMembership)"""
         if not user.is_authenticated:
             return False
-        
-        # Owners always have access to all rooms of their church
-        is_owner = User.objects.filter(
-            id=user.id,
-            church_roles__church=self.church,
-            church_roles__role='OWNER'
-        ).exists()
-        if is_owner:
-            return True
-        
-        # Check based on room type
-        if self.room_type == 'CHURCH':
-            return user.current_church_id == self.church_id
-        
-        elif self.room_type == 'OWNER':
-            return User.objects.filter(
-                id=user.id,
-                church_roles__church=self.church,
-                church_roles__role='OWNER'
-            ).exists()
-        
-        elif self.room_type == 'PASTOR':
-            return User.objects.filter(
-                id=user.id,
-                church_roles__church=self.church,
-                church_roles__role='PASTOR'
-            ).exists()
-        
-        elif self.room_type == 'COMMISSION':
-            if self.commission:
-                return User.objects.filter(
-                    id=user.id,
-                    church_commissions__commission=self.commission
-                ).exists()
-            return False
-        
-        elif self.room_type == 'CUSTOM':
-            return self.members.filter(id=user.id).exists()
-        
-        return False
-    
+        return ChatRoomMembership.objects.filter(room_id=self.id, user_id=user.id).exists()
+
     def get_members_queryset(self):
-        """Get all members who have access to this room based on type"""
-        from django.db.models import Q
-        
-        # Get owners
-        owners_qs = User.objects.filter(
-            church_roles__church=self.church,
-            church_roles__role='OWNER'
-        )
-        
-        if self.room_type == 'CHURCH':
-            # All church members + owners
-            return User.objects.filter(
-                Q(current_church=self.church) | 
-                Q(church_roles__church=self.church, church_roles__role='OWNER')
-            ).distinct()
-        
-        elif self.room_type == 'OWNER':
-            # All owners of the church
-            return owners_qs.distinct()
-        
-        elif self.room_type == 'PASTOR':
-            # All pastors + owners
-            return User.objects.filter(
-                Q(church_roles__church=self.church, church_roles__role='PASTOR') |
-                Q(church_roles__church=self.church, church_roles__role='OWNER')
-            ).distinct()
-        
-        elif self.room_type == 'COMMISSION':
-            # All commission members + owners
-            if self.commission:
-                return User.objects.filter(
-                    Q(church_commissions__commission=self.commission) |
-                    Q(church_roles__church=self.church, church_roles__role='OWNER')
-                ).distinct()
-            return owners_qs.distinct()
-        
-        elif self.room_type == 'CUSTOM':
-            # Custom members + owners
-            custom_members = self.members.values_list('id', flat=True)
-            return User.objects.filter(
-                Q(id__in=custom_members) |
-                Q(church_roles__church=self.church, church_roles__role='OWNER')
-            ).distinct()
-        
-        return owners_qs.distinct()
+        """Get all members who have access to this room (ChatRoomMembership)"""
+        return User.objects.filter(chat_memberships__room_id=self.id)
+
+
+class ChatRoomMembership(models.Model):
+    """
+    Accès matérialisé à un salon : une ligne par (salon, utilisateur) autorisé.
+    Tenue à jour par api/services/chat_membership.py (signaux sur User.current_church,
+    ChurchAdmin, ChurchCommission, ProgrammeMember, ChatRoom et ChatRoom.members).
+    """
+    room = models.ForeignKey("ChatRoom", on_delete=models.CASCADE, related_name="memberships")
+    user = models.ForeignKey("User", on_delete=models.CASCADE, related_name="chat_memberships")
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    # Curseur de lecture (api/services/chat_read.py) : les non-lus sont les messages
+    # postérieurs à last_read_at. Pas de clé étrangère : l'archivage supprime des messages.
+    last_read_at = models.DateTimeField(default=timezone.now)
+    last_read_message_id = models.UUIDField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "user"], name="uniq_chat_room_membership"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "room"]),
+            # Liste paginée des membres d'un salon
+            models.Index(fields=["room", "-joined_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.room_id}"
 
 class ChatMessage(models.Model):
     """Chat messages in a room"""
@@ -1140,12 +1199,15 @@ class ChatMessage(models.Model):
     image_url = models.URLField(max_length=500, null=True, blank=True)
     audio_url = models.URLField(max_length=500, null=True, blank=True)
     
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Valeur par défaut plutôt qu'auto_now_add : le consumer fixe la date diffusée
+    # avant l'écriture groupée (api/services/chat_writer.py)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         ordering = ["created_at"]
         indexes = [
-            models.Index(fields=["room", "-created_at"]),
+            # Historique par curseurs (api/services/chat_history.py)
+            models.Index(fields=["room", "-created_at", "-id"]),
             models.Index(fields=["user"]),
         ]
 
@@ -1384,6 +1446,143 @@ class ChurchCollaboration(models.Model):
         self.rejected_at = timezone.now()
         self.save()
 
+# =====================================================
+# Church Feed Model - Fil d'actualité matérialisé
+# =====================================================
+
+class ChurchFeedEntry(models.Model):
+    """
+    Une ligne par (église, contenu) visible dans le fil d'actualité de l'église.
+    Rempli par fan-out (voir api/services/feed.py) pour que la lecture du fil
+    soit un simple parcours d'index sur (church, -created_at).
+    """
+
+    # L'église dont c'est le fil
+    church = models.ForeignKey(
+        "Church",
+        on_delete=models.CASCADE,
+        related_name="feed_entries"
+    )
+    content = models.ForeignKey(
+        "Content",
+        on_delete=models.CASCADE,
+        related_name="feed_entries"
+    )
+    # L'église qui a publié le contenu
+    source_church = models.ForeignKey(
+        "Church",
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+
+    # Copiés depuis Content (tri et filtre Coming Soon sans jointure)
+    created_at = models.DateTimeField()
+    planned_release_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [['church', 'content']]
+        ordering = ['-created_at', '-content']
+        indexes = [
+            models.Index(fields=['church', '-created_at', '-content']),
+        ]
+
+    def __str__(self):
+        return f"{self.church_id} ← {self.content_id}"
+
+
+# =====================================================
+# Church Content Version - requêtes conditionnelles
+# =====================================================
+
+class ChurchContentVersion(models.Model):
+    """
+    Tampon de version des contenus d'une église, incrémenté (UPDATE F()) à chaque
+    changement visible dans ses contenus, tags, compteurs ou playlists.
+    Sert à calculer les ETag / Last-Modified (voir api/conditional.py).
+    """
+
+    church = models.OneToOneField(
+        "Church",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="content_version"
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    modified_at = models.DateTimeField(default=timezone.now)
+    # Version pour laquelle les ContentStatRollup de l'église ont été calculés
+    # (None = jamais) : refresh_content_stats ne recalcule que les églises modifiées
+    stats_version = models.PositiveBigIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.church_id} v{self.version}"
+
+
+# =====================================================
+# Content Stat Rollup - statistiques pré-agrégées
+# =====================================================
+
+class ContentStatRollup(models.Model):
+    """
+    Agrégat des contenus sortis (is_released) par église, mois de création et type.
+    Recalculé par api/services/content_stats.py pour les églises dont la version de
+    contenu a changé ; church=None porte les totaux toutes églises confondues.
+    """
+
+    church = models.ForeignKey(
+        "Church",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="content_stat_rollups"
+    )
+    month = models.DateTimeField()
+    type = models.CharField(max_length=20)
+    contents = models.PositiveIntegerField(default=0)
+    likes = models.PositiveBigIntegerField(default=0)
+    views = models.PositiveBigIntegerField(default=0)
+    comments = models.PositiveBigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["church", "month", "type"], name="uniq_content_stat_rollup"),
+        ]
+
+    def __str__(self):
+        return f"{self.church_id or 'global'} {self.month:%Y-%m} {self.type}: {self.contents}"
+
+
+# =====================================================
+# Retention - archivage des lignes brutes anciennes
+# =====================================================
+
+class ArchiveBatch(models.Model):
+    """Un lot de lignes déplacé vers un fichier JSONL compressé (api/services/retention.py)"""
+
+    policy = models.CharField(max_length=50, db_index=True)
+    path = models.CharField(max_length=500)
+    rows = models.PositiveIntegerField()
+    oldest = models.DateTimeField()
+    newest = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.policy}: {self.rows} ligne(s) -> {self.path}"
+
+
+class ArchivedDailyCount(models.Model):
+    """Nombre de lignes archivées par politique, jour et clé (salon, contenu, type...)"""
+
+    policy = models.CharField(max_length=50)
+    day = models.DateField()
+    key = models.CharField(max_length=64)
+    rows = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["policy", "day", "key"], name="uniq_archived_daily_count"),
+        ]
+
 # =====================================================
 # Testimony Like Model
 # =====================================================
@@ -1594,6 +1793,7 @@ class ProgrammeMember(models.Model):
         ordering = ['-joined_at']
         indexes = [
             models.Index(fields=['programme', 'user']),
+            models.Index(fields=['programme', '-joined_at']),
             models.Index(fields=['user']),
         ]
     
@@ -1637,7 +1837,9 @@ class ContentNotification(models.Model):
         ordering = ['-subscribed_at']
         indexes = [
             models.Index(fields=['content', 'is_notified']),
+            models.Index(fields=['content', '-subscribed_at']),
             models.Index(fields=['user', 'is_notified']),
+            models.Index(fields=['user', 'is_notified', '-subscribed_at']),
         ]
     
     def __str__(self):
@@ -1738,6 +1940,7 @@ class ProgrammeContentNotification(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['programme', 'user', 'is_notified']),
+            models.Index(fields=['programme', 'user', '-created_at']),
             models.Index(fields=['programme', 'is_notified']),
             models.Index(fields=['user', 'is_read']),
         ]
@@ -0,0 +1,161 @@
+# api/pagination.py
+import base64
+import datetime
+import json
+import uuid
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+
+
+class KeysetPaginator:
+    """
+    Pagination par curseur (keyset) pour les listes infinies.
+
+    Le tri est un tuple de champs dont le dernier est unique (ex: ("-created_at", "-id")).
+    Le curseur encode les valeurs de la dernière ligne renvoyée : la page suivante est
+    un simple `WHERE (created_at, id) < (...)` servi par l'index, donc la page 500
+    coûte autant que la page 1. Les champs du tri ne doivent pas être NULL.
+
+    Query params :
+    - limit : taille de page (défaut `default_limit`, max `max_limit`)
+    - cursor : curseur opaque renvoyé dans `next_cursor`
+    - offset : ancien mode, conservé pour la compatibilité (ignoré si `cursor`)
+    - count : true|false. Par défaut le total n'est calculé que sans curseur ;
+      `count=false` évite la requête COUNT (la clé `count` vaut alors null).
+
+    Utilisation :
+        paginator = KeysetPaginator(ordering=("-created_at", "-id"))
+        page = paginator.paginate_queryset(queryset, request)
+        serializer = MySerializer(page, many=True)
+        return Response(paginator.get_paginated_data(serializer.data))
+    """
+
+    def __init__(self, ordering=("-created_at", "-id"), default_limit=20, max_limit=100):
+        self.ordering = tuple(ordering)
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+
+        self.limit = default_limit
+        self.offset = None
+        self.count = None
+        self.next_offset = None
+        self.next_cursor = None
+
+    # -------------------------------------------------
+    # Curseur
+    # -------------------------------------------------
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return value
+
+    @staticmethod
+    def _value(obj, name):
+        # Lignes .values() (dict) ou instances
+        return obj[name] if isinstance(obj, dict) else getattr(obj, name)
+
+    def encode_cursor(self, obj):
+        values = [self._encode_value(self._value(obj, f.lstrip("-"))) for f in self.ordering]
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError):
+            raise ParseError("Curseur invalide")
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ParseError("Curseur invalide")
+        return values
+
+    def _typed_values(self, model, values):
+        """Valeurs du curseur converties au type des champs du tri. Lève ParseError"""
+        typed = []
+        for field_name, value in zip(self.ordering, values):
+            # Les champs du tri ne sont jamais NULL ; un curseur ne porte que des scalaires
+            if value is None or not isinstance(value, (str, int, float)) or isinstance(value, bool):
+                raise ParseError("Curseur invalide")
+            try:
+                field = model._meta.get_field(field_name.lstrip("-"))
+            except FieldDoesNotExist:
+                # Annotation : pas de conversion possible
+                typed.append(value)
+                continue
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise ParseError("Curseur invalide")
+            if value is None:
+                raise ParseError("Curseur invalide")
+            typed.append(value)
+        return typed
+
+    def _after_cursor(self, values):
+        """(a, b, c) après (va, vb, vc) : a > va OU (a = va ET b > vb) OU ..."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    # -------------------------------------------------
+    # Pagination
+    # -------------------------------------------------
+
+    def _parse_int(self, value, default):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+
+    def paginate_queryset(self, queryset, request):
+        params = request.query_params
+        self.limit = max(1, min(self._parse_int(params.get("limit"), self.default_limit), self.max_limit))
+        cursor = params.get("cursor")
+
+        count_param = params.get("count")
+        if count_param is None:
+            with_count = not cursor
+        else:
+            with_count = count_param.lower() not in ("false", "0", "no")
+
+        queryset = queryset.order_by(*self.ordering)
+        self.count = queryset.count() if with_count else None
+
+        if cursor:
+            values = self._typed_values(queryset.model, self.decode_cursor(cursor))
+            queryset = queryset.filter(self._after_cursor(values))
+            self.offset = None
+            start = 0
+        else:
+            self.offset = max(0, self._parse_int(params.get("offset"), 0))
+            start = self.offset
+
+        # Une ligne de plus pour savoir s'il reste une page, sans COUNT
+        rows = list(queryset[start:start + self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+
+        self.next_cursor = self.encode_cursor(rows[-1]) if has_more else None
+        self.next_offset = self.offset + self.limit if has_more and self.offset is not None else None
+        return rows
+
+    def get_paginated_data(self, results):
+        return {
+            "count": self.count,
+            "limit": self.limit,
+            "offset": self.offset,
+            "next_offset": self.next_offset,
+            "next_cursor": self.next_cursor,
+            "results": results,
+        }
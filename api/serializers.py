@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from api.models import BookOrder, Comment, Content, Donation, DonationCategory,Tag, ContentLike, ContentView, Playlist, PlaylistItem, User,Church, Subscription, SubscriptionPlan, ChurchAdmin,Commission,ChurchCommission,Category, TicketType, Ticket, TicketReservation, Receipt, ChatMessage, ChatRoom, Testimony, ChurchCollaboration, TestimonyLike, Programme, ProgrammeMember, ContentNotification, ProgrammeContentNotification
+from api.models import BookOrder, Comment, Content, Donation, DonationCategory,Tag, ContentLike, ContentView, Playlist, PlaylistItem, User,Church, Subscription, SubscriptionPlan, ChurchAdmin,Commission,ChurchCommission,Category, TicketType, Ticket, TicketReservation, Receipt, ChatMessage, ContentTag, ChatRoom, Testimony, ChurchCollaboration, TestimonyLike, Programme, ProgrammeMember, ContentNotification, ProgrammeContentNotification, ChatRoomMembership
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
 from django.utils.text import slugify
 
 class UserSerializer(serializers.ModelSerializer):
@@ -222,34 +224,218 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
         fields = ["id", "name", "slug"]
 
-class ContentListSerializer(serializers.ModelSerializer):
+# =====================================================
+# Chargement groupé des tags (DataLoader)
+# =====================================================
+
+class TagLoader:
+    """
+    Charge les tags de plusieurs contenus en une seule requête.
+    Les ids sont enregistrés (prime) avant le rendu d'une liste ; au premier
+    `load` non résolu, tous les ids en attente sont chargés ensemble.
+    """
+
+    def __init__(self):
+        self._pending = set()
+        self._tags = {}
+
+    def prime(self, content_ids):
+        self._pending.update(cid for cid in content_ids if cid not in self._tags)
+
+    def load(self, content_id):
+        if content_id not in self._tags:
+            self._pending.add(content_id)
+            self._dispatch()
+        return self._tags[content_id]
+
+    def _dispatch(self):
+        content_ids, self._pending = self._pending, set()
+        for content_id in content_ids:
+            self._tags[content_id] = []
+        rows = ContentTag.objects.filter(content_id__in=content_ids).select_related("tag")
+        for content_tag in rows:
+            self._tags[content_tag.content_id].append(content_tag.tag)
+
+
+def get_tag_loader(serializer):
+    """Loader partagé par tous les serializers d'un même rendu (contexte du serializer racine)"""
+    return serializer.context.setdefault("tag_loader", TagLoader())
+
+
+class TagPrimingListSerializer(serializers.ListSerializer):
+    """ListSerializer qui enregistre tous les contenus de la page auprès du TagLoader"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        # Pas de tags demandés (?fields=) : rien à charger
+        if "tags" in self.child.fields:
+            get_tag_loader(self).prime(item.id for item in items)
+        return super().to_representation(items)
+
+
+# =====================================================
+# Sparse fieldsets (?fields=)
+# =====================================================
+
+def parse_fields_param(request):
+    """Champs demandés par ?fields=a,b,c (None si le paramètre est absent)"""
+    raw = request.query_params.get("fields")
+    if not raw:
+        return None
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+def _resolve_path(model, path):
+    """
+    Résout un chemin ORM ("user__name") : (relations traversées, champ final),
+    ou None s'il ne désigne pas une colonne (propriété, relation inverse, M2M).
+    """
+    relations = []
+    parts = path.split("__")
+    for position, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        if position < len(parts) - 1:
+            if not (field.many_to_one or field.one_to_one):
+                return None
+            relations.append("__".join(parts[:position + 1]))
+            model = field.related_model
+    return relations, field
+
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets : `fields=[...]` ne garde que les champs demandés (`id` toujours inclus).
+
+    `projection()` traduit la sélection en projection ORM pour que les colonnes non
+    demandées ne soient jamais lues (voir sparse_queryset). `sparse_sources` donne
+    les chemins lus par les champs calculés (SerializerMethodField).
+    """
+    sparse_sources = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            return
+        unknown = set(fields) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({"fields": f"Champs inconnus : {', '.join(sorted(unknown))}"})
+        keep = set(fields) | {"id"}
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+    @classmethod
+    def projection(cls, fields):
+        """
+        (colonnes, relations, plat) nécessaires à `fields` : colonnes pour .only(),
+        relations pour select_related(), plat=True si .values() suffit (colonnes simples).
+        None si un champ n'a pas de source connue : il faut alors la ligne complète.
+        """
+        serializer = cls(fields=fields)
+        model = cls.Meta.model
+        columns = {model._meta.pk.name}
+        relations = set()
+        flat = True
+        for name, field in serializer.fields.items():
+            if name in cls.sparse_sources:
+                paths = cls.sparse_sources[name]
+                flat = False
+            elif field.source == "*":
+                return None
+            else:
+                paths = ["__".join(field.source_attrs)]
+            for path in paths:
+                resolved = _resolve_path(model, path)
+                if resolved is None:
+                    return None
+                traversed, target = resolved
+                if traversed or target.is_relation:
+                    # Les dicts de .values() ne conviennent qu'aux colonnes simples
+                    flat = False
+                if target.is_relation and isinstance(field, serializers.BaseSerializer):
+                    traversed = traversed + [path]
+                columns.update(traversed)
+                relations.update(traversed)
+                columns.add(path)
+        return columns, relations, flat
+
+
+def sparse_queryset(queryset, serializer_class, fields, extra=(), values=True):
+    """
+    Projette `queryset` sur les colonnes lues par `fields` (inchangé si fields est None).
+    `extra` : colonnes utilisées par la vue elle-même (tri de pagination, permissions).
+    `values=False` garde des instances (.only()) pour les vues qui utilisent in_bulk()
+    ou mélangent plusieurs listes.
+    """
+    if fields is None:
+        return queryset
+    projection = serializer_class.projection(fields)
+    if projection is None:
+        return queryset
+    columns, relations, flat = projection
+    for path in extra:
+        columns.add(path)
+        if "__" in path:
+            relation = path.rsplit("__", 1)[0]
+            columns.add(relation)
+            relations.add(relation)
+            flat = False
+    if flat and values:
+        return queryset.values(*columns)
+    queryset = queryset.select_related(None)
+    if relations:
+        # select_related() sans argument suivrait toutes les FK
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*columns)
+
+
+class ContentListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     tags = serializers.SerializerMethodField()
     church = serializers.PrimaryKeyRelatedField(read_only=True)
 
+    sparse_sources = {"tags": []}
+
     class Meta:
         model = Content
         fields = [
             "id","church","type","title","slug","description","cover_image_url",
             "is_paid","price","currency","category","tags","created_at","published",
-            "capacity","tickets_sold","allow_ticket_sales"
+            "capacity","tickets_sold","allow_ticket_sales",
+            "likes_count","views_count","comments_count"
         ]
+        list_serializer_class = TagPrimingListSerializer
 
     def get_tags(self, obj):
-        return list(obj.contenttag_set.select_related("tag").values("tag__id","tag__name","tag__slug"))
+        return [
+            {"tag__id": tag.id, "tag__name": tag.name, "tag__slug": tag.slug}
+            for tag in get_tag_loader(self).load(obj.id)
+        ]
 
-class ContentDetailSerializer(serializers.ModelSerializer):
+class ContentDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     tags = serializers.SerializerMethodField()
     church = serializers.SerializerMethodField()
     created_by = serializers.SerializerMethodField()
 
+    sparse_sources = {
+        "tags": [],
+        "church": ["church__id", "church__title", "church__code"],
+        "created_by": ["created_by__id", "created_by__name", "created_by__phone_number"],
+    }
+
     class Meta:
         model = Content
         fields = "__all__"
+        list_serializer_class = TagPrimingListSerializer
 
     def get_tags(self, obj):
-        return TagSerializer([ct.tag for ct in obj.contenttag_set.all()], many=True).data
+        return TagSerializer(get_tag_loader(self).load(obj.id), many=True).data
 
     def get_church(self, obj):
         return {"id": obj.church.id, "title": obj.church.title, "code": obj.church.code}
@@ -262,7 +448,7 @@ class ContentDetailSerializer(serializers.ModelSerializer):
 class ContentCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Content
-        exclude = ["created_at", "updated_at"]
+        exclude = ["created_at", "updated_at", "likes_count", "views_count", "comments_count", "is_released"]
 
     def validate(self, data):
         # If capacity is provided in payload or already on instance, ensure tier sums fit
@@ -288,6 +474,19 @@ class ContentCreateUpdateSerializer(serializers.ModelSerializer):
 
         return data
 
+
+class ContentImportSerializer(ContentCreateUpdateSerializer):
+    """
+    Une ligne d'import en masse (services/content_import) : l'église et l'auteur sont
+    fixés par l'import, catégorie (id, slug ou nom) et tags (noms) sont résolus par lot.
+    """
+    category = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    tags = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
+
+    class Meta(ContentCreateUpdateSerializer.Meta):
+        exclude = ContentCreateUpdateSerializer.Meta.exclude + ["church", "created_by"]
+
+
 class CommentSerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField()
     content = serializers.SerializerMethodField()
@@ -527,39 +726,63 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 class ChatRoomSerializer(serializers.ModelSerializer):
     church_title = serializers.CharField(source="church.title", read_only=True)
     room_type_display = serializers.CharField(source="get_room_type_display", read_only=True)
-    messages = ChatMessageSerializer(many=True, read_only=True)
     created_by_name = serializers.CharField(source="created_by.name", read_only=True)
     commission_name = serializers.CharField(source="commission.name", read_only=True, allow_null=True)
-    members_count = serializers.SerializerMethodField()
-    members_list = serializers.SerializerMethodField()
 
     class Meta:
         model = ChatRoom
         fields = [
             "id", "church", "church_title", "room_type", "room_type_display", 
-            "name", "commission", "commission_name", "members_count", "members_list",
-            "created_at", "updated_at", "created_by", "created_by_name", "messages"
+            "name", "commission", "commission_name", "members_count",
+            "created_at", "updated_at", "created_by", "created_by_name"
         ]
-        read_only_fields = ["id", "created_at", "updated_at", "created_by"]
-    
-    def get_members_count(self, obj):
-        """Get count of members in this room"""
-        return obj.get_members_queryset().count()
-    
-    def get_members_list(self, obj):
-        """Get detailed list of all members in this room"""
-        members = obj.get_members_queryset()
-        return [
-            {
-                "id": member.id,
-                "name": member.name,
-                "phone_number": member.phone_number,
-                "email": member.email,
-                "picture_url": member.picture_url,
-            }
-            for member in members
+        # Membres : liste paginée /chat/room/<id>/members/
+        read_only_fields = ["id", "created_at", "updated_at", "created_by", "members_count"]
+
+
+class ChatRoomListSerializer(serializers.ModelSerializer):
+    """Salon pour les listes : résumé dénormalisé (api/services/chat_summary.py), jamais les membres"""
+    room_type_display = serializers.CharField(source="get_room_type_display", read_only=True)
+    last_message = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChatRoom
+        fields = [
+            "id", "church", "room_type", "room_type_display", "name", "commission", "programme",
+            "members_count", "last_message", "unread_count", "updated_at",
         ]
 
+    def get_unread_count(self, obj):
+        # Annoté par chat_read.with_unread (listes de l'utilisateur), None sinon
+        return getattr(obj, "unread_count", None)
+
+    def get_last_message(self, obj):
+        if obj.last_message_id is None:
+            return None
+        # last_message_user : select_related par les vues de liste
+        user = obj.last_message_user
+        return {
+            "id": str(obj.last_message_id),
+            "user_id": str(obj.last_message_user_id) if obj.last_message_user_id else None,
+            "user_name": user.name if user else None,
+            "message": obj.last_message_preview,
+            "created_at": obj.last_message_at,
+        }
+
+
+class ChatRoomMemberSerializer(serializers.ModelSerializer):
+    """Membre d'un salon (ligne ChatRoomMembership)"""
+    id = serializers.UUIDField(source="user.id", read_only=True)
+    name = serializers.CharField(source="user.name", read_only=True)
+    phone_number = serializers.CharField(source="user.phone_number", read_only=True)
+    email = serializers.CharField(source="user.email", read_only=True)
+    picture_url = serializers.CharField(source="user.picture_url", read_only=True)
+
+    class Meta:
+        model = ChatRoomMembership
+        fields = ["id", "name", "phone_number", "email", "picture_url", "joined_at"]
+
 
 class ChatRoomCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating/updating chat rooms"""
@@ -587,7 +810,7 @@ class ChatRoomCreateUpdateSerializer(serializers.ModelSerializer):
 # Testimony Serializers
 # =====================================================
 
-class TestimonySerializer(serializers.ModelSerializer):
+class TestimonySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for displaying testimonies"""
     user_name = serializers.CharField(source='user.name', read_only=True)
     church_title = serializers.CharField(source='church.title', read_only=True)
@@ -657,7 +880,7 @@ class TestimonyUpdateSerializer(serializers.ModelSerializer):
         return data
 
 
-class TestimonyListSerializer(serializers.ModelSerializer):
+class TestimonyListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Simplified serializer for listing testimonies"""
     user_name = serializers.CharField(source='user.name', read_only=True)
     user_picture = serializers.CharField(source='user.picture_url', read_only=True)
@@ -780,12 +1003,14 @@ class TestimonyLikeSerializer(serializers.ModelSerializer):
 # Programme Serializers
 # =====================================================
 
-class ProgrammeSerializer(serializers.ModelSerializer):
+class ProgrammeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer complet pour les programmes"""
     church = ChurchSerializer(read_only=True)
     created_by = UserSerializer(read_only=True)
     event_count = serializers.SerializerMethodField()
     is_active = serializers.SerializerMethodField()
+
+    sparse_sources = {"event_count": [], "is_active": ["start_date", "end_date"]}
     
     class Meta:
         model = Programme
@@ -846,11 +1071,17 @@ class ProgrammeUpdateSerializer(serializers.ModelSerializer):
         return data
 
 
-class ProgrammeListSerializer(serializers.ModelSerializer):
+class ProgrammeListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer simplifié pour lister les programmes"""
     church = serializers.SerializerMethodField()
     event_count = serializers.SerializerMethodField()
     is_active = serializers.SerializerMethodField()
+
+    sparse_sources = {
+        "church": ["church__id", "church__title", "church__logo_url"],
+        "event_count": [],
+        "is_active": ["start_date", "end_date"],
+    }
     
     class Meta:
         model = Programme
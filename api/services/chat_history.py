@@ -0,0 +1,66 @@
+# api/services/chat_history.py
+"""
+Historique de chat par curseurs.
+
+Les messages d'un salon se lisent par pages sur l'index (room, -created_at, -id) :
+- sans curseur : les `limit` derniers messages ;
+- before=<id de message> : les `limit` messages précédant ce message ;
+- after=<id de message> : les `limit` messages suivant ce message (rattrapage).
+Chaque page est renvoyée dans l'ordre chronologique ; son coût ne dépend pas de
+la taille de l'historique.
+
+La liste des salons ne porte que le résumé dénormalisé du dernier message
+(api/services/chat_summary.py), jamais l'historique.
+"""
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from api.models import ChatMessage
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 100
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def cursor_position(room, message_id):
+    """(created_at, id) d'un message du salon. Lève InvalidCursor"""
+    try:
+        position = (
+            ChatMessage.objects.filter(room=room, id=message_id).values_list("created_at", "id").first()
+        )
+    except ValidationError:
+        # Identifiant mal formé
+        position = None
+    if position is None:
+        raise InvalidCursor(str(message_id))
+    return position
+
+
+def message_page(room, before=None, after=None, limit=DEFAULT_LIMIT):
+    """
+    Retourne (messages dans l'ordre chronologique, has_more).
+    has_more : il reste des messages dans le sens du parcours (plus anciens par
+    défaut et avec before, plus récents avec after). Lève InvalidCursor.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    messages = ChatMessage.objects.filter(room=room).select_related("user")
+    if after:
+        created_at, message_id = cursor_position(room, after)
+        rows = list(
+            messages.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id))
+            .order_by("created_at", "id")[:limit + 1]
+        )
+        return rows[:limit], len(rows) > limit
+
+    if before:
+        created_at, message_id = cursor_position(room, before)
+        messages = messages.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id))
+    rows = list(messages.order_by("-created_at", "-id")[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    rows.reverse()
+    return rows, has_more
+
@@ -0,0 +1,157 @@
+# api/services/chat_membership.py
+"""
+Accès aux salons de chat matérialisé (ChatRoomMembership).
+
+Qui a accès à un salon (les propriétaires de l'église ont accès à tous ses salons) :
+- CHURCH : les membres de l'église (User.current_church) ;
+- OWNER : les propriétaires seulement ;
+- PASTOR : les pasteurs (ChurchAdmin.role) ;
+- COMMISSION : les membres de la commission dans cette église (ChurchCommission) ;
+- PROGRAMME : les membres du programme (ProgrammeMember) ;
+- CUSTOM : les membres choisis (ChatRoom.members).
+
+Les signaux appellent `sync_room` quand un salon change et `sync_user` quand une
+source d'accès d'un utilisateur change : seules les lignes qui diffèrent sont
+écrites. Une suppression de source n'ajoute jamais de ligne (add=False), ce qui
+évite d'en créer pendant la suppression en cascade d'une église.
+Les mises à jour en masse (QuerySet.update) ne passent pas par les signaux :
+`rebuild` (commande rebuild_chat_memberships) recalcule tout.
+Chaque changement recompte ChatRoom.members_count des salons touchés (chat_summary).
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from api.models import (
+    ChatRoom, ChatRoomMembership, ChurchAdmin, ChurchCommission, ProgrammeMember, User,
+)
+from api.services import chat_summary
+
+BATCH_SIZE = 500
+
+
+def expected_room_user_ids(room):
+    """Utilisateurs qui doivent avoir accès au salon"""
+    user_ids = set(
+        ChurchAdmin.objects.filter(church_id=room.church_id, role="OWNER").values_list("user_id", flat=True)
+    )
+    if room.room_type == "CHURCH":
+        members = User.objects.filter(current_church_id=room.church_id)
+    elif room.room_type == "PASTOR":
+        members = User.objects.filter(church_roles__church_id=room.church_id, church_roles__role="PASTOR")
+    elif room.room_type == "COMMISSION" and room.commission_id:
+        members = User.objects.filter(
+            church_commissions__church_id=room.church_id,
+            church_commissions__commission_id=room.commission_id,
+        )
+    elif room.room_type == "PROGRAMME" and room.programme_id:
+        members = User.objects.filter(programmes__programme_id=room.programme_id)
+    elif room.room_type == "CUSTOM":
+        members = room.members.all()
+    else:
+        members = User.objects.none()
+    user_ids.update(members.values_list("id", flat=True))
+    return user_ids
+
+
+def _apply(rows_to_add, filter_to_remove, room_ids):
+    if not rows_to_add and filter_to_remove is None:
+        return
+    with transaction.atomic():
+        if filter_to_remove is not None:
+            ChatRoomMembership.objects.filter(filter_to_remove).delete()
+        ChatRoomMembership.objects.bulk_create(rows_to_add, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        chat_summary.refresh_members_count(room_ids)
+
+
+def sync_room(room):
+    """Aligne les lignes d'un salon sur ses sources. Retourne (ajoutés, retirés)"""
+    expected = expected_room_user_ids(room)
+    existing = set(ChatRoomMembership.objects.filter(room_id=room.pk).values_list("user_id", flat=True))
+    added = expected - existing
+    removed = existing - expected
+    _apply(
+        [ChatRoomMembership(room_id=room.pk, user_id=user_id) for user_id in added],
+        Q(room_id=room.pk, user_id__in=removed) if removed else None,
+        [room.pk],
+    )
+    return len(added), len(removed)
+
+
+def _user_allowed(room, current_church_id, roles, commission_ids, programme_ids, custom_room_ids):
+    if "OWNER" in roles:
+        return True
+    if room["room_type"] == "CHURCH":
+        return current_church_id == room["church_id"]
+    if room["room_type"] == "PASTOR":
+        return "PASTOR" in roles
+    if room["room_type"] == "COMMISSION":
+        return room["commission_id"] in commission_ids
+    if room["room_type"] == "PROGRAMME":
+        return room["programme_id"] in programme_ids
+    if room["room_type"] == "CUSTOM":
+        return room["id"] in custom_room_ids
+    return False
+
+
+def sync_user(user_id, church_id, add=True):
+    """
+    Aligne les lignes d'un utilisateur sur les salons d'une église.
+    add=False : retire seulement (source d'accès supprimée). Retourne (ajoutés, retirés)
+    """
+    if church_id is None:
+        return 0, 0
+    rooms = list(
+        ChatRoom.objects.filter(church_id=church_id).values(
+            "id", "church_id", "room_type", "commission_id", "programme_id"
+        )
+    )
+    if not rooms:
+        return 0, 0
+    current_church_id = User.objects.filter(id=user_id).values_list("current_church_id", flat=True).first()
+    roles = set(
+        ChurchAdmin.objects.filter(user_id=user_id, church_id=church_id).values_list("role", flat=True)
+    )
+    commission_ids = set(
+        ChurchCommission.objects.filter(user_id=user_id, church_id=church_id).values_list("commission_id", flat=True)
+    )
+    programme_ids = set(
+        ProgrammeMember.objects.filter(user_id=user_id, programme__church_id=church_id)
+        .values_list("programme_id", flat=True)
+    )
+    custom_room_ids = set(
+        ChatRoom.members.through.objects.filter(user_id=user_id, chatroom__church_id=church_id)
+        .values_list("chatroom_id", flat=True)
+    )
+    expected = {
+        room["id"] for room in rooms
+        if _user_allowed(room, current_church_id, roles, commission_ids, programme_ids, custom_room_ids)
+    }
+    existing = set(
+        ChatRoomMembership.objects.filter(user_id=user_id, room__church_id=church_id)
+        .values_list("room_id", flat=True)
+    )
+    added = expected - existing if add else set()
+    removed = existing - expected
+    _apply(
+        [ChatRoomMembership(room_id=room_id, user_id=user_id) for room_id in added],
+        Q(user_id=user_id, room_id__in=removed) if removed else None,
+        added | removed,
+    )
+    return len(added), len(removed)
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Recalcule tous les salons. Retourne (ajoutés, retirés)"""
+    added = removed = 0
+    last_id = None
+    rooms = ChatRoom.objects.order_by("id").only("id", "church_id", "room_type", "commission_id", "programme_id")
+    while True:
+        batch = list((rooms if last_id is None else rooms.filter(id__gt=last_id))[:batch_size])
+        if not batch:
+            break
+        for room in batch:
+            room_added, room_removed = sync_room(room)
+            added += room_added
+            removed += room_removed
+        last_id = batch[-1].id
+    return added, removed
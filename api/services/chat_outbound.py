@@ -0,0 +1,165 @@
+# api/services/chat_outbound.py
+"""
+File d'envoi bornée par connexion WebSocket (protection contre les clients lents).
+
+Les événements du channel layer (messages du salon, présence, saisie...) ne sont
+plus écrits directement sur la socket : le consumer les dépose dans sa file
+(`put`, sans attente) et une tâche par connexion les écrit dans l'ordre. Un client
+bloqué ne fait donc grossir que sa file, plafonnée à `CHAT_OUTBOUND_QUEUE_SIZE`
+trames. File pleine, selon `CHAT_SLOW_CONSUMER_POLICY` :
+- "drop_oldest" (défaut) : la plus ancienne trame est jetée (le client rattrape
+  par /history/ avec after=<dernier id reçu>) ;
+- "drop_new" : la nouvelle trame est jetée ;
+- "disconnect" : la connexion est fermée (code 4008), le client se reconnecte.
+
+`metrics` (par processus) : connexions ouvertes, profondeur totale et maximale
+des files, trames envoyées, jetées, connexions fermées pour lenteur.
+
+La borne ne tient que si le serveur ASGI signale une socket saturée :
+- uvicorn : `send` attend que la socket se vide, la file se remplit d'elle-même ;
+- Daphne : `send` écrit aussitôt dans le tampon du transport Twisted, sans
+  limite. Avant chaque trame, la file mesure donc les octets en attente dans ce
+  tampon et patiente tant qu'ils dépassent sa limite (bufferSize, 64 Kio) ;
+- autre serveur sans contre-pression : la file se vide aussitôt, aucune borne.
+"""
+import asyncio
+import functools
+import json
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_CLOSE_CODE = 4008
+POLICIES = ("drop_oldest", "drop_new", "disconnect")
+
+
+class OutboundMetrics:
+
+    def __init__(self):
+        self.queues = set()
+        self.sent = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self.max_depth_seen = 0
+
+    def snapshot(self):
+        depths = [queue.depth for queue in self.queues]
+        return {
+            "connections": len(depths),
+            "queued_frames": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "max_queue_depth_seen": self.max_depth_seen,
+            "sent_frames": self.sent,
+            "dropped_frames": self.dropped,
+            "slow_consumer_disconnects": self.disconnected,
+        }
+
+
+metrics = OutboundMetrics()
+
+
+# Attente entre deux mesures du tampon Twisted saturé (secondes)
+SERVER_BUFFER_POLL = 0.05
+
+
+def server_transport(send):
+    """
+    Transport Twisted de la connexion sous Daphne (send = partial(server.handle_reply, protocol)),
+    à travers les enveloppes de channels (session) et de Twisted (TLS...), ou None
+    """
+    for _ in range(5):
+        if isinstance(send, functools.partial):
+            transport = getattr(send.args[0], "transport", None) if send.args else None
+            break
+        send = getattr(getattr(send, "__self__", None), "real_send", None)
+        if send is None:
+            return None
+    else:
+        return None
+    for _ in range(5):
+        if transport is None or hasattr(transport, "dataBuffer"):
+            return transport
+        transport = getattr(transport, "transport", None)
+    return None
+
+
+def pending_bytes(transport):
+    """Octets écrits par l'application mais pas encore envoyés sur la socket (FileDescriptor Twisted)"""
+    return len(transport.dataBuffer) - transport.offset + getattr(transport, "_tempDataLen", 0)
+
+
+class OutboundQueue:
+
+    def __init__(self, consumer, size=None, policy=None):
+        self.consumer = consumer
+        self.size = size or getattr(settings, "CHAT_OUTBOUND_QUEUE_SIZE", 200)
+        self.policy = policy or getattr(settings, "CHAT_SLOW_CONSUMER_POLICY", "drop_oldest")
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._closing = False
+        self._transport = None
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def start(self):
+        metrics.queues.add(self)
+        self._transport = server_transport(getattr(self.consumer, "base_send", None))
+        self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _server_buffer_drained(self):
+        """Sous Daphne : attend que le tampon d'écriture du transport repasse sous sa limite"""
+        transport = self._transport
+        if transport is None:
+            return
+        limit = getattr(transport, "bufferSize", 65536)
+        while not getattr(transport, "disconnected", False) and pending_bytes(transport) > limit:
+            await asyncio.sleep(SERVER_BUFFER_POLL)
+
+    def put(self, frame):
+        """Dépose une trame (dict). Retourne False si elle (ou une plus ancienne) est jetée"""
+        if self._closing or self._task is None:
+            return False
+        if self._queue.qsize() >= self.size:
+            if self.policy == "disconnect":
+                self._disconnect()
+                return False
+            metrics.dropped += 1
+            if self.policy == "drop_new":
+                return False
+            self._queue.get_nowait()
+            self._queue.put_nowait(json.dumps(frame))
+            return False
+        self._queue.put_nowait(json.dumps(frame))
+        metrics.max_depth_seen = max(metrics.max_depth_seen, self._queue.qsize())
+        return True
+
+    async def _drain(self):
+        while True:
+            # Tampon du serveur plein (Daphne) : les trames restent dans la file bornée
+            await self._server_buffer_drained()
+            text = await self._queue.get()
+            try:
+                await self.consumer.send(text_data=text)
+                metrics.sent += 1
+            except Exception:
+                # Socket fermée : la déconnexion suit
+                return
+
+    def _disconnect(self):
+        self._closing = True
+        metrics.disconnected += 1
+        logger.warning("Client de chat trop lent (%s trames en attente), déconnexion", self._queue.qsize())
+        asyncio.get_running_loop().create_task(self.consumer.close(code=SLOW_CONSUMER_CLOSE_CODE))
+        self.stop()
+
+    def stop(self):
+        metrics.queues.discard(self)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        metrics.dropped += self._queue.qsize()
+        self._queue = asyncio.Queue()
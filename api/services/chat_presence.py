@@ -0,0 +1,227 @@
+# api/services/chat_presence.py
+"""
+Présence et indicateurs de saisie des salons de chat, poussés par WebSocket.
+
+Un registre par processus (`registry`) :
+- connaît les connexions locales de chaque salon (consumers) ;
+- écoute, sur son propre canal du channel layer, le groupe "presence_<salon>" des
+  salons où il a des connexions : une seule remise par processus et par événement,
+  quel que soit le nombre de sockets ;
+- publie pour chaque salon un instantané compact {processus, utilisateurs locaux, ttl}
+  à chaque changement local (regroupé sur `ANNOUNCE_DELAY`) et toutes les
+  `CHAT_PRESENCE_HEARTBEAT` secondes ; l'entrée d'un processus qui se tait expire
+  après `ttl` (processus arrêté brutalement).
+Les connexions locales ne reçoivent une trame "presence" que si la liste des
+présents a changé.
+
+Saisie : au plus un signal par (salon, utilisateur) toutes les `CHAT_TYPING_INTERVAL`
+secondes ; les signaux d'un salon sont regroupés en une seule diffusion par
+`TYPING_FLUSH_DELAY`.
+"""
+import asyncio
+import logging
+import time
+import uuid
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ANNOUNCE_DELAY = 0.5
+TYPING_FLUSH_DELAY = 0.3
+
+
+def presence_group(room_id):
+    return f"presence_{room_id}"
+
+
+class PresenceRegistry:
+
+    def __init__(self):
+        self._reset(None)
+
+    def _reset(self, loop):
+        # Id tiré au démarrage de la boucle : distinct même entre processus forkés
+        self.process_id = uuid.uuid4().hex
+        self._loop = loop
+        self._channel = None
+        self._tasks = []
+        self._consumers = {}   # id de salon (str) -> set(consumers locaux)
+        self._remote = {}      # salon -> {processus: (utilisateurs, expire_at)}
+        self._online = {}      # salon -> {user_id: nom} (dernier état publié en local)
+        self._dirty = set()
+        self._announce_handle = None
+        self._typing_sent = {}  # (salon, user_id) -> dernier envoi
+        self._typing_pending = {}  # salon -> {user_id: nom}
+        self._typing_handle = None
+
+    @property
+    def heartbeat(self):
+        return getattr(settings, "CHAT_PRESENCE_HEARTBEAT", 20)
+
+    @property
+    def typing_interval(self):
+        return getattr(settings, "CHAT_TYPING_INTERVAL", 3)
+
+    async def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._reset(loop)
+        if self._channel is None:
+            layer = get_channel_layer()
+            self._channel = await layer.new_channel(prefix="presence")
+            self._tasks = [loop.create_task(self._listen(layer)), loop.create_task(self._beat(layer))]
+
+    # Connexions locales
+
+    def _local_users(self, room_id):
+        return {str(c.user.id): c.user.name for c in self._consumers.get(room_id, ())}
+
+    async def join(self, room_id, consumer):
+        room_id = str(room_id)
+        await self._ensure_started()
+        consumers = self._consumers.setdefault(room_id, set())
+        if not consumers:
+            await get_channel_layer().group_add(presence_group(room_id), self._channel)
+        consumers.add(consumer)
+        if not self._refresh(room_id):
+            await consumer.send_presence(self.online(room_id))
+        self._schedule_announce(room_id)
+
+    async def leave(self, room_id, consumer):
+        room_id = str(room_id)
+        consumers = self._consumers.get(room_id)
+        if not consumers or consumer not in consumers:
+            return
+        consumers.discard(consumer)
+        self._refresh(room_id)
+        if consumers:
+            self._schedule_announce(room_id)
+            return
+        # Dernière connexion locale : annonce immédiate puis arrêt de l'écoute
+        del self._consumers[room_id]
+        layer = get_channel_layer()
+        await self._announce(layer, room_id)
+        await layer.group_discard(presence_group(room_id), self._channel)
+        self._remote.pop(room_id, None)
+        self._online.pop(room_id, None)
+
+    def online(self, room_id):
+        room_id = str(room_id)
+        users = dict(self._local_users(room_id))
+        now = time.monotonic()
+        for process_id, (remote_users, expires_at) in self._remote.get(room_id, {}).items():
+            if expires_at > now:
+                users.update(remote_users)
+        return users
+
+    def _refresh(self, room_id):
+        """Pousse la liste aux connexions locales si elle a changé. Retourne True si poussée"""
+        online = self.online(room_id)
+        if online == self._online.get(room_id):
+            return False
+        self._online[room_id] = online
+        for consumer in list(self._consumers.get(room_id, ())):
+            self._loop.create_task(consumer.send_presence(online))
+        return True
+
+    # Diffusion entre processus
+
+    def _schedule_announce(self, room_id):
+        self._dirty.add(room_id)
+        if self._announce_handle is None:
+            self._announce_handle = self._loop.call_later(ANNOUNCE_DELAY, self._flush_announces)
+
+    def _flush_announces(self):
+        self._announce_handle = None
+        rooms, self._dirty = self._dirty, set()
+        layer = get_channel_layer()
+        for room_id in rooms:
+            if room_id in self._consumers:
+                self._loop.create_task(self._announce(layer, room_id))
+
+    async def _announce(self, layer, room_id):
+        await layer.group_send(presence_group(room_id), {
+            "type": "presence.snapshot",
+            "room": room_id,
+            "process": self.process_id,
+            "users": self._local_users(room_id),
+            "ttl": self.heartbeat * 3,
+        })
+
+    async def _beat(self, layer):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for room_id in list(self._consumers):
+                try:
+                    await self._announce(layer, room_id)
+                except Exception:
+                    logger.exception("Battement de présence non envoyé")
+                # Processus muets depuis ttl : retirés
+                self._refresh(room_id)
+
+    async def _listen(self, layer):
+        while True:
+            try:
+                event = await layer.receive(self._channel)
+                self._handle(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Événement de présence illisible")
+
+    def _handle(self, event):
+        room_id = event.get("room")
+        if room_id not in self._consumers:
+            return
+        if event["type"] == "presence.snapshot":
+            if event["process"] == self.process_id:
+                return
+            processes = self._remote.setdefault(room_id, {})
+            if event["users"]:
+                if event["process"] not in processes:
+                    # Processus nouveau dans ce salon : il apprend nos présents sans attendre le battement
+                    self._schedule_announce(room_id)
+                processes[event["process"]] = (event["users"], time.monotonic() + event["ttl"])
+            else:
+                processes.pop(event["process"], None)
+            self._refresh(room_id)
+        elif event["type"] == "presence.typing":
+            for consumer in list(self._consumers.get(room_id, ())):
+                users = [user for user in event["users"] if user["user_id"] != str(consumer.user.id)]
+                if users:
+                    self._loop.create_task(consumer.send_typing(users))
+
+    # Saisie
+
+    def typing(self, room_id, user):
+        """Signal de saisie, limité par utilisateur et regroupé par salon"""
+        room_id = str(room_id)
+        if room_id not in self._consumers:
+            return
+        key = (room_id, str(user.id))
+        now = time.monotonic()
+        if now - self._typing_sent.get(key, -self.typing_interval) < self.typing_interval:
+            return
+        self._typing_sent[key] = now
+        self._typing_pending.setdefault(room_id, {})[str(user.id)] = user.name
+        if self._typing_handle is None:
+            self._typing_handle = self._loop.call_later(TYPING_FLUSH_DELAY, self._flush_typing)
+
+    def _flush_typing(self):
+        self._typing_handle = None
+        pending, self._typing_pending = self._typing_pending, {}
+        layer = get_channel_layer()
+        for room_id, users in pending.items():
+            self._loop.create_task(layer.group_send(presence_group(room_id), {
+                "type": "presence.typing",
+                "room": room_id,
+                "users": [{"user_id": user_id, "user_name": name} for user_id, name in users.items()],
+            }))
+        # Les envois plus anciens que l'intervalle ne limitent plus rien : mémoire bornée
+        horizon = time.monotonic() - self.typing_interval
+        self._typing_sent = {key: sent for key, sent in self._typing_sent.items() if sent > horizon}
+
+
+registry = PresenceRegistry()
@@ -0,0 +1,94 @@
+# api/services/chat_read.py
+"""
+Curseurs de lecture et compteurs de non-lus des salons de chat.
+
+Le curseur vit sur ChatRoomMembership (last_read_at, last_read_message_id) : il
+n'avance jamais en arrière. Un nouvel accès démarre « tout lu » (date de création
+de la ligne) : l'historique antérieur ne compte pas comme non lu.
+
+Non-lus d'un salon = messages de ce salon postérieurs au curseur, comptés sur
+l'index (room, -created_at, -id) : le coût dépend du nombre de non-lus, pas de la
+taille de l'historique. Envoyer un message avance son propre curseur, ce qui exclut
+ses propres messages sans filtre supplémentaire. Les badges de tous les salons d'un
+utilisateur sortent d'une seule requête (sous-requête par ligne d'accès).
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from api.models import ChatMessage, ChatRoomMembership
+from api.services.chat_history import cursor_position
+
+
+def _unread_subquery(room_ref, read_at_ref):
+    unread = (
+        ChatMessage.objects.filter(room_id=OuterRef(room_ref), created_at__gt=OuterRef(read_at_ref))
+        .order_by()
+        .values("room_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(unread, output_field=IntegerField()), Value(0))
+
+
+def unread_counts(user):
+    """{room_id: non-lus} pour tous les salons de l'utilisateur, en une requête"""
+    rows = (
+        ChatRoomMembership.objects.filter(user=user)
+        .annotate(unread=_unread_subquery("room_id", "last_read_at"))
+        .values_list("room_id", "unread")
+    )
+    return dict(rows)
+
+
+def with_unread(rooms, user):
+    """Annote des salons (unread_count) pour un utilisateur"""
+    read_at = ChatRoomMembership.objects.filter(room_id=OuterRef("pk"), user=user).values("last_read_at")[:1]
+    return rooms.annotate(my_last_read_at=Subquery(read_at)).annotate(
+        unread_count=_unread_subquery("pk", "my_last_read_at")
+    )
+
+
+def _advance(room_id, user_id, read_at, message_id):
+    """Avance le curseur s'il est en retard. Retourne True si la ligne a changé"""
+    return bool(
+        ChatRoomMembership.objects.filter(room_id=room_id, user_id=user_id, last_read_at__lt=read_at)
+        .update(last_read_at=read_at, last_read_message_id=message_id)
+    )
+
+
+def mark_read(membership, message_id=None):
+    """
+    Avance le curseur jusqu'au message donné (dernier message du salon par défaut).
+    Lève InvalidCursor si le message n'est pas dans le salon. Retourne la ligne relue.
+    """
+    if message_id:
+        read_at, message_id = cursor_position(membership.room_id, message_id)
+    else:
+        last = (
+            ChatMessage.objects.filter(room_id=membership.room_id)
+            .order_by("-created_at", "-id")
+            .values_list("created_at", "id")
+            .first()
+        )
+        if last is None:
+            return membership
+        read_at, message_id = last
+    _advance(membership.room_id, membership.user_id, read_at, message_id)
+    membership.refresh_from_db(fields=["last_read_at", "last_read_message_id"])
+    return membership
+
+
+def unread_count(membership):
+    return ChatMessage.objects.filter(room_id=membership.room_id, created_at__gt=membership.last_read_at).count()
+
+
+def advance_for_senders(messages):
+    """Après écriture : chaque auteur a lu jusqu'à son dernier message (un UPDATE par auteur et salon)"""
+    latest = {}
+    for message in messages:
+        key = (message.room_id, message.user_id)
+        if key not in latest or message.created_at > latest[key].created_at:
+            latest[key] = message
+    for (room_id, user_id), message in latest.items():
+        _advance(room_id, user_id, message.created_at, message.id)
+
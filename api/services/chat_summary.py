@@ -0,0 +1,127 @@
+# api/services/chat_summary.py
+"""
+Résumé dénormalisé des salons de chat (champs de ChatRoom).
+
+- last_message_id / last_message_at / last_message_preview / last_message_user :
+  avancés à chaque écriture de message (signal post_save, ou `record_messages`
+  après les écritures groupées). La mise à jour est conditionnelle : un message
+  plus ancien que le résumé (lot en retard) ne le fait jamais reculer.
+  Modifier le dernier message rafraîchit l'aperçu ; le supprimer (vue
+  message_detail) recalcule le résumé depuis l'index (room, -created_at, -id).
+- members_count : recompté (COUNT indexé) pour les salons dont les accès
+  changent (chat_membership._apply).
+
+La liste des salons se lit alors en une requête sur ChatRoom, sans sous-requête
+par salon ni matérialisation des membres. Les suppressions en masse (archivage,
+cascades) ne passent pas par ici : `rebuild` (commande rebuild_chat_memberships)
+recalcule tout.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from api.models import ChatMessage, ChatRoom, ChatRoomMembership
+
+PREVIEW_LENGTH = 200
+BATCH_SIZE = 500
+
+
+def preview(message):
+    """Aperçu court d'un message (texte tronqué, sinon type de pièce jointe)"""
+    text = " ".join((message.message or "").split())
+    if len(text) > PREVIEW_LENGTH:
+        text = text[:PREVIEW_LENGTH - 1] + "…"
+    if text:
+        return text
+    if message.image_url:
+        return "[image]"
+    if message.audio_url:
+        return "[audio]"
+    return ""
+
+
+def _summary(message):
+    return {
+        "last_message_id": message.id,
+        "last_message_at": message.created_at,
+        "last_message_preview": preview(message),
+        "last_message_user_id": message.user_id,
+    }
+
+
+def record_messages(messages):
+    """Après écriture : avance le résumé de chaque salon (un UPDATE par salon)"""
+    latest = {}
+    for message in messages:
+        current = latest.get(message.room_id)
+        if current is None or (message.created_at, message.id) > (current.created_at, current.id):
+            latest[message.room_id] = message
+    for room_id, message in latest.items():
+        # Même ordre que l'historique : (created_at, id)
+        newer = (
+            Q(last_message_at__isnull=True)
+            | Q(last_message_at__lt=message.created_at)
+            | Q(last_message_at=message.created_at, last_message_id__lt=message.id)
+        )
+        ChatRoom.objects.filter(newer, pk=room_id).update(**_summary(message))
+
+
+def message_edited(message):
+    """Rafraîchit l'aperçu si le message modifié est le dernier du salon"""
+    ChatRoom.objects.filter(pk=message.room_id, last_message_id=message.id).update(
+        last_message_preview=preview(message)
+    )
+
+
+def refresh_last_message(room_id):
+    """Recalcule le résumé d'un salon depuis son dernier message"""
+    last = ChatMessage.objects.filter(room_id=room_id).order_by("-created_at", "-id").first()
+    if last is None:
+        values = {
+            "last_message_id": None,
+            "last_message_at": None,
+            "last_message_preview": "",
+            "last_message_user_id": None,
+        }
+    else:
+        values = _summary(last)
+    ChatRoom.objects.filter(pk=room_id).update(**values)
+
+
+def message_deleted(room_id, message_id):
+    """À appeler après la suppression d'un message : recalcul seulement si c'était le dernier"""
+    if ChatRoom.objects.filter(pk=room_id, last_message_id=message_id).exists():
+        refresh_last_message(room_id)
+
+
+def refresh_members_count(room_ids):
+    """Recompte les accès des salons donnés (une requête)"""
+    room_ids = list(room_ids)
+    if not room_ids:
+        return
+    total = (
+        ChatRoomMembership.objects.filter(room_id=OuterRef("pk"))
+        .order_by()
+        .values("room_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    ChatRoom.objects.filter(pk__in=room_ids).update(
+        members_count=Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+    )
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Recalcule le résumé de tous les salons. Retourne le nombre de salons"""
+    total = 0
+    last_id = None
+    rooms = ChatRoom.objects.order_by("id").values_list("id", flat=True)
+    while True:
+        batch = list((rooms if last_id is None else rooms.filter(id__gt=last_id))[:batch_size])
+        if not batch:
+            break
+        refresh_members_count(batch)
+        for room_id in batch:
+            refresh_last_message(room_id)
+        total += len(batch)
+        last_id = batch[-1]
+    return total
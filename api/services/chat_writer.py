@@ -0,0 +1,92 @@
+# api/services/chat_writer.py
+"""
+Écriture groupée des messages de chat reçus par WebSocket.
+
+Le consumer fixe l'id et la date du message, le diffuse tout de suite, puis le
+confie au tampon du processus (`writer`). Le tampon écrit par bulk_create :
+- dès que `CHAT_WRITE_BATCH_SIZE` messages attendent ;
+- sinon `CHAT_WRITE_FLUSH_MS` millisecondes après le premier message en attente.
+Un seul passage par le pool de threads par lot, au lieu d'un par message.
+
+Garanties de vidage : `flush()` à chaque déconnexion (attend aussi les écritures
+en cours) et `flush_sync()` à l'arrêt du processus (atexit). Si un lot échoue
+(utilisateur ou salon supprimé entre-temps), ses messages sont réécrits un par un
+pour ne perdre que les lignes en faute.
+"""
+import asyncio
+import atexit
+import logging
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from api.models import ChatMessage
+from api.services import chat_read, chat_summary
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriter:
+
+    def __init__(self, batch_size=None, flush_ms=None):
+        self.batch_size = batch_size or getattr(settings, "CHAT_WRITE_BATCH_SIZE", 50)
+        self.flush_ms = flush_ms if flush_ms is not None else getattr(settings, "CHAT_WRITE_FLUSH_MS", 20)
+        self._pending = []
+        self._timer = None
+        self._writes = set()
+
+    def add(self, message):
+        """Met en attente un ChatMessage non enregistré (id et created_at déjà fixés)"""
+        self._pending.append(message)
+        if len(self._pending) >= self.batch_size:
+            self._start_write()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.flush_ms / 1000, self._start_write)
+
+    def _take(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _start_write(self):
+        batch = self._take()
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(database_sync_to_async(self._write)(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def flush(self):
+        """Écrit tout ce qui attend et attend la fin des écritures en cours"""
+        self._start_write()
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+    def flush_sync(self):
+        """Vidage synchrone, hors boucle asyncio (arrêt du processus)"""
+        self._write(self._take())
+
+    @staticmethod
+    def _write(batch):
+        if not batch:
+            return
+        try:
+            ChatMessage.objects.bulk_create(batch)
+        except Exception:
+            logger.exception("Écriture groupée de %s message(s) échouée, reprise ligne par ligne", len(batch))
+            for message in batch:
+                try:
+                    message.save(force_insert=True)
+                except Exception:
+                    logger.exception("Message de chat %s perdu", message.id)
+            return
+        # bulk_create ne déclenche pas post_save : curseurs des auteurs et résumé des salons
+        chat_read.advance_for_senders(batch)
+        chat_summary.record_messages(batch)
+
+
+writer = MessageWriter()
+atexit.register(writer.flush_sync)
@@ -0,0 +1,224 @@
+# api/services/content_import.py
+"""
+Import en masse de contenus (archives de prédications, audios...) depuis un fichier
+JSON Lines ou CSV.
+
+Chaque ligne est validée sans requête par une instance unique de
+ContentImportSerializer (construire ses champs coûte plus cher que valider une ligne) ;
+les lignes valides sont ensuite traitées par lots de BATCH_SIZE :
+- catégories (id, slug ou nom) et tags (noms) résolus en quelques requêtes ensemblistes,
+  les tags manquants étant créés par bulk_create ;
+- contenus et liens ContentTag insérés par bulk_create ;
+- bulk_create ne déclenchant pas les signaux, le fan-out du fil est fait par lot
+  (feed.fanout_new_contents) et la version de contenu de l'église est incrémentée
+  une seule fois à la fin.
+
+Les erreurs sont rapportées par ligne ({"row": n, "errors": {...}}) : une ligne
+invalide n'empêche pas l'import des autres.
+"""
+import csv
+import json
+import uuid
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from api.models import Category, Content, ContentTag, Tag
+from api.serializers import ContentImportSerializer
+from api.services import content_version, feed
+
+BATCH_SIZE = 500
+FORMATS = ("jsonl", "csv")
+
+
+def detect_format(filename):
+    """Format d'après l'extension du fichier (None si inconnue)"""
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    return None
+
+
+def read_rows(lines, fmt):
+    """
+    Lignes (numéro, données) d'un flux texte. `données` est un dict, ou une chaîne
+    décrivant l'erreur de lecture. Les lignes vides sont ignorées.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Une cellule vide vaut "absente" (sinon "" serait refusé pour un prix, une date...)
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ("", None)}
+        return
+
+    for line_num, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_num, f"JSON invalide : {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield line_num, "Chaque ligne doit être un objet JSON"
+            continue
+        yield line_num, row
+
+
+def _normalize(row):
+    row = dict(row)
+    tags = row.get("tags")
+    if isinstance(tags, str):
+        row["tags"] = [t.strip() for t in tags.split(",") if t.strip()]
+    metadata = row.get("metadata")
+    if isinstance(metadata, str):
+        try:
+            row["metadata"] = json.loads(metadata)
+        except ValueError:
+            pass
+    if not row.get("slug") and isinstance(row.get("title"), str):
+        row["slug"] = slugify(row["title"])[:50]
+    return row
+
+
+def _tag_slug(name):
+    return name.lower().replace(" ", "-")
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+class _Resolver:
+    """Catégories et tags déjà résolus, partagés entre les lots d'un même import"""
+
+    def __init__(self, create_tags=True):
+        self.categories = {}
+        self.tags = {}
+        self.create_tags = create_tags
+
+    def resolve_categories(self, values):
+        missing = {v for v in values if v not in self.categories}
+        if not missing:
+            return
+        ids = [v for v in missing if _is_uuid(v)]
+        for category_id, slug, name in Category.objects.filter(
+            Q(id__in=ids) | Q(slug__in=missing) | Q(name__in=missing)
+        ).values_list("id", "slug", "name"):
+            for key in (str(category_id), slug, name):
+                if key in missing:
+                    self.categories[key] = category_id
+
+    def resolve_tags(self, names):
+        missing = {n for n in names if n not in self.tags}
+        if not missing:
+            return
+        self.tags.update(Tag.objects.filter(name__in=missing).values_list("name", "id"))
+        new = missing - self.tags.keys()
+        if not new or not self.create_tags:
+            return
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=_tag_slug(name)) for name in new],
+            ignore_conflicts=True,
+        )
+        self.tags.update(Tag.objects.filter(name__in=new).values_list("name", "id"))
+        # Slug déjà pris par un tag de nom différent : on rattache à ce tag
+        left = new - self.tags.keys()
+        if left:
+            by_slug = dict(
+                Tag.objects.filter(slug__in={_tag_slug(n) for n in left}).values_list("slug", "id")
+            )
+            for name in left:
+                if _tag_slug(name) in by_slug:
+                    self.tags[name] = by_slug[_tag_slug(name)]
+
+
+def _import_batch(church, batch, created_by, validator, resolver, dry_run):
+    errors = []
+    valid = []
+    for line_num, row in batch:
+        if isinstance(row, str):
+            errors.append({"row": line_num, "errors": {"non_field_errors": [row]}})
+            continue
+        try:
+            data = validator.run_validation(_normalize(row))
+        except serializers.ValidationError as exc:
+            errors.append({"row": line_num, "errors": serializers.as_serializer_error(exc)})
+            continue
+        valid.append((line_num, dict(data)))
+
+    resolver.resolve_categories({data["category"] for _, data in valid if data.get("category")})
+    resolver.resolve_tags({name for _, data in valid for name in data.get("tags", [])})
+
+    contents = []
+    tag_ids = []
+    for line_num, data in valid:
+        category = data.pop("category", None)
+        tags = data.pop("tags", [])
+        if category and category not in resolver.categories:
+            errors.append({"row": line_num, "errors": {"category": [f"Catégorie introuvable : {category}"]}})
+            continue
+        content = Content(
+            church=church,
+            created_by=created_by,
+            category_id=resolver.categories.get(category),
+            **data,
+        )
+        # Règles de Content.save(), que bulk_create n'appelle pas
+        if content.capacity is not None and content.tickets_sold > content.capacity:
+            errors.append({"row": line_num, "errors": {"tickets_sold": ["tickets_sold cannot exceed capacity"]}})
+            continue
+        content.is_released = not content.is_coming_soon()
+        contents.append(content)
+        tag_ids.append({resolver.tags[name] for name in tags if name in resolver.tags})
+
+    if dry_run or not contents:
+        return len(contents), errors
+
+    with transaction.atomic():
+        Content.objects.bulk_create(contents, batch_size=BATCH_SIZE)
+        ContentTag.objects.bulk_create(
+            [
+                ContentTag(content_id=content.id, tag_id=tag_id)
+                for content, ids in zip(contents, tag_ids)
+                for tag_id in ids
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        feed.fanout_new_contents(contents)
+    return len(contents), errors
+
+
+def import_contents(church, rows, created_by=None, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Importe `rows` (itérable de (numéro, données), voir read_rows) dans `church`.
+    Retourne {"created": n, "errors": [...]} ; avec dry_run, rien n'est écrit et
+    `created` compte les lignes qui auraient été importées.
+    """
+    validator = ContentImportSerializer()
+    resolver = _Resolver(create_tags=not dry_run)
+    rows = iter(rows)
+    created = 0
+    errors = []
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        batch_created, batch_errors = _import_batch(
+            church, batch, created_by, validator, resolver, dry_run
+        )
+        created += batch_created
+        errors.extend(batch_errors)
+
+    if created and not dry_run:
+        content_version.bump([church.id])
+    return {"created": created, "errors": errors}
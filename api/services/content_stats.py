@@ -0,0 +1,150 @@
+# api/services/content_stats.py
+"""
+Statistiques de contenus pré-agrégées (ContentStatRollup).
+
+Une ligne par (église, mois de création, type) avec le nombre de contenus sortis et
+la somme de leurs compteurs. Les endpoints de stats ne lisent que ces lignes : leur
+nombre dépend du nombre de mois et de types, pas du nombre de contenus.
+
+Fraîcheur : toute écriture visible sur les contenus d'une église incrémente déjà sa
+version (content_version.bump). `refresh_dirty` (commande refresh_content_stats,
+à lancer toutes les quelques minutes) ne recalcule que les églises dont la version
+a changé depuis leur dernier calcul (stats_version), puis les totaux globaux
+(church=None) à partir des lignes par église.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from api.models import Church, ChurchContentVersion, Content, ContentStatRollup
+
+BATCH_SIZE = 200
+
+
+def ensure_versions():
+    """Crée les versions manquantes (créées sinon à la première lecture conditionnelle)"""
+    missing = Church.objects.filter(content_version__isnull=True).values_list("id", flat=True)
+    ChurchContentVersion.objects.bulk_create(
+        [ChurchContentVersion(church_id=church_id) for church_id in missing],
+        ignore_conflicts=True,
+    )
+
+
+def refresh_churches(versions, now=None):
+    """
+    Recalcule les lignes des églises données (ChurchContentVersion lues avant le calcul).
+    stats_version reçoit la version lue : un bump concurrent laisse l'église à recalculer.
+    """
+    now = now or timezone.now()
+    church_ids = [version.church_id for version in versions]
+    rows = (
+        Content.objects.filter(church_id__in=church_ids, is_released=True)
+        .annotate(month=TruncMonth("created_at"))
+        .values("church_id", "month", "type")
+        .annotate(
+            contents=Count("id"),
+            likes=Sum("likes_count"),
+            views=Sum("views_count"),
+            comments=Sum("comments_count"),
+        )
+        .order_by()
+    )
+    rollups = [
+        ContentStatRollup(
+            church_id=row["church_id"],
+            month=row["month"],
+            type=row["type"],
+            contents=row["contents"],
+            likes=row["likes"] or 0,
+            views=row["views"] or 0,
+            comments=row["comments"] or 0,
+            refreshed_at=now,
+        )
+        for row in rows
+    ]
+    for version in versions:
+        version.stats_version = version.version
+    with transaction.atomic():
+        ContentStatRollup.objects.filter(church_id__in=church_ids).delete()
+        ContentStatRollup.objects.bulk_create(rollups, batch_size=500)
+        ChurchContentVersion.objects.bulk_update(versions, ["stats_version"], batch_size=500)
+    return len(rollups)
+
+
+def refresh_global(now=None):
+    """Totaux toutes églises confondues, à partir des lignes par église"""
+    now = now or timezone.now()
+    rows = (
+        ContentStatRollup.objects.filter(church__isnull=False)
+        .values("month", "type")
+        .annotate(
+            total_contents=Sum("contents"),
+            total_likes=Sum("likes"),
+            total_views=Sum("views"),
+            total_comments=Sum("comments"),
+        )
+        .order_by()
+    )
+    rollups = [
+        ContentStatRollup(
+            church=None,
+            month=row["month"],
+            type=row["type"],
+            contents=row["total_contents"],
+            likes=row["total_likes"],
+            views=row["total_views"],
+            comments=row["total_comments"],
+            refreshed_at=now,
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        ContentStatRollup.objects.filter(church__isnull=True).delete()
+        ContentStatRollup.objects.bulk_create(rollups, batch_size=500)
+
+
+def dirty_versions():
+    return ChurchContentVersion.objects.filter(
+        Q(stats_version__isnull=True) | ~Q(stats_version=F("version"))
+    ).order_by("church_id")
+
+
+def refresh_dirty(batch_size=BATCH_SIZE, everything=False):
+    """Une passe : recalcule les églises modifiées (toutes si everything). Retourne leur nombre"""
+    now = timezone.now()
+    ensure_versions()
+    queryset = ChurchContentVersion.objects.order_by("church_id") if everything else dirty_versions()
+    refreshed = 0
+    last_id = None
+    while True:
+        batch_qs = queryset if last_id is None else queryset.filter(church_id__gt=last_id)
+        batch = list(batch_qs[:batch_size])
+        if not batch:
+            break
+        refresh_churches(batch, now=now)
+        refreshed += len(batch)
+        last_id = batch[-1].church_id
+    if refreshed:
+        refresh_global(now=now)
+    return refreshed
+
+
+def ensure_church(church_id):
+    """
+    Calcule les lignes d'une église jamais calculée (nouvelle église, avant le premier
+    passage du job) pour que son tableau de bord ne soit pas vide.
+    """
+    version = ChurchContentVersion.objects.filter(church_id=church_id).first()
+    if version is None:
+        version, _ = ChurchContentVersion.objects.get_or_create(church_id=church_id)
+    if version.stats_version is None:
+        refresh_churches([version])
+
+
+def church_rollups(church_id):
+    return ContentStatRollup.objects.filter(church_id=church_id)
+
+
+def global_rollups():
+    return ContentStatRollup.objects.filter(church__isnull=True)
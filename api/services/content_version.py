@@ -0,0 +1,123 @@
+# api/services/content_version.py
+"""
+Version des contenus par église (ChurchContentVersion).
+
+Toute écriture qui change la représentation d'un contenu (contenu, tags, compteurs,
+sortie Coming Soon, playlists) appelle `bump` : un seul UPDATE F(), sans lecture.
+Les vues, elles, arrivent en continu : leur flush passe par `bump_throttled`, qui
+n'incrémente une église qu'une fois par intervalle (compteurs de vues et tendance
+en retard d'au plus CONTENT_VIEW_VERSION_INTERVAL secondes dans les réponses 304
+et le cache), sinon aucun ETag d'une église active ne survivrait plus de quelques
+secondes.
+Les lignes sont créées à la première lecture (`get`) : un bump antérieur ne peut
+invalider aucun ETag, puisqu'aucun n'a encore été émis pour cette église.
+
+Chaque bump incrémente aussi, après commit, un jeton de version dans le cache
+(`cache_token`) : les réponses mises en cache sous l'ancien jeton ne sont plus
+jamais relues, sans accès à la base pour le vérifier. Un jeton absent (expiré ou
+évincé) est recréé avec une valeur nouvelle, ce qui invalide aussi tout.
+"""
+import datetime
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.models import Church, ChurchContentVersion, Content
+
+GLOBAL_CACHE_KEY = "content-version:all"
+# Un jeton expiré est simplement remplacé : ce délai évite d'accumuler les jetons
+# d'églises inexistantes demandées par des liens invalides
+TOKEN_TIMEOUT = 7 * 24 * 3600
+
+
+def _cache_key(church_id):
+    return f"content-version:{church_id}"
+
+
+def invalidate_cache(church_ids=None):
+    """Change le jeton des églises données (toutes si None), après commit"""
+    keys = [GLOBAL_CACHE_KEY] if church_ids is None else [_cache_key(c) for c in church_ids]
+
+    def incr():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Jeton absent : le prochain lecteur en créera un nouveau
+                pass
+
+    transaction.on_commit(incr)
+
+
+def cache_token(church_id):
+    """Jeton de version de l'église, lu dans le cache uniquement"""
+    keys = [GLOBAL_CACHE_KEY, _cache_key(church_id)]
+    values = cache.get_many(keys)
+    if len(values) < len(keys):
+        for key in keys:
+            if key not in values:
+                cache.add(key, time.time_ns(), timeout=TOKEN_TIMEOUT)
+        values = cache.get_many(keys)
+    return ".".join(str(values.get(key)) for key in keys)
+
+
+def bump(church_ids, now=None):
+    church_ids = {church_id for church_id in church_ids if church_id}
+    if not church_ids:
+        return
+    ChurchContentVersion.objects.filter(church_id__in=church_ids).update(
+        version=F("version") + 1,
+        modified_at=now or timezone.now(),
+    )
+    invalidate_cache(church_ids)
+
+
+def bump_throttled(church_ids, interval, now=None):
+    """Comme `bump`, mais seulement pour les églises non incrémentées depuis `interval` secondes"""
+    church_ids = {church_id for church_id in church_ids if church_id}
+    if not church_ids:
+        return
+    now = now or timezone.now()
+    stale = ChurchContentVersion.objects.filter(
+        church_id__in=church_ids,
+        modified_at__lt=now - datetime.timedelta(seconds=interval),
+    ).values_list("church_id", flat=True)
+    bump(list(stale), now=now)
+
+
+def bump_all(now=None):
+    ChurchContentVersion.objects.update(version=F("version") + 1, modified_at=now or timezone.now())
+    invalidate_cache()
+
+
+def bump_for_contents(content_ids, now=None):
+    """Incrémente la version des églises propriétaires des contenus donnés"""
+    bump(
+        Content.objects.filter(id__in=content_ids).values_list("church_id", flat=True).distinct(),
+        now=now,
+    )
+
+
+def get(church_id):
+    """Version de l'église (None si l'église n'existe pas)"""
+    version = ChurchContentVersion.objects.filter(church_id=church_id).first()
+    if version is None and Church.objects.filter(id=church_id).exists():
+        version, _ = ChurchContentVersion.objects.get_or_create(church_id=church_id)
+    return version
+
+
+def get_many(church_ids):
+    """{church_id: ChurchContentVersion} pour des églises existantes"""
+    church_ids = set(church_ids)
+    versions = ChurchContentVersion.objects.in_bulk(church_ids)
+    missing = church_ids - set(versions)
+    if missing:
+        ChurchContentVersion.objects.bulk_create(
+            [ChurchContentVersion(church_id=church_id) for church_id in missing],
+            ignore_conflicts=True,
+        )
+        versions = ChurchContentVersion.objects.in_bulk(church_ids)
+    return versions
@@ -0,0 +1,178 @@
+# api/services/content_views.py
+"""
+Ingestion différée des vues de contenu (write-behind).
+
+`record_view` ne fait qu'ajouter la vue dans un buffer en mémoire du processus.
+Le buffer est vidé par lots (bulk_create des ContentView, incrément des rollups
+ContentViewDaily et de Content.views_count) quand il atteint
+CONTENT_VIEW_BUFFER_SIZE vues, au plus tard CONTENT_VIEW_FLUSH_INTERVAL secondes
+après la première vue en attente, et à l'arrêt du processus.
+
+Si l'écriture échoue (base indisponible), le lot est remis en tête du buffer et
+retenté au prochain intervalle. Le buffer reste borné à MAX_PENDING_BATCHES lots :
+au-delà, les vues les plus anciennes sont abandonnées (et journalisées).
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from api.models import Content, ContentView, ContentViewDaily, User
+from api.services import content_version, trending
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_BATCHES = 10
+
+
+class ViewBuffer:
+    """Buffer thread-safe des vues en attente d'écriture"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    @property
+    def max_size(self):
+        return getattr(settings, "CONTENT_VIEW_BUFFER_SIZE", 200)
+
+    @property
+    def interval(self):
+        return getattr(settings, "CONTENT_VIEW_FLUSH_INTERVAL", 5.0)
+
+    def add(self, user_id, content_id, viewed_at=None):
+        with self._lock:
+            self._pending.append((user_id, content_id, viewed_at or timezone.now()))
+            full = len(self._pending) >= self.max_size
+            if not full and self._timer is None:
+                self._start_timer()
+        if full:
+            # Une vue ne fait pas échouer la requête : le lot est gardé pour le prochain essai
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Échec du flush des vues de contenu")
+
+    def _start_timer(self):
+        self._timer = threading.Timer(self.interval, self._flush_from_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Échec du flush des vues de contenu")
+        finally:
+            # Le timer tourne dans son propre thread : libérer sa connexion
+            connection.close()
+
+    def _requeue(self, pending):
+        """Remet un lot non écrit en tête du buffer et réarme le timer"""
+        with self._lock:
+            self._pending = pending + self._pending
+            overflow = len(self._pending) - self.max_size * MAX_PENDING_BATCHES
+            if overflow > 0:
+                del self._pending[:overflow]
+                logger.error("Buffer de vues plein : %d vues abandonnées", overflow)
+            if self._timer is None:
+                self._start_timer()
+
+    def flush(self):
+        """Écrit toutes les vues en attente. Retourne le nombre de vues écrites."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+        try:
+            return write_views(pending)
+        except Exception:
+            self._requeue(pending)
+            raise
+
+    def __len__(self):
+        return len(self._pending)
+
+
+def write_views(views):
+    """
+    Persiste une liste de (user_id, content_id, viewed_at).
+    Les vues dont le contenu ou l'utilisateur a été supprimé entre-temps sont ignorées.
+    """
+    content_ids = {content_id for _, content_id, _ in views}
+    user_ids = {user_id for user_id, _, _ in views}
+    churches = dict(Content.objects.filter(id__in=content_ids).values_list("id", "church_id"))
+    existing_users = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+    views = [
+        v for v in views
+        if v[1] in churches and v[0] in existing_users
+    ]
+    if not views:
+        return 0
+
+    per_day = Counter(
+        (content_id, timezone.localdate(viewed_at)) for _, content_id, viewed_at in views
+    )
+
+    with transaction.atomic():
+        ContentView.objects.bulk_create(
+            [
+                ContentView(user_id=user_id, content_id=content_id, viewed_at=viewed_at)
+                for user_id, content_id, viewed_at in views
+            ],
+            batch_size=500,
+        )
+
+        # S'assurer que les lignes de rollup existent, puis incrémenter :
+        # un UPDATE par valeur d'incrément distincte, sûr entre processus.
+        ContentViewDaily.objects.bulk_create(
+            [ContentViewDaily(content_id=c, day=d, views=0) for c, d in per_day],
+            ignore_conflicts=True,
+        )
+        by_increment = defaultdict(list)
+        for key, n in per_day.items():
+            by_increment[n].append(key)
+        for n, keys in by_increment.items():
+            condition = Q()
+            for content_id, day in keys:
+                condition |= Q(content_id=content_id, day=day)
+            ContentViewDaily.objects.filter(condition).update(views=F("views") + n)
+
+        # Compteur dénormalisé Content.views_count
+        per_content = Counter(content_id for _, content_id, _ in views)
+        by_increment = defaultdict(list)
+        for content_id, n in per_content.items():
+            by_increment[n].append(content_id)
+        for n, content_ids in by_increment.items():
+            Content.objects.filter(id__in=content_ids).update(views_count=F("views_count") + n)
+
+        trending.record_views(per_content)
+        content_version.bump_throttled(
+            (churches[content_id] for content_id in per_content),
+            getattr(settings, "CONTENT_VIEW_VERSION_INTERVAL", 300),
+        )
+
+    return len(views)
+
+
+view_buffer = ViewBuffer()
+atexit.register(view_buffer.flush)
+
+
+def record_view(user, content):
+    """Enregistre une vue (écriture différée)"""
+    view_buffer.add(user.id, content.id)
+
+
+def flush_views():
+    return view_buffer.flush()
+
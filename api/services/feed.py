@@ -0,0 +1,174 @@
+# api/services/feed.py
+"""
+Fil d'actualité matérialisé (ChurchFeedEntry).
+
+Le fil d'une église C contient les contenus publiés :
+- de C, de ses sous-églises directes et de toutes ses églises parentes
+- des églises collaboratrices (collaboration ACCEPTED), uniquement s'ils sont publics
+
+Au lieu de recalculer ces règles à chaque lecture, chaque contenu est poussé
+(fan-out) dans le fil de toutes les églises qui doivent le voir. Les changements
+d'arbre ou de collaboration reconstruisent les fils concernés.
+"""
+from django.db.models import Q
+
+from api.models import Church, ChurchCollaboration, ChurchFeedEntry, Content
+
+BATCH_SIZE = 500
+
+
+def ancestor_ids(church_id):
+    """Ids des églises parentes (parent, grand-parent, ...)"""
+    ids = []
+    seen = {church_id}
+    parent_id = Church.objects.filter(pk=church_id).values_list("parent_id", flat=True).first()
+    while parent_id and parent_id not in seen:
+        ids.append(parent_id)
+        seen.add(parent_id)
+        parent_id = Church.objects.filter(pk=parent_id).values_list("parent_id", flat=True).first()
+    return ids
+
+
+def descendant_ids(church_id):
+    """Ids de toutes les sous-églises (parcours en largeur, une requête par niveau)"""
+    ids = []
+    seen = {church_id}
+    level = [church_id]
+    while level:
+        level = [
+            cid for cid in Church.objects.filter(parent_id__in=level).values_list("id", flat=True)
+            if cid not in seen
+        ]
+        seen.update(level)
+        ids.extend(level)
+    return ids
+
+
+def collaborator_ids(church_id):
+    """Ids des églises ayant une collaboration ACCEPTED avec l'église"""
+    pairs = ChurchCollaboration.objects.filter(
+        Q(initiator_church_id=church_id) | Q(target_church_id=church_id),
+        status="ACCEPTED",
+    ).values_list("initiator_church_id", "target_church_id")
+    return {a if b == church_id else b for a, b in pairs}
+
+
+def internal_source_ids(church_id):
+    """Églises dont TOUS les contenus publiés apparaissent dans le fil (côté lecteur)"""
+    ids = {church_id}
+    ids.update(Church.objects.filter(parent_id=church_id).values_list("id", flat=True))
+    ids.update(ancestor_ids(church_id))
+    return ids
+
+
+def audience_ids(church_id, is_public):
+    """Églises dont le fil doit contenir un contenu publié par church_id (côté auteur)"""
+    ids = {church_id}
+    parent_id = Church.objects.filter(pk=church_id).values_list("parent_id", flat=True).first()
+    if parent_id:
+        ids.add(parent_id)
+    ids.update(descendant_ids(church_id))
+    if is_public:
+        ids.update(collaborator_ids(church_id))
+    return ids
+
+
+def fanout_content(content):
+    """Synchronise les entrées de fil d'un contenu après création/modification"""
+    entries = ChurchFeedEntry.objects.filter(content=content)
+    if not content.published:
+        entries.delete()
+        return
+
+    audience = audience_ids(content.church_id, content.is_public)
+    entries.exclude(church_id__in=audience).delete()
+    entries.update(
+        source_church_id=content.church_id,
+        created_at=content.created_at,
+        planned_release_date=content.planned_release_date,
+    )
+    ChurchFeedEntry.objects.bulk_create(
+        [
+            ChurchFeedEntry(
+                church_id=church_id,
+                content_id=content.id,
+                source_church_id=content.church_id,
+                created_at=content.created_at,
+                planned_release_date=content.planned_release_date,
+            )
+            for church_id in audience
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fanout_new_contents(contents):
+    """
+    Fan-out d'un lot de contenus créés par bulk_create (sans signaux) :
+    l'audience est calculée une fois par (église, is_public) au lieu d'une fois par contenu.
+    """
+    audiences = {}
+    entries = []
+    for content in contents:
+        if not content.published:
+            continue
+        key = (content.church_id, content.is_public)
+        if key not in audiences:
+            audiences[key] = audience_ids(*key)
+        entries.extend(
+            ChurchFeedEntry(
+                church_id=church_id,
+                content_id=content.id,
+                source_church_id=content.church_id,
+                created_at=content.created_at,
+                planned_release_date=content.planned_release_date,
+            )
+            for church_id in audiences[key]
+        )
+    ChurchFeedEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(entries)
+
+
+def rebuild_church_feed(church_id):
+    """Reconstruit le fil d'une église (ajoute les manquants, retire les obsolètes)"""
+    internal = internal_source_ids(church_id)
+    collaborators = collaborator_ids(church_id) - internal
+
+    wanted = Content.objects.filter(
+        Q(church_id__in=internal) | Q(church_id__in=collaborators, is_public=True),
+        published=True,
+    )
+    ChurchFeedEntry.objects.filter(church_id=church_id).exclude(
+        content_id__in=wanted.values("id")
+    ).delete()
+
+    missing = wanted.exclude(feed_entries__church_id=church_id).values_list(
+        "id", "church_id", "created_at", "planned_release_date"
+    )
+    created = ChurchFeedEntry.objects.bulk_create(
+        [
+            ChurchFeedEntry(
+                church_id=church_id,
+                content_id=content_id,
+                source_church_id=source_id,
+                created_at=created_at,
+                planned_release_date=planned_release_date,
+            )
+            for content_id, source_id, created_at, planned_release_date in missing.iterator()
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(created)
+
+
+def rebuild_tree_feeds(church_id, *parent_ids):
+    """
+    Après un changement de parent : le fil de l'église, de ses sous-églises
+    (chaîne de parents modifiée) et des anciens/nouveaux parents change.
+    """
+    affected = {church_id, *descendant_ids(church_id)}
+    affected.update(pid for pid in parent_ids if pid)
+    for cid in affected:
+        rebuild_church_feed(cid)
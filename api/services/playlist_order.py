@@ -0,0 +1,129 @@
+# api/services/playlist_order.py
+"""
+Ordre des éléments de playlist par positions espacées.
+
+Les positions sont des multiples de GAP (1024, 2048...). Déplacer un élément
+lui donne le milieu des positions de ses nouveaux voisins : un seul UPDATE, quelle
+que soit la taille de la playlist. Quand deux voisins n'ont plus d'écart libre
+(environ log2(GAP) déplacements successifs au même endroit), la playlist est
+renumérotée une fois par un bulk_update, puis le déplacement est refait. La
+renumérotation commence à GAP, jamais à 0 : il reste toujours de la place devant
+le premier élément (déplacement en tête).
+
+Les positions exposées par l'API ne sont donc plus des rangs consécutifs : seul
+leur ordre compte.
+"""
+from django.db import transaction
+from django.db.models import Max
+
+from api.models import Playlist, PlaylistItem
+from api.services import content_version
+
+GAP = 1024
+BATCH_SIZE = 500
+
+
+def append_position(playlist_id):
+    """Position d'un élément ajouté en fin de playlist"""
+    last = PlaylistItem.objects.filter(playlist_id=playlist_id).aggregate(last=Max("position"))["last"]
+    return GAP if last is None else last + GAP
+
+
+def _slot(index):
+    """Position espacée du rang `index` (GAP, 2*GAP...) : un écart libre reste devant le premier"""
+    return (index + 1) * GAP
+
+
+def renumber(playlist_id):
+    """Réespace toutes les positions de la playlist (GAP, 2*GAP...) en gardant l'ordre"""
+    changed = []
+    for index, item in enumerate(
+        PlaylistItem.objects.filter(playlist_id=playlist_id).order_by("position", "id").only("id", "position")
+    ):
+        if item.position != _slot(index):
+            item.position = _slot(index)
+            changed.append(item)
+    PlaylistItem.objects.bulk_update(changed, ["position"], batch_size=BATCH_SIZE)
+    if changed:
+        # bulk_update ne déclenche pas les signaux de PlaylistItem
+        content_version.bump(Playlist.objects.filter(id=playlist_id).values_list("church_id", flat=True))
+    return len(changed)
+
+
+def _position_between(before, after):
+    """Position libre strictement entre deux voisins (None = pas de voisin), ou None"""
+    if before is None and after is None:
+        return GAP
+    if before is None:
+        return after - GAP if after >= GAP else (after // 2 if after > 0 else None)
+    if after is None:
+        return before + GAP
+    if after - before >= 2:
+        return (before + after) // 2
+    return None
+
+
+def _neighbours(item, index):
+    others = (
+        PlaylistItem.objects.filter(playlist_id=item.playlist_id)
+        .exclude(id=item.id)
+        .order_by("position", "id")
+        .values_list("position", flat=True)
+    )
+    if index == 0:
+        after = others[:1]
+        return None, (after[0] if after else None)
+    pair = list(others[index - 1:index + 1])
+    if not pair:
+        # Au-delà de la fin : après le dernier élément
+        last = others.reverse()[:1]
+        return (last[0] if last else None), None
+    return pair[0], (pair[1] if len(pair) > 1 else None)
+
+
+def move_item(item, index):
+    """
+    Place `item` au rang `index` (0 = premier ; au-delà de la fin = dernier).
+    N'écrit que la ligne déplacée, sauf renumérotation quand l'écart est épuisé.
+    """
+    index = max(0, index)
+    with transaction.atomic():
+        # Verrou sur la playlist : deux déplacements concurrents ne prennent pas le même milieu
+        list(Playlist.objects.select_for_update().filter(id=item.playlist_id).values_list("id", flat=True))
+        before, after = _neighbours(item, index)
+        position = _position_between(before, after)
+        renumbered = position is None
+        if renumbered:
+            renumber(item.playlist_id)
+            before, after = _neighbours(item, index)
+            position = _position_between(before, after)
+        # Après renumérotation, item.position en mémoire n'est plus celle de la base
+        if renumbered or position != item.position:
+            item.position = position
+            item.save(update_fields=["position"])
+    return item
+
+
+def set_order(playlist, item_ids):
+    """
+    Applique un ordre complet : `item_ids` doit contenir exactement les éléments
+    de la playlist. Un seul bulk_update pour les lignes dont la position change.
+    Lève ValueError si la liste ne correspond pas à la playlist.
+    """
+    item_ids = [str(item_id) for item_id in item_ids]
+    items = {str(item.id): item for item in PlaylistItem.objects.filter(playlist=playlist).only("id", "position")}
+    if len(item_ids) != len(set(item_ids)) or set(item_ids) != set(items):
+        raise ValueError("items doit contenir exactement les éléments de la playlist")
+
+    changed = []
+    for index, item_id in enumerate(item_ids):
+        item = items[item_id]
+        if item.position != _slot(index):
+            item.position = _slot(index)
+            changed.append(item)
+    with transaction.atomic():
+        PlaylistItem.objects.bulk_update(changed, ["position"], batch_size=BATCH_SIZE)
+        if changed:
+            # bulk_update ne déclenche pas les signaux de PlaylistItem
+            content_version.bump([playlist.church_id])
+    return len(changed)
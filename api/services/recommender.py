@@ -0,0 +1,142 @@
+# api/services/recommender.py
+"""
+Recommandations item-à-item précalculées (par église).
+
+Job hors ligne (commande build_recommendations) :
+- matrice contenus x tags (binaire) -> similarité cosinus des tags
+- matrice utilisateurs x contenus (a vu / n'a pas vu, fenêtre COVIEW_DAYS) -> similarité
+  cosinus de co-visionnage
+- similarité = TAG_WEIGHT * tags + COVIEW_WEIGHT * co-visionnage, calculée par blocs
+  de lignes sur des matrices creuses (scipy.sparse), et seuls les TOP_K voisins de
+  chaque contenu sont stockés dans ContentNeighbor.
+La mémoire suit le nombre de paires non nulles (vues, tags, co-occurrences d'un
+bloc), jamais contenus x utilisateurs.
+
+À la requête, on fusionne seulement les listes de voisins des derniers contenus vus :
+le coût ne dépend plus du nombre de contenus publiés par l'église.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+from django.utils import timezone
+
+from api.models import Content, ContentNeighbor, ContentTag, ContentView
+
+TOP_K = 20
+TAG_WEIGHT = 0.5
+COVIEW_WEIGHT = 0.5
+COVIEW_DAYS = 90
+BLOCK_SIZE = 512
+
+# Nombre de contenus récemment vus dont on fusionne les voisins
+RECENT_VIEWS = 20
+
+
+def _normalized_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix)
+
+
+def _one_hot(pairs, row_index, col_index, shape):
+    rows = [row_index[r] for r, _ in pairs]
+    cols = [col_index[c] for _, c in pairs]
+    data = np.ones(len(pairs), dtype=np.float32)
+    return sparse.csr_matrix((data, (rows, cols)), shape=shape)
+
+
+def build_church_model(church_id, top_k=TOP_K, coview_days=COVIEW_DAYS):
+    """Recalcule les voisins de tous les contenus publiés et publics de l'église"""
+    content_ids = list(
+        Content.objects.filter(church_id=church_id, published=True, is_public=True)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    n = len(content_ids)
+    if n < 2:
+        ContentNeighbor.objects.filter(content__church_id=church_id).delete()
+        return 0
+    item_index = {cid: i for i, cid in enumerate(content_ids)}
+
+    # Contenus x tags
+    tag_pairs = list(
+        ContentTag.objects.filter(content_id__in=content_ids)
+        .values_list("content_id", "tag_id")
+        .distinct()
+    )
+    tag_index = {tag_id: j for j, tag_id in enumerate(sorted({t for _, t in tag_pairs}))}
+    tags = _normalized_rows(_one_hot(tag_pairs, item_index, tag_index, (n, len(tag_index))))
+
+    # Contenus x utilisateurs (transposée de la matrice de vues)
+    since = timezone.now() - timedelta(days=coview_days)
+    view_pairs = list(
+        ContentView.objects.filter(content_id__in=content_ids, viewed_at__gte=since)
+        .values_list("content_id", "user_id")
+        .distinct()
+    )
+    user_index = {user_id: j for j, user_id in enumerate({u for _, u in view_pairs})}
+    viewers = _normalized_rows(_one_hot(view_pairs, item_index, user_index, (n, len(user_index))))
+
+    k = min(top_k, n - 1)
+    neighbors = []
+    for start in range(0, n, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, n)
+        similarity = sparse.csr_matrix(
+            TAG_WEIGHT * (tags[start:stop] @ tags.T) + COVIEW_WEIGHT * (viewers[start:stop] @ viewers.T)
+        )
+        for row in range(stop - start):
+            lo, hi = similarity.indptr[row], similarity.indptr[row + 1]
+            cols, scores = similarity.indices[lo:hi], similarity.data[lo:hi]
+            # Pas de contenu voisin de lui-même
+            keep = (cols != start + row) & (scores > 0)
+            cols, scores = cols[keep], scores[keep]
+            if len(cols) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                cols, scores = cols[top], scores[top]
+            for col, score in zip(cols, scores):
+                neighbors.append(ContentNeighbor(
+                    content_id=content_ids[start + row],
+                    neighbor_id=content_ids[col],
+                    score=float(score),
+                ))
+
+    with transaction.atomic():
+        ContentNeighbor.objects.filter(content__church_id=church_id).delete()
+        ContentNeighbor.objects.bulk_create(neighbors, batch_size=1000)
+    return len(neighbors)
+
+
+def recommend(user, church_id, limit=20):
+    """
+    Contenus recommandés à partir des voisins des derniers contenus vus.
+    Retourne une liste d'ids ordonnée (vide si pas d'historique ou pas de modèle).
+    """
+    recent = []
+    seen = set()
+    last_views = (
+        ContentView.objects.filter(user=user, content__church_id=church_id)
+        .order_by("-viewed_at")
+        .values_list("content_id", flat=True)[:50]
+    )
+    for content_id in last_views:
+        if content_id not in seen:
+            seen.add(content_id)
+            recent.append(content_id)
+    recent = recent[:RECENT_VIEWS]
+    if not recent:
+        return []
+
+    # Les vues les plus récentes pèsent davantage
+    recency = {content_id: 1.0 / (1 + position) for position, content_id in enumerate(recent)}
+    merged = defaultdict(float)
+    rows = ContentNeighbor.objects.filter(content_id__in=recent).values_list(
+        "content_id", "neighbor_id", "score"
+    )
+    for content_id, neighbor_id, score in rows:
+        if neighbor_id not in seen:
+            merged[neighbor_id] += score * recency[content_id]
+
+    return sorted(merged, key=merged.get, reverse=True)[:limit * 3]
@@ -0,0 +1,87 @@
+# api/services/release.py
+"""
+Sortie programmée des contenus Coming Soon.
+
+Un contenu publié dont planned_release_date est dans le futur a is_released=False :
+les listes filtrent simplement sur ce booléen indexé au lieu de comparer la date à
+now() à chaque requête. La commande `release_scheduled_content` (à lancer chaque
+minute) bascule les contenus arrivés à échéance, puis notifie leurs abonnés
+(ContentNotification) par lots : une Notification IN_APP par abonné (bulk_create)
+et un seul UPDATE is_notified/notified_at par lot.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Content, ContentNotification, Notification
+from api.services import content_version
+
+BATCH_SIZE = 500
+
+
+def release_due_contents(now=None, batch_size=BATCH_SIZE):
+    """Bascule is_released sur les contenus dont la date de sortie est passée"""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        due_ids = list(
+            Content.objects.filter(
+                is_released=False,
+                planned_release_date__lte=now,
+            )
+            .order_by("planned_release_date", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not due_ids:
+            break
+        # Le filtre is_released=False rend l'UPDATE idempotent entre workers concurrents
+        released += Content.objects.filter(id__in=due_ids, is_released=False).update(is_released=True)
+        content_version.bump_for_contents(due_ids, now=now)
+    return released
+
+
+def _notification(user_id, title):
+    return Notification(
+        user_id=user_id,
+        title="Nouveau contenu disponible",
+        eng_title="New content available",
+        message=f"« {title} » est maintenant disponible.",
+        eng_message=f"“{title}” is now available.",
+        type="INFO",
+        channel="IN_APP",
+    )
+
+
+def notify_released_subscribers(now=None, batch_size=BATCH_SIZE):
+    """
+    Notifie les abonnés en attente des contenus sortis.
+    Retourne le nombre d'abonnés notifiés.
+    """
+    now = now or timezone.now()
+    notified = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                ContentNotification.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(is_notified=False, content__published=True, content__is_released=True)
+                .order_by("subscribed_at", "id")
+                .values_list("id", "user_id", "content__title")[:batch_size]
+            )
+            if not batch:
+                break
+            Notification.objects.bulk_create(
+                [_notification(user_id, title) for _, user_id, title in batch],
+                batch_size=batch_size,
+            )
+            ContentNotification.objects.filter(
+                id__in=[notification_id for notification_id, _, _ in batch]
+            ).update(is_notified=True, notified_at=now)
+        notified += len(batch)
+    return notified
+
+
+def run_release_pass(now=None, batch_size=BATCH_SIZE):
+    """Une passe du worker : (contenus sortis, abonnés notifiés)"""
+    now = now or timezone.now()
+    released = release_due_contents(now=now, batch_size=batch_size)
+    notified = notify_released_subscribers(now=now, batch_size=batch_size)
+    return released, notified
@@ -0,0 +1,166 @@
+# api/services/retention.py
+"""
+Rétention des lignes brutes d'engagement (vues, messages, notifications).
+
+Les lignes plus anciennes que l'horizon de leur politique (settings.RETENTION_DAYS)
+sont déplacées, par lots dans l'ordre chronologique, vers des fichiers JSON Lines
+compressés (gzip) sous settings.RETENTION_ARCHIVE_DIR, puis supprimées de la table.
+Chaque lot laisse derrière lui :
+- un ArchiveBatch (fichier, nombre de lignes, période couverte) ;
+- des ArchivedDailyCount : nombre de lignes archivées par jour et par clé
+  (salon pour les messages, contenu pour les vues...). Les vues gardent en plus
+  leurs agrégats existants (ContentViewDaily, Content.views_count).
+
+Reprise : un lot n'est supprimé qu'une fois son fichier écrit, dans la même
+transaction que ses agrégats ; un passage interrompu repart simplement des plus
+anciennes lignes restantes (le fichier d'un lot non validé est réécrit à l'identique).
+Débit : `pause` entre deux lots et `max_seconds` par passage permettent de tourner
+en journée sans monopoliser la base.
+"""
+import gzip
+import json
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import (
+    ArchiveBatch, ArchivedDailyCount, ChatMessage, ContentView, Notification,
+    ProgrammeContentNotification,
+)
+
+CHUNK_SIZE = 1000
+
+
+class RetentionPolicy:
+    """Table archivée, colonne de date, clé d'agrégation et filtre optionnel"""
+
+    def __init__(self, name, model, date_field, key_field, condition=None):
+        self.name = name
+        self.model = model
+        self.date_field = date_field
+        self.key_field = key_field
+        self.condition = condition or Q()
+
+    @property
+    def days(self):
+        return getattr(settings, "RETENTION_DAYS", {}).get(self.name, 0)
+
+    def expired(self, cutoff):
+        return self.model.objects.filter(self.condition, **{f"{self.date_field}__lt": cutoff})
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (
+        RetentionPolicy("content_views", ContentView, "viewed_at", "content_id"),
+        RetentionPolicy("chat_messages", ChatMessage, "created_at", "room_id"),
+        RetentionPolicy("notifications", Notification, "created_at", "type"),
+        # Une notification pas encore envoyée reste en place, quel que soit son âge
+        RetentionPolicy(
+            "programme_content_notifications", ProgrammeContentNotification, "created_at", "programme_id",
+            condition=Q(is_notified=True),
+        ),
+    )
+}
+
+
+def _archive_path(policy, first_row):
+    day = timezone.localtime(first_row[policy.date_field])
+    directory = Path(settings.RETENTION_ARCHIVE_DIR) / policy.name / f"{day:%Y}" / f"{day:%m}"
+    return directory / f"{day:%Y%m%dT%H%M%S}-{first_row['id']}.jsonl.gz"
+
+
+def _write_archive(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as archive:
+        for row in rows:
+            archive.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            archive.write("\n")
+    os.replace(tmp, path)
+
+
+def _add_daily_counts(policy, counts):
+    existing = {
+        (row.day, row.key): row
+        for row in ArchivedDailyCount.objects.filter(
+            policy=policy.name,
+            day__in={day for day, _ in counts},
+            key__in={key for _, key in counts},
+        )
+    }
+    updated = []
+    created = []
+    for (day, key), rows in counts.items():
+        row = existing.get((day, key))
+        if row is None:
+            created.append(ArchivedDailyCount(policy=policy.name, day=day, key=key, rows=rows))
+        else:
+            row.rows += rows
+            updated.append(row)
+    ArchivedDailyCount.objects.bulk_update(updated, ["rows"], batch_size=500)
+    ArchivedDailyCount.objects.bulk_create(created, batch_size=500)
+
+
+def archive_chunk(policy, cutoff, chunk_size=CHUNK_SIZE):
+    """Archive les `chunk_size` plus anciennes lignes expirées. Retourne leur nombre"""
+    columns = [field.attname for field in policy.model._meta.concrete_fields]
+    rows = list(
+        policy.expired(cutoff).order_by(policy.date_field, "pk").values(*columns)[:chunk_size]
+    )
+    if not rows:
+        return 0
+
+    path = _archive_path(policy, rows[0])
+    _write_archive(path, rows)
+
+    counts = Counter(
+        (timezone.localtime(row[policy.date_field]).date(), str(row[policy.key_field]))
+        for row in rows
+    )
+    with transaction.atomic():
+        ArchiveBatch.objects.create(
+            policy=policy.name,
+            path=str(path),
+            rows=len(rows),
+            oldest=rows[0][policy.date_field],
+            newest=rows[-1][policy.date_field],
+        )
+        _add_daily_counts(policy, counts)
+        policy.model.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+    return len(rows)
+
+
+def run(names=None, chunk_size=CHUNK_SIZE, pause=0.0, max_seconds=None, now=None):
+    """
+    Un passage sur les politiques données (toutes par défaut).
+    Retourne {politique: lignes archivées} ; s'arrête après max_seconds (reprise au
+    prochain passage).
+    """
+    now = now or timezone.now()
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    archived = {}
+    for name in names or POLICIES:
+        policy = POLICIES[name]
+        if not policy.days:
+            continue
+        cutoff = now - timedelta(days=policy.days)
+        archived[name] = 0
+        while True:
+            count = archive_chunk(policy, cutoff, chunk_size)
+            archived[name] += count
+            if count < chunk_size:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                return archived
+            if pause:
+                time.sleep(pause)
+    return archived
@@ -0,0 +1,236 @@
+# api/services/search.py
+"""
+Recherche plein texte des contenus et des messages de chat.
+
+- PostgreSQL : colonne api_content.search_vector (tsvector) maintenue par trigger,
+  configurations christlumen_fr / christlumen_en (unaccent + stemming), index GIN,
+  tri par ts_rank.
+- SQLite : table FTS5 api_content_fts (external content, tokenizer unicode61
+  remove_diacritics 2) maintenue par triggers, tri par bm25.
+- Autres moteurs : repli sur icontains.
+
+Le schéma est créé par la migration 0016_content_search. Sur SQLite, les migrations
+qui reconstruisent la table api_content suppriment ses triggers : ils sont recréés
+après chaque migrate (voir ensure_sqlite_triggers).
+
+Messages de chat (migrations 0026_chat_message_search et 0028_chat_message_search_key) :
+colonne api_chatmessage.search_vector + GIN sur PostgreSQL. Sur SQLite, la clé
+primaire étant un UUID, le rowid implicite de api_chatmessage n'est pas stable
+(VACUUM ou reconstruction de table peuvent le renuméroter) : la table
+api_chatmessage_fts_key attribue à chaque message une clé entière stable
+(INTEGER PRIMARY KEY), qui sert de rowid à la table FTS5 api_chatmessage_fts
+(contentless : le texte reste dans api_chatmessage). Les résultats sont triés par
+date (pagination par curseur), pas par pertinence.
+
+Chaque mot de la requête est cherché en préfixe ("pri" trouve "prière") et tous les
+mots doivent correspondre.
+"""
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 10
+
+SQLITE_CONTENT_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS api_content_fts_insert AFTER INSERT ON api_content BEGIN
+        INSERT INTO api_content_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_content_fts_delete AFTER DELETE ON api_content BEGIN
+        INSERT INTO api_content_fts(api_content_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_content_fts_update AFTER UPDATE OF title, description ON api_content BEGIN
+        INSERT INTO api_content_fts(api_content_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO api_content_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+
+SQLITE_MESSAGE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS api_chatmessage_fts_insert AFTER INSERT ON api_chatmessage BEGIN
+        INSERT INTO api_chatmessage_fts_key(message_id) VALUES (new.id);
+        INSERT INTO api_chatmessage_fts(rowid, message)
+        SELECT fts_rowid, new.message FROM api_chatmessage_fts_key WHERE message_id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_chatmessage_fts_delete AFTER DELETE ON api_chatmessage BEGIN
+        INSERT INTO api_chatmessage_fts(api_chatmessage_fts, rowid, message)
+        SELECT 'delete', fts_rowid, old.message FROM api_chatmessage_fts_key WHERE message_id = old.id;
+        DELETE FROM api_chatmessage_fts_key WHERE message_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_chatmessage_fts_update AFTER UPDATE OF message ON api_chatmessage BEGIN
+        INSERT INTO api_chatmessage_fts(api_chatmessage_fts, rowid, message)
+        SELECT 'delete', fts_rowid, old.message FROM api_chatmessage_fts_key WHERE message_id = old.id;
+        INSERT INTO api_chatmessage_fts(rowid, message)
+        SELECT fts_rowid, new.message FROM api_chatmessage_fts_key WHERE message_id = new.id;
+    END
+    """,
+]
+
+# Resynchronise clés et index avec api_chatmessage (messages écrits sans triggers)
+SQLITE_MESSAGE_REBUILD = [
+    "DELETE FROM api_chatmessage_fts_key WHERE message_id NOT IN (SELECT id FROM api_chatmessage)",
+    """
+    INSERT INTO api_chatmessage_fts_key(message_id)
+    SELECT id FROM api_chatmessage WHERE id NOT IN (SELECT message_id FROM api_chatmessage_fts_key)
+    """,
+    "INSERT INTO api_chatmessage_fts(api_chatmessage_fts) VALUES ('delete-all')",
+    """
+    INSERT INTO api_chatmessage_fts(rowid, message)
+    SELECT k.fts_rowid, m.message FROM api_chatmessage_fts_key k
+    JOIN api_chatmessage m ON m.id = k.message_id
+    """,
+]
+
+# Table FTS5 -> (noms des triggers, triggers, resynchronisation si un trigger a disparu)
+SQLITE_FTS = {
+    "api_content_fts": (
+        ("api_content_fts_insert", "api_content_fts_delete", "api_content_fts_update"),
+        SQLITE_CONTENT_TRIGGERS,
+        ["INSERT INTO api_content_fts(api_content_fts) VALUES ('rebuild')"],
+    ),
+    "api_chatmessage_fts": (
+        ("api_chatmessage_fts_insert", "api_chatmessage_fts_delete", "api_chatmessage_fts_update"),
+        SQLITE_MESSAGE_TRIGGERS,
+        SQLITE_MESSAGE_REBUILD,
+    ),
+}
+
+
+def ensure_sqlite_triggers(using="default"):
+    """Recrée les triggers FTS5 si une reconstruction de table SQLite les a supprimés"""
+    conn = connections[using]
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        for fts_table, (names, triggers, rebuild) in SQLITE_FTS.items():
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [fts_table]
+            )
+            if cursor.fetchone() is None:
+                continue
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)", list(names)
+            )
+            if cursor.fetchone()[0] == len(names):
+                continue
+            for sql in triggers:
+                cursor.execute(sql)
+            # Table reconstruite : des lignes ont pu être écrites sans triggers
+            for sql in rebuild:
+                cursor.execute(sql)
+
+
+def query_terms(query):
+    return WORD_RE.findall(query or "")[:MAX_TERMS]
+
+
+def _postgres_tsquery(terms):
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def _fts5_query(terms):
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_contents(queryset, query):
+    """
+    Filtre `queryset` (Content) sur `query` et annote `search_rank`
+    (plus grand = plus pertinent).
+    """
+    terms = query_terms(query)
+    if not terms:
+        # Annoté quand même : l'appelant peut trier sur search_rank
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+    if connection.vendor == "postgresql":
+        tsquery = _postgres_tsquery(terms)
+        match = (
+            "(to_tsquery('christlumen_fr', %s) || to_tsquery('christlumen_en', %s))"
+        )
+        return queryset.filter(
+            RawSQL(
+                f"api_content.search_vector @@ {match}",
+                (tsquery, tsquery),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank(api_content.search_vector, {match})",
+                (tsquery, tsquery),
+                output_field=FloatField(),
+            )
+        )
+
+    if connection.vendor == "sqlite":
+        fts_query = _fts5_query(terms)
+        return queryset.filter(
+            id__in=RawSQL(
+                "SELECT rowid FROM api_content_fts WHERE api_content_fts MATCH %s",
+                (fts_query,),
+            )
+        ).annotate(
+            # bm25 : plus petit = plus pertinent ; titre 10x plus important
+            search_rank=RawSQL(
+                "(SELECT -bm25(api_content_fts, 10.0, 1.0) FROM api_content_fts "
+                "WHERE api_content_fts MATCH %s AND rowid = api_content.id)",
+                (fts_query,),
+                output_field=FloatField(),
+            )
+        )
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def search_messages(queryset, query):
+    """Filtre `queryset` (ChatMessage) sur `query` ; l'ordre reste celui de l'appelant"""
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == "postgresql":
+        tsquery = _postgres_tsquery(terms)
+        return queryset.filter(
+            RawSQL(
+                "api_chatmessage.search_vector @@ "
+                "(to_tsquery('christlumen_fr', %s) || to_tsquery('christlumen_en', %s))",
+                (tsquery, tsquery),
+                output_field=BooleanField(),
+            )
+        )
+
+    if connection.vendor == "sqlite":
+        return queryset.filter(
+            RawSQL(
+                "api_chatmessage.id IN "
+                "(SELECT k.message_id FROM api_chatmessage_fts f "
+                "JOIN api_chatmessage_fts_key k ON k.fts_rowid = f.rowid "
+                "WHERE api_chatmessage_fts MATCH %s)",
+                (_fts5_query(terms),),
+                output_field=BooleanField(),
+            )
+        )
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(message__icontains=term)
+    return queryset.filter(condition)
@@ -0,0 +1,170 @@
+# api/services/trending.py
+"""
+Score de tendance à décroissance exponentielle.
+
+Chaque événement d'engagement ajoute un poids (vue 1, like 2, unlike -2) au score
+du contenu ; le score est divisé par 2 toutes les TRENDING_HALF_LIFE_HOURS heures.
+
+Chaque ligne ContentScore garde (score, scored_at) : la valeur exacte au moment de la
+dernière mise à jour. Pour trier sans re-décroître toutes les lignes, on stocke
+    rank = log2(score) + (scored_at - EPOCH) / demi-vie
+qui est monotone par rapport au score décru à n'importe quel instant commun.
+La commande `decay_trending_scores` applique périodiquement la décroissance en
+masse (scores lisibles, purge des scores devenus négligeables).
+"""
+import datetime
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Content, ContentLike, ContentScore, ContentViewDaily
+from api.services import content_version
+
+VIEW_WEIGHT = 1.0
+LIKE_WEIGHT = 2.0
+
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+# En dessous, le score est considéré comme nul
+MIN_SCORE = 1e-3
+NULL_RANK = -1e9
+
+
+def half_life_seconds():
+    return getattr(settings, "TRENDING_HALF_LIFE_HOURS", 48) * 3600
+
+
+def decay(score, scored_at, now):
+    """Valeur à `now` d'un score valant `score` à `scored_at`"""
+    elapsed = (now - scored_at).total_seconds()
+    return score * 2 ** (-elapsed / half_life_seconds())
+
+
+def rank_for(score, at):
+    if score < MIN_SCORE:
+        return NULL_RANK
+    return math.log2(score) + (at - EPOCH).total_seconds() / half_life_seconds()
+
+
+def add_engagement(weights, now=None):
+    """
+    Ajoute des poids d'engagement : {content_id: poids}.
+    Un seul SELECT ... FOR UPDATE + bulk_update pour tout le lot.
+    """
+    weights = {cid: w for cid, w in weights.items() if w}
+    if not weights:
+        return
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        # S'assurer que les lignes existent (sûr entre processus), puis les verrouiller
+        churches = dict(Content.objects.filter(id__in=weights).values_list("id", "church_id"))
+        # Toujours dans le même ordre : deux lots concurrents ne s'interbloquent pas
+        ContentScore.objects.bulk_create(
+            [
+                ContentScore(content_id=content_id, church_id=church_id, score=0, scored_at=now, rank=NULL_RANK)
+                for content_id, church_id in sorted(churches.items())
+            ],
+            ignore_conflicts=True,
+        )
+        rows = list(ContentScore.objects.select_for_update().filter(content_id__in=churches).order_by("pk"))
+        for row in rows:
+            row.score = max(0.0, decay(row.score, row.scored_at, now) + weights[row.content_id])
+            row.scored_at = now
+            row.rank = rank_for(row.score, now)
+            row.church_id = churches[row.content_id]
+        ContentScore.objects.bulk_update(rows, ["score", "scored_at", "rank", "church"], batch_size=500)
+
+
+def record_like(content, liked=True):
+    add_engagement({content.id: LIKE_WEIGHT if liked else -LIKE_WEIGHT})
+
+
+def record_views(view_counts, now=None):
+    """view_counts : {content_id: nombre de vues}"""
+    add_engagement({cid: n * VIEW_WEIGHT for cid, n in view_counts.items()}, now=now)
+
+
+def decay_all(now=None, batch_size=1000):
+    """
+    Re-décroît tous les scores à `now` (le rang ne change pas) et supprime
+    ceux devenus négligeables. Retourne (mis à jour, supprimés).
+    """
+    now = now or timezone.now()
+    updated = 0
+    deleted = 0
+    last_pk = None
+    while True:
+        with transaction.atomic():
+            qs = ContentScore.objects.select_for_update().order_by("pk")
+            if last_pk is not None:
+                qs = qs.filter(pk__gt=last_pk)
+            rows = list(qs[:batch_size])
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+
+            stale = []
+            fresh = []
+            for row in rows:
+                row.score = decay(row.score, row.scored_at, now)
+                row.scored_at = now
+                (stale if row.score < MIN_SCORE else fresh).append(row)
+            ContentScore.objects.bulk_update(fresh, ["score", "scored_at"], batch_size=500)
+            ContentScore.objects.filter(pk__in=[row.pk for row in stale]).delete()
+            # Un score purgé sort du classement des tendances
+            content_version.bump(row.church_id for row in stale)
+            updated += len(fresh)
+            deleted += len(stale)
+    return updated, deleted
+
+
+def rebuild_all(now=None):
+    """Recalcule tous les scores depuis les rollups de vues (datés à midi) et les likes"""
+    now = now or timezone.now()
+    totals = defaultdict(float)
+
+    views = ContentViewDaily.objects.values_list("content_id", "day", "views")
+    for content_id, day, n in views.iterator():
+        at = timezone.make_aware(datetime.datetime.combine(day, datetime.time(12)))
+        totals[content_id] += decay(n * VIEW_WEIGHT, at, now)
+
+    likes = ContentLike.objects.values_list("content_id", "liked_at")
+    for content_id, liked_at in likes.iterator():
+        totals[content_id] += decay(LIKE_WEIGHT, liked_at, now)
+
+    churches = dict(Content.objects.filter(id__in=list(totals)).values_list("id", "church_id"))
+    with transaction.atomic():
+        ContentScore.objects.all().delete()
+        ContentScore.objects.bulk_create(
+            [
+                ContentScore(
+                    content_id=content_id,
+                    church_id=churches[content_id],
+                    score=score,
+                    scored_at=now,
+                    rank=rank_for(score, now),
+                )
+                for content_id, score in totals.items()
+                if score >= MIN_SCORE and content_id in churches
+            ],
+            batch_size=1000,
+        )
+        content_version.bump_all(now)
+    return ContentScore.objects.count()
+
+
+def top_contents(church_id, contents, limit=20):
+    """
+    Contenus de l'église parmi `contents` (queryset), triés par tendance décroissante.
+    Les instances viennent de `contents` : ses select_related() / only() s'appliquent.
+    """
+    top_ids = list(
+        ContentScore.objects.filter(church_id=church_id, content__in=contents.values("id"))
+        .order_by("-rank")
+        .values_list("content_id", flat=True)[:limit]
+    )
+    by_id = contents.in_bulk(top_ids)
+    return [by_id[content_id] for content_id in top_ids if content_id in by_id]
@@ -0,0 +1,250 @@
+# api/signals.py
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.models import (
+    Category, ChatMessage, ChatRoom, Church, ChurchAdmin, ChurchCollaboration, ChurchCommission, Content, ContentTag,
+    Playlist, PlaylistItem, Programme, ProgrammeMember, User,
+)
+from api.services import chat_membership, chat_read, chat_summary, content_version, feed, search
+
+
+# =====================================================
+# FIL D'ACTUALITÉ MATÉRIALISÉ
+# =====================================================
+
+@receiver(post_save, sender=Content)
+def fanout_content_to_feeds(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    feed.fanout_content(instance)
+
+
+@receiver(pre_save, sender=Church)
+def remember_church_parent(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_parent_id = None
+        return
+    instance._previous_parent_id = (
+        Church.objects.filter(pk=instance.pk).values_list("parent_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Church)
+def rebuild_feeds_on_parent_change(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_parent_id = getattr(instance, "_previous_parent_id", None)
+    if created:
+        if instance.parent_id:
+            # Nouvelle sous-église : elle voit les contenus de ses parents
+            transaction.on_commit(lambda: feed.rebuild_church_feed(instance.pk))
+    elif previous_parent_id != instance.parent_id:
+        transaction.on_commit(
+            lambda: feed.rebuild_tree_feeds(instance.pk, previous_parent_id, instance.parent_id)
+        )
+
+
+@receiver(pre_save, sender=ChurchCollaboration)
+def remember_collaboration_status(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_status = None
+        return
+    instance._previous_status = (
+        ChurchCollaboration.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+    )
+
+
+def _rebuild_collaboration_feeds(collaboration):
+    church_ids = (collaboration.initiator_church_id, collaboration.target_church_id)
+
+    def rebuild():
+        for church_id in church_ids:
+            feed.rebuild_church_feed(church_id)
+
+    # Après commit : lors d'une suppression en cascade, les contenus ont disparu
+    transaction.on_commit(rebuild)
+
+
+@receiver(post_save, sender=ChurchCollaboration)
+def rebuild_feeds_on_collaboration_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    was_accepted = getattr(instance, "_previous_status", None) == "ACCEPTED"
+    if was_accepted != (instance.status == "ACCEPTED"):
+        _rebuild_collaboration_feeds(instance)
+
+
+@receiver(post_delete, sender=ChurchCollaboration)
+def rebuild_feeds_on_collaboration_end(sender, instance, **kwargs):
+    if instance.status == "ACCEPTED":
+        _rebuild_collaboration_feeds(instance)
+
+
+# =====================================================
+# VERSIONS DE CONTENU (ETag / Last-Modified)
+# =====================================================
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+@receiver(post_save, sender=Playlist)
+@receiver(post_delete, sender=Playlist)
+def bump_church_content_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    content_version.bump([instance.church_id])
+
+
+@receiver(post_save, sender=ContentTag)
+@receiver(post_delete, sender=ContentTag)
+def bump_version_on_tag_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    content_version.bump_for_contents([instance.content_id])
+
+
+@receiver(post_save, sender=PlaylistItem)
+@receiver(post_delete, sender=PlaylistItem)
+def bump_version_on_playlist_item_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    content_version.bump(
+        Playlist.objects.filter(id=instance.playlist_id).values_list("church_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_cache_on_category_change(sender, raw=False, **kwargs):
+    # Les catégories sont imbriquées dans les contenus de toutes les églises
+    if raw:
+        return
+    content_version.invalidate_cache()
+
+
+@receiver(m2m_changed, sender=Programme.content_items.through)
+def touch_programme_on_content_items_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # L'ETag du programme repose sur updated_at (event_count en dépend)
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        programme_ids = [instance.pk]
+    elif reverse and action in ("post_add", "post_remove"):
+        programme_ids = pk_set
+    elif reverse and action == "pre_clear":
+        programme_ids = list(instance.programmes.values_list("pk", flat=True))
+    else:
+        return
+    Programme.objects.filter(pk__in=programme_ids).update(updated_at=timezone.now())
+
+
+# =====================================================
+# ACCÈS AUX SALONS DE CHAT (ChatRoomMembership)
+# =====================================================
+
+@receiver(pre_save, sender=User)
+def remember_current_church(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding or (update_fields is not None and "current_church" not in update_fields):
+        instance._previous_church_id = instance.current_church_id
+        return
+    instance._previous_church_id = (
+        User.objects.filter(pk=instance.pk).values_list("current_church_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def sync_chat_access_on_church_change(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_church_id = getattr(instance, "_previous_church_id", None)
+    if created:
+        chat_membership.sync_user(instance.pk, instance.current_church_id)
+    elif previous_church_id != instance.current_church_id:
+        chat_membership.sync_user(instance.pk, previous_church_id, add=False)
+        chat_membership.sync_user(instance.pk, instance.current_church_id)
+
+
+@receiver(post_save, sender=ChurchAdmin)
+@receiver(post_save, sender=ChurchCommission)
+def sync_chat_access_on_role_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    chat_membership.sync_user(instance.user_id, instance.church_id)
+
+
+@receiver(post_delete, sender=ChurchAdmin)
+@receiver(post_delete, sender=ChurchCommission)
+def sync_chat_access_on_role_end(sender, instance, **kwargs):
+    chat_membership.sync_user(instance.user_id, instance.church_id, add=False)
+
+
+def _programme_church_id(programme_id):
+    return Programme.objects.filter(pk=programme_id).values_list("church_id", flat=True).first()
+
+
+@receiver(post_save, sender=ProgrammeMember)
+def sync_chat_access_on_programme_join(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    chat_membership.sync_user(instance.user_id, _programme_church_id(instance.programme_id))
+
+
+@receiver(post_delete, sender=ProgrammeMember)
+def sync_chat_access_on_programme_leave(sender, instance, **kwargs):
+    chat_membership.sync_user(instance.user_id, _programme_church_id(instance.programme_id), add=False)
+
+
+@receiver(post_save, sender=ChatRoom)
+def sync_chat_access_on_room_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    chat_membership.sync_room(instance)
+
+
+@receiver(m2m_changed, sender=ChatRoom.members.through)
+def sync_chat_access_on_custom_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            chat_membership.sync_room(instance)
+        return
+    # Côté utilisateur (user.custom_chat_rooms) : églises des salons touchés
+    if action in ("post_add", "post_remove"):
+        church_ids = set(ChatRoom.objects.filter(pk__in=pk_set).values_list("church_id", flat=True))
+    elif action == "pre_clear":
+        instance._cleared_chat_church_ids = set(instance.custom_chat_rooms.values_list("church_id", flat=True))
+        return
+    elif action == "post_clear":
+        church_ids = getattr(instance, "_cleared_chat_church_ids", set())
+    else:
+        return
+    for church_id in church_ids:
+        chat_membership.sync_user(instance.pk, church_id)
+
+
+@receiver(post_save, sender=ChatMessage)
+def advance_sender_read_cursor(sender, instance, created, raw=False, **kwargs):
+    # L'auteur a lu son salon jusqu'à son message (les écritures groupées le font elles-mêmes)
+    if raw or not created:
+        return
+    chat_read.advance_for_senders([instance])
+
+
+@receiver(post_save, sender=ChatMessage)
+def update_room_summary(sender, instance, created, raw=False, **kwargs):
+    # Dernier message dénormalisé sur ChatRoom (suppression : vue message_detail)
+    if raw:
+        return
+    if created:
+        chat_summary.record_messages([instance])
+    else:
+        chat_summary.message_edited(instance)
+
+
+# =====================================================
+# RECHERCHE PLEIN TEXTE
+# =====================================================
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using="default", **kwargs):
+    if sender.name == "api":
+        search.ensure_sqlite_triggers(using)
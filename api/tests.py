@@ -1,3 +1,1265 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 
-# Create your tests here.
+from api.models import Category, Church, ChurchFeedEntry, Content, ContentTag, Playlist, PlaylistItem, Tag
+from api.serializers import ContentDetailSerializer, ContentListSerializer, PlaylistSerializer
+
+
+class TagLoaderQueryCountTests(TestCase):
+    """Les tags d'une page de contenus sont chargés en une seule requête, quelle que soit sa taille"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.church = Church.objects.create(title="Église test")
+        tags = [Tag.objects.create(name=f"tag{i}", slug=f"tag{i}") for i in range(3)]
+        cls.contents = []
+        for i in range(12):
+            content = Content.objects.create(
+                church=cls.church, type="ARTICLE", title=f"Contenu {i}", published=True
+            )
+            ContentTag.objects.create(content=content, tag=tags[i % 3])
+            ContentTag.objects.create(content=content, tag=tags[(i + 1) % 3])
+            cls.contents.append(content)
+
+        cls.playlist = Playlist.objects.create(church=cls.church, title="Playlist")
+        for position, content in enumerate(cls.contents):
+            PlaylistItem.objects.create(playlist=cls.playlist, content=content, position=position)
+
+    def _contents(self, size):
+        return list(Content.objects.select_related("category").filter(id__in=[c.id for c in self.contents[:size]]))
+
+    def test_list_serializer_tags_constant_queries(self):
+        for size in (2, 12):
+            contents = self._contents(size)
+            with self.assertNumQueries(1):
+                data = ContentListSerializer(contents, many=True).data
+            self.assertEqual(len(data), size)
+            self.assertTrue(all(len(item["tags"]) == 2 for item in data))
+            self.assertEqual(set(data[0]["tags"][0]), {"tag__id", "tag__name", "tag__slug"})
+
+    def test_detail_serializer_tags_constant_queries(self):
+        contents = list(Content.objects.select_related("category", "church", "created_by").filter(
+            id__in=[c.id for c in self.contents]
+        ))
+        with self.assertNumQueries(1):
+            data = ContentDetailSerializer(contents, many=True).data
+        self.assertTrue(all(len(item["tags"]) == 2 for item in data))
+
+    def test_playlist_serializer_payload_unchanged(self):
+        playlists = Playlist.objects.select_related("church").prefetch_related("playlistitem_set__content")
+        # playlists + items + contents : les contenus imbriqués n'exposent pas de tags
+        with self.assertNumQueries(3):
+            data = PlaylistSerializer(playlists, many=True).data
+        items = data[0]["items"]
+        self.assertEqual(len(items), 12)
+        self.assertEqual(set(items[0]["content"]), {"id", "title", "slug", "type", "cover_image_url"})
+
+
+@override_settings(FEED_CACHE_ENABLED=True)
+class PublicFeedCacheTests(TestCase):
+    """Le fil public est servi depuis le cache jusqu'à la prochaine modification de contenu"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.church = Church.objects.create(title="Église fil")
+        self.url = f"/api/church/{self.church.id}/public-feed/"
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                Content.objects.create(
+                    church=self.church, type="ARTICLE", title=f"Public {i}", published=True, is_public=True
+                )
+
+    def test_second_hit_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        # Seule requête : le mode maintenance (middleware)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(second.json(), first.json())
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_content_save_invalidates(self):
+        first = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Content.objects.create(
+                church=self.church, type="ARTICLE", title="Nouveau", published=True, is_public=True
+            )
+        second = self.client.get(self.url)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.json()["count"], first.json()["count"] + 1)
+
+    @override_settings(FEED_CACHE_ENABLED=False)
+    def test_without_shared_cache(self):
+        from django.core.cache import cache
+
+        first = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        # ETag tiré de la base : un jeton de cache local perdu n'y change rien
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Content.objects.create(
+                church=self.church, type="ARTICLE", title="Nouveau", published=True, is_public=True
+            )
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["count"], first.json()["count"] + 1)
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= ne lit que les colonnes demandées"""
+
+    def setUp(self):
+        self.church = Church.objects.create(title="Église champs")
+        for i in range(3):
+            Content.objects.create(
+                church=self.church, type="ARTICLE", title=f"Champs {i}", description="x" * 500,
+                published=True, is_public=True,
+            )
+        self.url = f"/api/church/{self.church.id}/public-feed/"
+
+    def test_projection_skips_unrequested_columns(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "id,title"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({tuple(item) for item in response.json()["results"]}, {("id", "title")})
+        content_queries = [q["sql"] for q in queries.captured_queries if 'FROM "api_content"' in q["sql"]]
+        self.assertTrue(content_queries)
+        self.assertFalse(any('"api_content"."description"' in sql for sql in content_queries))
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(self.url, {"fields": "id,nope"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ContentImportTests(TestCase):
+    """L'import en masse résout tags et catégories par lot, quel que soit le nombre de lignes"""
+
+    def test_import_is_set_based_and_reports_row_errors(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from api.services import content_import
+
+        church = Church.objects.create(title="Église import")
+        Category.objects.create(name="Prédications", slug="predications")
+        Tag.objects.create(name="existant", slug="existant")
+        rows = [
+            (i + 1, {"type": "AUDIO", "title": f"Import {i}", "category": "predications",
+                     "tags": f"existant, serie-{i % 5}"})
+            for i in range(300)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            result = content_import.import_contents(church, rows)
+        self.assertEqual(result, {"created": 300, "errors": []})
+        # Hors INSERT (découpés selon la limite de paramètres du moteur) : indépendant du nombre de lignes
+        lookups = [q["sql"] for q in queries.captured_queries if not q["sql"].startswith("INSERT")]
+        self.assertLess(len(lookups), 15)
+        self.assertEqual(ContentTag.objects.filter(content__church=church).count(), 600)
+        self.assertEqual(ChurchFeedEntry.objects.filter(church=church).count(), 300)
+        self.assertEqual(Tag.objects.count(), 6)
+
+        result = content_import.import_contents(
+            church, [(1, {"type": "AUDIO", "title": "x", "category": "inconnue"}), (2, "JSON invalide")]
+        )
+        self.assertEqual(result["created"], 0)
+        self.assertEqual(sorted(error["row"] for error in result["errors"]), [1, 2])
+
+
+class ContentStatsRollupTests(TestCase):
+    """Les rollups suivent les contenus et seules les églises modifiées sont recalculées"""
+
+    def test_refresh_only_dirty_churches(self):
+        from api.models import ContentStatRollup
+        from api.services import content_stats
+
+        first = Church.objects.create(title="Église stats 1")
+        second = Church.objects.create(title="Église stats 2")
+        for church in (first, second):
+            Content.objects.create(church=church, type="AUDIO", title="Audio", likes_count=3)
+        self.assertEqual(content_stats.refresh_dirty(), 2)
+        self.assertEqual(content_stats.refresh_dirty(), 0)
+
+        Content.objects.create(church=first, type="VIDEO", title="Vidéo")
+        self.assertEqual(content_stats.refresh_dirty(), 1)
+
+        rows = {
+            (row.church_id, row.type): (row.contents, row.likes)
+            for row in ContentStatRollup.objects.all()
+        }
+        self.assertEqual(rows[(first.id, "VIDEO")], (1, 0))
+        self.assertEqual(rows[(None, "AUDIO")], (2, 6))
+
+
+class RetentionTests(TestCase):
+    """Les lignes expirées partent dans un fichier compressé et laissent un agrégat"""
+
+    def test_archive_expired_views(self):
+        import gzip
+        import tempfile
+        from datetime import timedelta
+
+        from django.test import override_settings
+        from django.utils import timezone
+
+        from api.models import ArchiveBatch, ArchivedDailyCount, ContentView, User
+        from api.services import retention
+
+        church = Church.objects.create(title="Église rétention")
+        content = Content.objects.create(church=church, type="ARTICLE", title="Vu")
+        user = User.objects.create(phone_number="+237600000001", name="Lecteur")
+        now = timezone.now()
+        ContentView.objects.bulk_create(
+            [ContentView(user=user, content=content, viewed_at=now - timedelta(days=400)) for _ in range(5)]
+            + [ContentView(user=user, content=content, viewed_at=now)]
+        )
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            RETENTION_ARCHIVE_DIR=directory, RETENTION_DAYS={"content_views": 180}
+        ):
+            self.assertEqual(retention.run(chunk_size=2, now=now), {"content_views": 5})
+            self.assertEqual(ContentView.objects.count(), 1)
+            self.assertEqual(
+                ArchivedDailyCount.objects.get(policy="content_views", key=str(content.id)).rows, 5
+            )
+            lines = sum(len(gzip.open(batch.path, "rt").readlines()) for batch in ArchiveBatch.objects.all())
+            self.assertEqual(lines, 5)
+
+
+class ChatRoomMembershipTests(TestCase):
+    """Les accès aux salons suivent les changements d'église, de rôle et de membres"""
+
+    def test_access_follows_sources(self):
+        from api.models import ChatRoom, ChatRoomMembership, ChurchAdmin, User
+
+        church = Church.objects.create(title="Église chat")
+        other = Church.objects.create(title="Autre église")
+        member = User.objects.create(phone_number="+237600000010", name="Membre", current_church=church)
+        owner = User.objects.create(phone_number="+237600000011", name="Propriétaire")
+        ChurchAdmin.objects.create(church=church, user=owner, role="OWNER")
+        general = ChatRoom.objects.create(church=church, room_type="CHURCH", name="Général")
+        custom = ChatRoom.objects.create(church=church, room_type="CUSTOM", name="Équipe")
+
+        self.assertTrue(general.user_has_access(member))
+        self.assertFalse(custom.user_has_access(member))
+        self.assertTrue(custom.user_has_access(owner))
+
+        custom.members.add(member)
+        self.assertTrue(custom.user_has_access(member))
+
+        member.current_church = other
+        member.save()
+        self.assertFalse(general.user_has_access(member))
+        self.assertTrue(custom.user_has_access(member))
+
+        ChurchAdmin.objects.filter(user=owner).delete()
+        self.assertFalse(custom.user_has_access(owner))
+        self.assertEqual(ChatRoomMembership.objects.filter(room=custom).count(), 1)
+        with self.assertNumQueries(1):
+            self.assertTrue(custom.user_has_access(member))
+
+
+class ChatHistoryTests(TestCase):
+    """Historique par curseurs et liste de salons sans l'historique"""
+
+    def test_cursors_and_lean_room_list(self):
+        from rest_framework.test import APIClient
+
+        from api.models import ChatMessage, ChatRoom, User
+
+        church = Church.objects.create(title="Église historique")
+        user = User.objects.create(phone_number="+237600000020", name="Lecteur", current_church=church)
+        room = ChatRoom.objects.create(church=church, room_type="CHURCH", name="Général")
+        messages = [ChatMessage.objects.create(room=room, user=user, message=f"m{i}") for i in range(7)]
+
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(user)
+        url = f"/api/chat/room/{room.id}/history/"
+
+        latest = client.get(url, {"limit": 3}).json()
+        self.assertEqual([m["message"] for m in latest["results"]], ["m4", "m5", "m6"])
+        self.assertTrue(latest["has_more"])
+        older = client.get(url, {"limit": 3, "before": latest["before_cursor"]}).json()
+        self.assertEqual([m["message"] for m in older["results"]], ["m1", "m2", "m3"])
+        newer = client.get(url, {"after": str(messages[4].id)}).json()
+        self.assertEqual([m["message"] for m in newer["results"]], ["m5", "m6"])
+        self.assertFalse(newer["has_more"])
+        self.assertEqual(client.get(url, {"before": "nope"}).status_code, 400)
+
+        rooms = client.get("/api/chat/rooms/mine/").json()
+        self.assertEqual(rooms[0]["last_message"]["message"], "m6")
+        self.assertNotIn("messages", rooms[0])
+
+
+class ChatWriterTests(TransactionTestCase):
+    """Les messages WebSocket sont écrits par lots, avec l'id et la date diffusés"""
+    # database_sync_to_async ferme les connexions hors autocommit : pas de transaction de test
+
+    def test_batches_and_flush(self):
+        import asyncio
+        import uuid
+
+        from asgiref.sync import async_to_sync
+        from django.utils import timezone
+
+        from api.models import ChatMessage, ChatRoom, User
+        from api.services.chat_writer import MessageWriter
+
+        church = Church.objects.create(title="Église direct")
+        user = User.objects.create(phone_number="+237600000030", name="Auteur", current_church=church)
+        room = ChatRoom.objects.create(church=church, room_type="CHURCH", name="Direct")
+        sent_at = timezone.now()
+        writer = MessageWriter(batch_size=2, flush_ms=1000)
+
+        async def burst():
+            for i in range(3):
+                writer.add(ChatMessage(
+                    id=uuid.uuid4(), room_id=room.id, user_id=user.id, message=f"m{i}", created_at=sent_at
+                ))
+            await asyncio.sleep(0)
+            await writer.flush()
+
+        async_to_sync(burst)()
+        self.assertEqual(ChatMessage.objects.filter(room=room, created_at=sent_at).count(), 3)
+
+
+class ChatReadCursorTests(TestCase):
+    """Curseurs de lecture : badges en une requête, ses propres messages ne comptent pas"""
+
+    def test_unread_counts(self):
+        from rest_framework.test import APIClient
+
+        from api.models import ChatMessage, ChatRoom, User
+
+        church = Church.objects.create(title="Église badges")
+        reader = User.objects.create(phone_number="+237600000040", name="Lecteur", current_church=church)
+        writer = User.objects.create(phone_number="+237600000041", name="Auteur", current_church=church)
+        rooms = [ChatRoom.objects.create(church=church, room_type="CHURCH", name=f"Salon {i}") for i in range(3)]
+        for room in rooms:
+            for i in range(2):
+                ChatMessage.objects.create(room=room, user=writer, message=f"{room.name} {i}")
+        mine = ChatMessage.objects.create(room=rooms[0], user=reader, message="Réponse")
+        first = ChatMessage.objects.filter(room=rooms[1]).order_by("created_at").first()
+
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(reader)
+        # Badges + mode maintenance (middleware)
+        with self.assertNumQueries(2):
+            self.assertEqual(client.get("/api/chat/rooms/unread/").json()["total"], 4)
+        response = client.post(f"/api/chat/room/{rooms[1].id}/read/", {"message_id": str(first.id)}, format="json")
+        self.assertEqual(response.json()["unread_count"], 1)
+        client.post(f"/api/chat/room/{rooms[2].id}/read/")
+
+        counts = client.get("/api/chat/rooms/unread/").json()["rooms"]
+        self.assertEqual(counts, {str(rooms[0].id): 0, str(rooms[1].id): 1, str(rooms[2].id): 0})
+        listed = {room["id"]: room for room in client.get("/api/chat/rooms/mine/").json()}
+        self.assertEqual(listed[str(rooms[1].id)]["unread_count"], 1)
+        self.assertEqual(listed[str(rooms[0].id)]["members_count"], 2)
+        filtered = client.get("/api/chat/rooms/mine/", {"church_id": str(church.id)}).json()
+        self.assertEqual(len(filtered), 3)
+        self.assertEqual(client.get("/api/chat/rooms/mine/", {"church_id": "abc"}).status_code, 400)
+        self.assertEqual(str(rooms[0].memberships.get(user=reader).last_read_message_id), str(mine.id))
+
+
+class ChatPresenceTests(TestCase):
+    """Deux registres (deux processus) partagent présence et saisie via le channel layer"""
+
+    def test_presence_and_coalesced_typing(self):
+        import asyncio
+
+        from api.services.chat_presence import PresenceRegistry
+
+        class FakeUser:
+            def __init__(self, user_id, name):
+                self.id = user_id
+                self.name = name
+
+        class FakeConsumer:
+            def __init__(self, user):
+                self.user = user
+                self.frames = []
+
+            async def send_presence(self, online):
+                self.frames.append(("presence", sorted(online.values())))
+
+            async def send_typing(self, users):
+                self.frames.append(("typing", [user["user_name"] for user in users]))
+
+        async def scenario():
+            first, second = PresenceRegistry(), PresenceRegistry()
+            ann, bob = FakeConsumer(FakeUser(1, "Ann")), FakeConsumer(FakeUser(2, "Bob"))
+            await first.join("room", ann)
+            await second.join("room", bob)
+            await asyncio.sleep(1.2)
+            for _ in range(10):
+                second.typing("room", bob.user)
+            await asyncio.sleep(0.5)
+            await second.leave("room", bob)
+            await asyncio.sleep(0.1)
+            return ann.frames, bob.frames
+
+        ann_frames, bob_frames = asyncio.run(scenario())
+        self.assertIn(("presence", ["Ann", "Bob"]), ann_frames)
+        self.assertIn(("presence", ["Ann", "Bob"]), bob_frames)
+        self.assertEqual([frame for frame in ann_frames if frame[0] == "typing"], [("typing", ["Bob"])])
+        self.assertEqual(ann_frames[-1], ("presence", ["Ann"]))
+
+
+class ChatOutboundQueueTests(TestCase):
+    """Un client bloqué ne retient qu'une file bornée ; trames jetées ou déconnexion"""
+
+    def test_slow_consumer_policies(self):
+        import asyncio
+
+        from api.services import chat_outbound
+
+        class StalledConsumer:
+            def __init__(self):
+                self.closed_with = None
+
+            async def send(self, text_data):
+                await asyncio.Event().wait()
+
+            async def close(self, code=None):
+                self.closed_with = code
+
+        async def scenario(policy):
+            consumer = StalledConsumer()
+            queue = chat_outbound.OutboundQueue(consumer, size=3, policy=policy)
+            queue.start()
+            dropped_before = chat_outbound.metrics.dropped
+            for i in range(10):
+                queue.put({"type": "message", "n": i})
+                await asyncio.sleep(0)
+            depth = queue.depth
+            dropped = chat_outbound.metrics.dropped - dropped_before
+            queue.stop()
+            await asyncio.sleep(0)
+            return depth, dropped, consumer.closed_with
+
+        depth, dropped, closed_with = asyncio.run(scenario("drop_oldest"))
+        self.assertEqual((depth, dropped, closed_with), (3, 6, None))
+        with self.assertLogs("api.services.chat_outbound", "WARNING") as logs:
+            depth, _, closed_with = asyncio.run(scenario("disconnect"))
+        self.assertEqual((depth, closed_with), (0, chat_outbound.SLOW_CONSUMER_CLOSE_CODE))
+        self.assertEqual(
+            logs.output,
+            ["WARNING:api.services.chat_outbound:Client de chat trop lent (3 trames en attente), déconnexion"],
+        )
+
+    def test_daphne_transport_backpressure(self):
+        import asyncio
+        import functools
+
+        from api.services import chat_outbound
+
+        class Transport:
+            """Comme un transport TCP Twisted : send écrit dans le tampon sans jamais attendre"""
+            bufferSize = 10
+            disconnected = False
+
+            def __init__(self):
+                self.dataBuffer = b""
+                self.offset = 0
+                self._tempDataLen = 0
+
+        class Protocol:
+            def __init__(self):
+                self.transport = Transport()
+
+        async def handle_reply(protocol, message):
+            protocol.transport._tempDataLen += len(message["text"])
+
+        class SessionWrapper:
+            def __init__(self, send):
+                self.real_send = send
+
+            async def send(self, message):
+                await self.real_send(message)
+
+        class DaphneConsumer:
+            def __init__(self, protocol):
+                self.base_send = SessionWrapper(functools.partial(handle_reply, protocol)).send
+
+            async def send(self, text_data):
+                await self.base_send({"type": "websocket.send", "text": text_data})
+
+        async def scenario():
+            protocol = Protocol()
+            queue = chat_outbound.OutboundQueue(DaphneConsumer(protocol), size=3, policy="drop_new")
+            queue.start()
+            for i in range(10):
+                queue.put({"n": i})
+                await asyncio.sleep(0)
+            stalled = (protocol.transport._tempDataLen, queue.depth)
+            # Socket vidée par Twisted : la file reprend
+            protocol.transport._tempDataLen = 0
+            protocol.transport.bufferSize = 1000
+            await asyncio.sleep(chat_outbound.SERVER_BUFFER_POLL * 3)
+            drained = queue.depth
+            queue.stop()
+            return stalled, drained
+
+        (buffered, depth), drained = asyncio.run(scenario())
+        # Deux trames de 8 octets passent avant que le tampon (10 octets) ne déborde,
+        # la file bornée retient le reste au lieu du serveur
+        self.assertEqual((buffered, depth, drained), (16, 3, 0))
+
+
+class ChatSearchTests(TestCase):
+    """Recherche plein texte des messages, limitée aux salons accessibles"""
+
+    def test_search_scoped_by_membership(self):
+        from rest_framework.test import APIClient
+
+        from api.models import ChatMessage, ChatRoom, User
+
+        church = Church.objects.create(title="Église recherche")
+        member = User.objects.create(phone_number="+237600000050", name="Membre", current_church=church)
+        general = ChatRoom.objects.create(church=church, room_type="CHURCH", name="Général")
+        private = ChatRoom.objects.create(church=church, room_type="CUSTOM", name="Privé")
+        ChatMessage.objects.create(room=general, user=member, message="Réunion de prière jeudi")
+        ChatMessage.objects.create(room=general, user=member, message="Chorale samedi")
+        ChatMessage.objects.create(room=private, user=member, message="Prière confidentielle")
+
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(member)
+        results = client.get("/api/chat/search/", {"q": "priere"}).json()["results"]
+        self.assertEqual([r["message"] for r in results], ["Réunion de prière jeudi"])
+        self.assertEqual(client.get("/api/chat/search/", {"q": "pri", "room_id": str(private.id)}).status_code, 403)
+        self.assertEqual(client.get("/api/chat/search/", {"q": "pri", "room_id": "abc"}).status_code, 400)
+        self.assertEqual(client.get("/api/chat/search/", {"q": "pri", "church_id": "abc"}).status_code, 400)
+
+    def test_sqlite_index_survives_rowid_renumbering(self):
+        from django.db import connection
+
+        from api.models import ChatMessage, ChatRoom, User
+        from api.services import search
+
+        if connection.vendor != "sqlite":
+            self.skipTest("index FTS5 propre à SQLite")
+        church = Church.objects.create(title="Église vacuum")
+        member = User.objects.create(phone_number="+237600000051", name="Membre", current_church=church)
+        room = ChatRoom.objects.create(church=church, room_type="CHURCH", name="Général")
+        kept = ChatMessage.objects.create(room=room, user=member, message="Veillée de prière")
+        edited = ChatMessage.objects.create(room=room, user=member, message="Chorale")
+        removed = ChatMessage.objects.create(room=room, user=member, message="Prière annulée")
+
+        def found(query):
+            return set(search.search_messages(ChatMessage.objects.all(), query).values_list("id", flat=True))
+
+        # Ce que VACUUM peut faire aux tables sans INTEGER PRIMARY KEY
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE api_chatmessage SET rowid = rowid + 1000")
+        edited.message = "Prière du soir"
+        edited.save()
+        removed.delete()
+        added = ChatMessage.objects.create(room=room, user=member, message="Nouvelle prière")
+        self.assertEqual(found("priere"), {kept.id, edited.id, added.id})
+        self.assertEqual(found("annulee"), set())
+
+        # Triggers supprimés par une reconstruction de table : resynchronisés après migrate
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER api_chatmessage_fts_insert")
+        late = ChatMessage.objects.create(room=room, user=member, message="Prière tardive")
+        self.assertNotIn(late.id, found("tardive"))
+        search.ensure_sqlite_triggers()
+        self.assertEqual(found("priere"), {kept.id, edited.id, added.id, late.id})
+
+
+class ChatRoomSummaryTests(TestCase):
+    """Résumé dénormalisé des salons : liste en une requête, membres paginés à part"""
+
+    def test_summary_maintained(self):
+        from rest_framework.test import APIClient
+
+        from api.models import ChatMessage, ChatRoom, User
+        from api.services.chat_writer import MessageWriter
+
+        church = Church.objects.create(title="Église résumés")
+        users = [
+            User.objects.create(phone_number=f"+23760000006{i}", name=f"Membre {i}", current_church=church)
+            for i in range(3)
+        ]
+        rooms = [ChatRoom.objects.create(church=church, room_type="CHURCH", name=f"Salon {i}") for i in range(3)]
+        rooms[0].refresh_from_db()
+        self.assertEqual(rooms[0].members_count, 3)
+
+        first = ChatMessage.objects.create(room=rooms[0], user=users[0], message="Bonjour")
+        last = ChatMessage.objects.create(room=rooms[0], user=users[1], message="  Bonsoir\n à tous  ")
+        # Lot WebSocket en retard : ne fait pas reculer le résumé
+        late = ChatMessage(room=rooms[0], user=users[2], message="Ancien", created_at=first.created_at)
+        MessageWriter._write([late, ChatMessage(room=rooms[1], user=users[2], message="x" * 300)])
+        rooms[0].refresh_from_db()
+        self.assertEqual((rooms[0].last_message_id, rooms[0].last_message_preview), (last.id, "Bonsoir à tous"))
+        rooms[1].refresh_from_db()
+        self.assertEqual(len(rooms[1].last_message_preview), 200)
+
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(users[0])
+        # Liste + mode maintenance (middleware)
+        with self.assertNumQueries(2):
+            listed = client.get("/api/chat/rooms/mine/").json()
+        self.assertEqual([room["id"] for room in listed][:2], [str(rooms[1].id), str(rooms[0].id)])
+        self.assertEqual(listed[1]["last_message"]["user_name"], "Membre 1")
+
+        client.force_authenticate(users[1])
+        client.delete(f"/api/chat/room/{rooms[0].id}/messages/{last.id}/")
+        rooms[0].refresh_from_db()
+        self.assertEqual(rooms[0].last_message_id, max(first.id, late.id))
+
+        users[2].current_church = None
+        users[2].save(update_fields=["current_church"])
+        rooms[0].refresh_from_db()
+        self.assertEqual(rooms[0].members_count, 2)
+
+        page = client.get(f"/api/chat/room/{rooms[0].id}/members/", {"limit": 1}).json()
+        self.assertEqual((page["count"], len(page["results"])), (2, 1))
+        rest = client.get(f"/api/chat/room/{rooms[0].id}/members/", {"cursor": page["next_cursor"]}).json()
+        self.assertEqual(len(rest["results"]), 1)
+        self.assertNotIn("members_list", client.get(f"/api/chat/room/{rooms[0].id}/").json())
+
+    def test_stale_room_save_keeps_summary(self):
+        from api.models import ChatMessage, ChatRoom, User
+
+        church = Church.objects.create(title="Église résumé figé")
+        user = User.objects.create(phone_number="+237600000065", name="Membre", current_church=church)
+        room = ChatRoom.objects.create(church=church, room_type="CHURCH", name="Général")
+        stale = ChatRoom.objects.get(pk=room.pk)
+        message = ChatMessage.objects.create(room=room, user=user, message="Bonjour")
+
+        stale.name = "Renommé"
+        stale.save()
+        room.refresh_from_db()
+        self.assertEqual(room.name, "Renommé")
+        self.assertEqual((room.last_message_id, room.last_message_preview), (message.id, "Bonjour"))
+        self.assertEqual(room.members_count, 1)
+
+
+class PlaylistOrderTests(TestCase):
+    """Positions espacées : déplacements en tête, en fin et après épuisement de l'écart"""
+
+    def setUp(self):
+        church = Church.objects.create(title="Église playlist")
+        self.playlist = Playlist.objects.create(church=church, title="Ordre")
+        self.items = [
+            PlaylistItem.objects.create(
+                playlist=self.playlist,
+                content=Content.objects.create(church=church, type="ARTICLE", title=f"Contenu {i}"),
+                position=i * 1024,
+            )
+            for i in range(3)
+        ]
+
+    def _order(self):
+        return list(PlaylistItem.objects.filter(playlist=self.playlist).order_by("position", "id"))
+
+    def test_move_to_top_and_end(self):
+        from api.services import playlist_order
+
+        first, second, third = self.items
+        # Premier élément en position 0 : pas de place devant, renumérotation
+        playlist_order.move_item(third, 0)
+        self.assertEqual(self._order(), [third, first, second])
+        self.assertTrue(all(item.position is not None for item in self._order()))
+
+        playlist_order.move_item(third, 10)
+        self.assertEqual(self._order(), [first, second, third])
+        playlist_order.move_item(second, 0)
+        self.assertEqual(self._order(), [second, first, third])
+
+    def test_gap_exhausted(self):
+        from api.services import playlist_order
+
+        first = self.items[0]
+        # Insertions répétées en tête puis au même endroit : l'écart s'épuise, l'ordre tient
+        for _ in range(15):
+            playlist_order.move_item(self.items[2], 0)
+            playlist_order.move_item(self.items[2], 1)
+        for _ in range(15):
+            playlist_order.move_item(self.items[1], 0)
+            playlist_order.move_item(self.items[0], 0)
+        order = self._order()
+        self.assertEqual(order[0], first)
+        self.assertEqual(len({item.position for item in order}), 3)
+
+
+class KeysetPaginatorTests(TestCase):
+    """Curseurs : parcours complet sans doublon malgré les égalités, curseurs invalides en 400"""
+
+    def setUp(self):
+        from django.utils import timezone
+
+        church = Church.objects.create(title="Église pagination")
+        now = timezone.now()
+        for i in range(7):
+            Content.objects.create(church=church, type="ARTICLE", title=f"Contenu {i}")
+        # Égalités sur created_at : l'id départage
+        Content.objects.update(created_at=now)
+        Content.objects.filter(title__in=["Contenu 0", "Contenu 1"]).update(
+            created_at=now - timezone.timedelta(hours=1)
+        )
+
+    def _page(self, params):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from api.pagination import KeysetPaginator
+
+        paginator = KeysetPaginator(ordering=("-created_at", "-id"))
+        request = Request(APIRequestFactory().get("/", params))
+        return paginator, paginator.paginate_queryset(Content.objects.all(), request)
+
+    def test_round_trip(self):
+        seen = []
+        params = {"limit": 2}
+        while True:
+            paginator, rows = self._page(params)
+            seen.extend(row.id for row in rows)
+            if not paginator.next_cursor:
+                break
+            params = {"limit": 2, "cursor": paginator.next_cursor}
+        expected = list(Content.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursors(self):
+        import base64
+        import json
+
+        from rest_framework.exceptions import ParseError
+
+        def encode(values):
+            return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+        for cursor in ("!!!", encode({"a": 1}), encode([1]), encode(["foo", "bar"]),
+                       encode([{"a": 1}, 2]), encode([None, None])):
+            with self.assertRaises(ParseError):
+                self._page({"cursor": cursor})
+
+
+CHANNEL_LAYER_CHILD = """
+import asyncio, json, os, sys
+import django
+django.setup()
+from api.channel_layers import PostgresChannelLayer
+
+async def main():
+    layer = PostgresChannelLayer(dsn=os.environ["CHANNEL_LAYER_TEST_DSN"])
+    channel = await layer.new_channel()
+    await layer.group_add("chat_test", channel)
+    print("ready " + channel, flush=True)
+    for _ in range(3):
+        message = await asyncio.wait_for(layer.receive(channel), 10)
+        print(json.dumps(message), flush=True)
+    await layer.close()
+
+asyncio.run(main())
+"""
+
+
+class PostgresChannelLayerTests(TestCase):
+    """Deux processus réels : group_send, send vers un canal distant et gros message (table de relais)"""
+
+    def test_two_processes(self):
+        import json
+        import os
+        import subprocess
+        import sys
+
+        from asgiref.sync import async_to_sync
+        from django.conf import settings
+        from django.db import connection
+
+        if connection.vendor != "postgresql":
+            self.skipTest("PostgreSQL requis")
+        import psycopg2.extensions
+
+        from api.channel_layers import PostgresChannelLayer
+
+        params = {k: v for k, v in connection.get_connection_params().items() if isinstance(v, (str, int))}
+        dsn = psycopg2.extensions.make_dsn(**params)
+        child = subprocess.Popen(
+            [sys.executable, "-c", CHANNEL_LAYER_CHILD],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "CHANNEL_LAYER_TEST_DSN": dsn},
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            ready = child.stdout.readline().split()
+            self.assertEqual(ready[0], "ready")
+            layer = PostgresChannelLayer(dsn=dsn)
+            big = "x" * 20000
+
+            async def send_all():
+                await layer.group_send("chat_test", {"type": "chat.message", "n": 1})
+                await layer.send(ready[1], {"type": "chat.direct", "n": 2})
+                await layer.group_send("chat_test", {"type": "chat.message", "n": 3, "body": big})
+                await layer.close()
+
+            async_to_sync(send_all)()
+            received = [json.loads(child.stdout.readline()) for _ in range(3)]
+            self.assertEqual([m["n"] for m in received], [1, 2, 3])
+            self.assertEqual(received[2]["body"], big)
+            self.assertEqual(child.wait(timeout=10), 0)
+        finally:
+            child.kill()
+            child.stdout.close()
+
+
+class RecommenderTests(TestCase):
+    """Voisins item-à-item (matrices creuses) et repli sur les populaires"""
+
+    def setUp(self):
+        from api.models import ContentView, User
+
+        self.church = Church.objects.create(title="Église reco")
+        self.contents = [
+            Content.objects.create(church=self.church, type="ARTICLE", title=f"Reco {i}", published=True, is_public=True)
+            for i in range(4)
+        ]
+        tag = Tag.objects.create(name="priere", slug="priere")
+        ContentTag.objects.create(content=self.contents[0], tag=tag)
+        ContentTag.objects.create(content=self.contents[3], tag=tag)
+        self.users = [
+            User.objects.create(phone_number=f"+23760000008{i}", name=f"Lecteur {i}", current_church=self.church)
+            for i in range(2)
+        ]
+        for user, seen in ((self.users[0], (0, 1)), (self.users[1], (0, 1, 2))):
+            for index in seen:
+                ContentView.objects.create(user=user, content=self.contents[index])
+
+    def test_neighbors(self):
+        from django.db.models import F
+
+        from api.models import ContentNeighbor
+        from api.services import recommender
+
+        recommender.build_church_model(self.church.id)
+        c0, c1, c2, c3 = self.contents
+        scores = dict(ContentNeighbor.objects.filter(content=c0).values_list("neighbor_id", "score"))
+        self.assertEqual(set(scores), {c1.id, c2.id, c3.id})
+        self.assertAlmostEqual(scores[c1.id], 0.5, places=5)
+        self.assertAlmostEqual(scores[c3.id], 0.5, places=5)
+        self.assertAlmostEqual(scores[c2.id], 0.5 / 2 ** 0.5, places=5)
+        self.assertFalse(ContentNeighbor.objects.filter(content_id=F("neighbor_id")).exists())
+
+    def test_fallback_when_candidates_filtered(self):
+        from rest_framework.test import APIClient
+
+        from api.services import recommender
+
+        recommender.build_church_model(self.church.id)
+        # Voisins des contenus vus tous dépubliés : on ne renvoie pas une liste vide
+        Content.objects.filter(id__in=[c.id for c in self.contents[1:]]).update(published=False)
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(self.users[1])
+        response = client.get(f"/api/recommend/{self.church.id}/")
+        self.assertEqual([item["id"] for item in response.json()], [self.contents[0].id])
+
+
+class TrendingScoreTests(TestCase):
+    """Score à décroissance exponentielle : un rang stocké reste comparable dans le temps"""
+
+    def setUp(self):
+        self.church = Church.objects.create(title="Église tendances")
+        self.contents = [
+            Content.objects.create(church=self.church, type="ARTICLE", title=f"Tendance {i}", published=True)
+            for i in range(3)
+        ]
+
+    def test_decay_and_rank(self):
+        import datetime
+
+        from api.services import trending
+
+        t0 = trending.EPOCH + datetime.timedelta(days=30)
+        half_life = datetime.timedelta(seconds=trending.half_life_seconds())
+        self.assertAlmostEqual(trending.decay(8.0, t0, t0 + half_life), 4.0)
+        self.assertAlmostEqual(trending.rank_for(8.0, t0), trending.rank_for(4.0, t0 + half_life))
+        # 10 points anciens (5 aujourd'hui) passent derrière 6 points récents
+        self.assertLess(trending.rank_for(10.0, t0), trending.rank_for(6.0, t0 + half_life))
+        self.assertEqual(trending.rank_for(trending.MIN_SCORE / 2, t0), trending.NULL_RANK)
+
+    def test_engagement_updates_score_and_ranking(self):
+        import datetime
+
+        from api.models import ContentScore
+        from api.services import trending
+
+        old, recent, liked = self.contents
+        t0 = trending.EPOCH + datetime.timedelta(days=30)
+        later = t0 + datetime.timedelta(seconds=trending.half_life_seconds())
+        trending.add_engagement({old.id: 10, liked.id: 2}, now=t0)
+        trending.add_engagement({old.id: 2, recent.id: 6, liked.id: -5}, now=later)
+
+        scores = {row.content_id: row for row in ContentScore.objects.all()}
+        self.assertAlmostEqual(scores[old.id].score, 7.0)
+        self.assertEqual(scores[old.id].scored_at, later)
+        # Jamais négatif : sort du classement
+        self.assertEqual((scores[liked.id].score, scores[liked.id].rank), (0.0, trending.NULL_RANK))
+        ranked = trending.top_contents(self.church.id, Content.objects.all())
+        self.assertEqual([c.id for c in ranked], [old.id, recent.id, liked.id])
+
+        # Trois demi-vies plus tard : scores re-décrus, rang inchangé, nuls purgés
+        now = later + datetime.timedelta(seconds=3 * trending.half_life_seconds())
+        self.assertEqual(trending.decay_all(now=now), (2, 1))
+        self.assertAlmostEqual(ContentScore.objects.get(content=recent).score, 0.75)
+        self.assertAlmostEqual(ContentScore.objects.get(content=old).rank, scores[old.id].rank)
+
+
+class ConditionalGetTests(TestCase):
+    """ETag / 304 : une vraie modification invalide, un flux de vues ne le fait qu'une fois par intervalle"""
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        from api.models import User
+
+        self.church = Church.objects.create(title="Église ETag")
+        self.content = Content.objects.create(
+            church=self.church, type="ARTICLE", title="Article", published=True, is_public=True
+        )
+        self.user = User.objects.create(phone_number="+237600000070", name="Lecteur", current_church=self.church)
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/contents/{self.content.id}/"
+
+    def _get(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(self.url, **headers)
+
+    def test_content_change_invalidates(self):
+        first = self._get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self._get(first["ETag"]).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            ContentTag.objects.create(content=self.content, tag=Tag.objects.create(name="neuf", slug="neuf"))
+        self.assertEqual(self._get(first["ETag"]).status_code, 200)
+
+    def test_view_flush_bumps_version_at_most_once_per_interval(self):
+        from django.utils import timezone
+
+        from api.services.content_views import write_views
+
+        first = self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            write_views([(self.user.id, self.content.id, timezone.now())])
+        # Version créée à l'instant : le compteur de vues peut attendre l'intervalle
+        self.assertEqual(self._get(first["ETag"]).status_code, 304)
+
+        with override_settings(CONTENT_VIEW_VERSION_INTERVAL=0), self.captureOnCommitCallbacks(execute=True):
+            write_views([(self.user.id, self.content.id, timezone.now())])
+        second = self._get(first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["views_count"], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            write_views([(self.user.id, self.content.id, timezone.now())])
+        self.assertEqual(self._get(second["ETag"]).status_code, 304)
+
+
+@override_settings(CONTENT_VIEW_BUFFER_SIZE=3, CONTENT_VIEW_FLUSH_INTERVAL=3600)
+class ViewBufferTests(TestCase):
+    """Un flush qui échoue remet ses vues dans le buffer, dans une limite fixe"""
+
+    def setUp(self):
+        from api.models import User
+        from api.services.content_views import ViewBuffer
+
+        church = Church.objects.create(title="Église vues")
+        self.content = Content.objects.create(church=church, type="ARTICLE", title="Vu")
+        self.user = User.objects.create(phone_number="+237600000080", name="Lecteur")
+        self.buffer = ViewBuffer()
+        self.addCleanup(self._stop_timer)
+
+    def _stop_timer(self):
+        if self.buffer._timer is not None:
+            self.buffer._timer.cancel()
+
+    def test_failed_flush_is_retried(self):
+        from unittest import mock
+
+        from django.db import OperationalError
+
+        from api.models import ContentView
+
+        with mock.patch(
+            "api.services.content_views.write_views", side_effect=OperationalError("down")
+        ), self.assertLogs("api.services.content_views", "ERROR"):
+            for _ in range(3):
+                # Buffer plein : le flush échoue sans faire échouer l'appelant
+                self.buffer.add(self.user.id, self.content.id)
+            self.assertEqual(len(self.buffer), 3)
+            self.assertIsNotNone(self.buffer._timer)
+            with self.assertRaises(OperationalError):
+                self.buffer.flush()
+        # Base revenue : le lot retenu part avec la nouvelle vue
+        self.buffer.add(self.user.id, self.content.id)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(ContentView.objects.count(), 4)
+        self.content.refresh_from_db()
+        self.assertEqual(self.content.views_count, 4)
+
+    def test_requeue_is_bounded(self):
+        from unittest import mock
+
+        from django.db import OperationalError
+
+        from api.services import content_views
+
+        with mock.patch.object(content_views, "MAX_PENDING_BATCHES", 2), mock.patch(
+            "api.services.content_views.write_views", side_effect=OperationalError("down")
+        ), self.assertLogs("api.services.content_views", "ERROR") as logs:
+            for _ in range(10):
+                self.buffer.add(self.user.id, self.content.id)
+            self.assertEqual(len(self.buffer), 6)
+        self.assertTrue(any("abandonnées" in line for line in logs.output))
+
+
+class FeedFanoutTests(TestCase):
+    """Fil matérialisé : arbre d'églises, collaborations et dépublication"""
+
+    def setUp(self):
+        self.parent = Church.objects.create(title="Église mère")
+        self.church = Church.objects.create(title="Église fille", parent=self.parent)
+        self.partner = Church.objects.create(title="Église partenaire")
+        self.public = Content.objects.create(
+            church=self.church, type="ARTICLE", title="Public", published=True, is_public=True
+        )
+        self.private = Content.objects.create(
+            church=self.church, type="ARTICLE", title="Interne", published=True, is_public=False
+        )
+
+    def _feed(self, church):
+        return set(ChurchFeedEntry.objects.filter(church=church).values_list("content_id", flat=True))
+
+    def test_tree_fanout(self):
+        both = {self.public.id, self.private.id}
+        self.assertEqual((self._feed(self.church), self._feed(self.parent)), (both, both))
+        self.assertEqual(self._feed(self.partner), set())
+
+    def test_collaboration_add_and_remove(self):
+        from api.models import ChurchCollaboration
+
+        with self.captureOnCommitCallbacks(execute=True):
+            collaboration = ChurchCollaboration.objects.create(
+                initiator_church=self.partner, target_church=self.church
+            )
+        self.assertEqual(self._feed(self.partner), set())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            collaboration.status = "ACCEPTED"
+            collaboration.save()
+        # Seuls les contenus publics traversent une collaboration
+        self.assertEqual(self._feed(self.partner), {self.public.id})
+        self.assertIn(self.public.id, self._feed(self.church))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            collaboration.delete()
+        self.assertEqual(self._feed(self.partner), set())
+        self.assertEqual(self._feed(self.church), {self.public.id, self.private.id})
+
+    def test_unpublish_and_republish(self):
+        from api.models import ChurchCollaboration
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ChurchCollaboration.objects.create(
+                initiator_church=self.church, target_church=self.partner, status="ACCEPTED"
+            )
+        self.public.published = False
+        self.public.save()
+        for church in (self.church, self.parent, self.partner):
+            self.assertNotIn(self.public.id, self._feed(church))
+
+        self.public.published = True
+        self.public.save()
+        for church in (self.church, self.parent, self.partner):
+            self.assertIn(self.public.id, self._feed(church))
+        # Devenu interne : retiré du fil du partenaire seulement
+        self.public.is_public = False
+        self.public.save()
+        self.assertNotIn(self.public.id, self._feed(self.partner))
+        self.assertIn(self.public.id, self._feed(self.parent))
+
+
+class ContentCounterTests(TestCase):
+    """Les compteurs incrémentés par F() ne sont jamais réécrits par un save() d'une instance périmée"""
+
+    def test_stale_save_keeps_counters(self):
+        from django.db.models import F
+
+        church = Church.objects.create(title="Église compteurs")
+        content = Content.objects.create(church=church, type="ARTICLE", title="Avant")
+        stale = Content.objects.get(pk=content.pk)
+        Content.objects.filter(pk=content.pk).update(
+            likes_count=F("likes_count") + 2, views_count=F("views_count") + 5, comments_count=F("comments_count") + 1
+        )
+
+        stale.title = "Après"
+        stale.save()
+        content.refresh_from_db()
+        self.assertEqual(content.title, "Après")
+        self.assertEqual((content.likes_count, content.views_count, content.comments_count), (2, 5, 1))
+
+        # update_fields explicite : respecté tel quel
+        stale.likes_count = 7
+        stale.save(update_fields=["likes_count"])
+        content.refresh_from_db()
+        self.assertEqual((content.likes_count, content.views_count), (7, 5))
+
+
+class ContentSearchTests(TestCase):
+    """Recherche plein texte des contenus (FTS5 sur SQLite, tsvector sur PostgreSQL)"""
+
+    def setUp(self):
+        self.church = Church.objects.create(title="Église recherche contenus")
+        self.in_title = Content.objects.create(
+            church=self.church, type="ARTICLE", title="Prière du matin", description="Pour bien commencer"
+        )
+        self.in_description = Content.objects.create(
+            church=self.church, type="ARTICLE", title="Méditation", description="Une prière pour la famille"
+        )
+        self.other = Content.objects.create(
+            church=self.church, type="ARTICLE", title="Évangile selon Jean", description="Lecture"
+        )
+
+    def _search(self, query):
+        from api.services import search
+
+        return list(
+            search.search_contents(Content.objects.all(), query)
+            .order_by("-search_rank", "id")
+            .values_list("id", flat=True)
+        )
+
+    def test_accents_prefixes_and_rank(self):
+        # Insensible aux accents, titre avant description
+        self.assertEqual(self._search("priere"), [self.in_title.id, self.in_description.id])
+        self.assertEqual(self._search("evang"), [self.other.id])
+        # Tous les mots doivent correspondre
+        self.assertEqual(self._search("priere famille"), [self.in_description.id])
+        self.assertEqual(self._search("  ,;  "), [])
+
+    def test_index_follows_writes(self):
+        from django.db import connection
+
+        from api.services import search
+
+        self.other.title = "Prière du soir"
+        self.other.save()
+        self.in_title.delete()
+        self.assertEqual(set(self._search("priere")), {self.in_description.id, self.other.id})
+        self.assertEqual(self._search("evangile"), [])
+
+        if connection.vendor == "sqlite":
+            # Triggers supprimés par une reconstruction de table : recréés après migrate,
+            # et les écritures faites entre-temps réindexées
+            with connection.cursor() as cursor:
+                cursor.execute("DROP TRIGGER api_content_fts_update")
+            self.other.title = "Louange"
+            self.other.save()
+            self.assertEqual(self._search("louange"), [])
+            search.ensure_sqlite_triggers()
+            self.assertEqual(self._search("louange"), [self.other.id])
+            self.in_description.title = "Cantique"
+            self.in_description.save()
+            self.assertEqual(self._search("cantique"), [self.in_description.id])
+
+    def test_list_endpoint(self):
+        from rest_framework.test import APIClient
+
+        from api.models import User
+
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(User.objects.create(phone_number="+237600000090", name="Lecteur"))
+        response = client.get("/api/contents/", {"search": "priere", "church_id": str(self.church.id)})
+        self.assertEqual([item["id"] for item in response.json()["results"]], [self.in_title.id, self.in_description.id])
+        # Aucun mot cherchable : liste vide, pas d'erreur de tri
+        response = client.get("/api/contents/", {"search": ",;"})
+        self.assertEqual((response.status_code, response.json()["results"]), (200, []))
+
+
+class ScheduledReleaseTests(TestCase):
+    """Sortie programmée : is_released bascule à l'échéance et chaque abonné est notifié une fois"""
+
+    def test_release_flips_flag_and_notifies_once(self):
+        import io
+        from datetime import timedelta
+
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        from api.models import ContentNotification, Notification, User
+        from api.services import release
+
+        church = Church.objects.create(title="Église sorties")
+        release_at = timezone.now() + timedelta(hours=1)
+        due = Content.objects.create(
+            church=church, type="VIDEO", title="Bientôt", published=True, planned_release_date=release_at
+        )
+        later = Content.objects.create(
+            church=church, type="VIDEO", title="Plus tard", published=True,
+            planned_release_date=release_at + timedelta(days=7),
+        )
+        users = [User.objects.create(phone_number=f"+23760000010{i}", name=f"Abonné {i}") for i in range(2)]
+        for user in users:
+            ContentNotification.objects.create(content=due, user=user)
+        ContentNotification.objects.create(content=later, user=users[0])
+        self.assertFalse(Content.objects.get(pk=due.pk).is_released)
+
+        self.assertEqual(release.run_release_pass(now=release_at - timedelta(minutes=1)), (0, 0))
+        self.assertEqual(release.run_release_pass(now=release_at), (1, 2))
+        self.assertTrue(Content.objects.get(pk=due.pk).is_released)
+        self.assertFalse(Content.objects.get(pk=later.pk).is_released)
+        self.assertEqual(
+            set(Notification.objects.values_list("user_id", flat=True)), {user.id for user in users}
+        )
+        self.assertFalse(ContentNotification.objects.filter(content=due, notified_at__isnull=True).exists())
+
+        # Passe suivante (commande) : rien à refaire, aucun doublon
+        output = io.StringIO()
+        call_command("release_scheduled_content", stdout=output)
+        self.assertIn("0 contenu(s) sorti(s), 0 abonné(s) notifié(s)", output.getvalue())
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertFalse(ContentNotification.objects.get(content=later).is_notified)
+
+    def test_historical_subscriptions_not_notified(self):
+        from datetime import timedelta
+        from importlib import import_module
+
+        from django.apps import apps
+        from django.utils import timezone
+
+        from api.models import ContentNotification, Notification, User
+        from api.services import release
+
+        church = Church.objects.create(title="Église historique")
+        now = timezone.now()
+        released = Content.objects.create(church=church, type="VIDEO", title="Sorti", published=True)
+        released_late = Content.objects.create(
+            church=church, type="VIDEO", title="Sorti le mois dernier", published=True,
+            planned_release_date=now - timedelta(days=30),
+        )
+        upcoming = Content.objects.create(
+            church=church, type="VIDEO", title="À venir", published=True, planned_release_date=now + timedelta(hours=1),
+        )
+        user = User.objects.create(phone_number="+237600000110", name="Abonné")
+        for content in (released, released_late, upcoming):
+            # Lignes d'avant le worker : is_notified jamais mis à jour
+            ContentNotification.objects.create(content=content, user=user)
+
+        migration = import_module("api.migrations.0029_content_notification_backfill")
+        migration.mark_released_subscriptions_notified(apps, None)
+        self.assertEqual(release.run_release_pass(now=now), (0, 0))
+        self.assertFalse(Notification.objects.exists())
+
+        # L'abonnement au contenu à venir reste en attente et sera notifié à sa sortie
+        self.assertEqual(release.run_release_pass(now=now + timedelta(hours=1)), (1, 1))
+        self.assertEqual(Notification.objects.get().message, "« À venir » est maintenant disponible.")
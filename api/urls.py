@@ -1,6 +1,6 @@
 from django.urls import path
 from api.views.commissions.commissions_view import add_member_to_commission, church_commissions_summary, create_commission, delete_commission, list_church_commission_members, list_church_commissions, list_church_commissions_with_members, list_commissions, remove_member_from_commission, update_commission, update_member_role_in_commission
-from api.views.contents.contents_view import add_comment, add_to_playlist, content_stats_for_church, content_stats_global, create_category, create_content, create_playlist, create_tag, delete_category, delete_comment, delete_content, delete_tag, feed_for_church, get_category, get_playlist_with_items,list_all_playlists, list_categories, list_comments, list_content, list_tags, recommend_for_user, reorder_playlist_item, retrieve_content, toggle_like_content, trending_content, update_category, update_content, update_tag, view_content, church_feed, list_coming_soon, subscribe_to_content, unsubscribe_from_content, get_my_subscriptions, get_content_subscribers
+from api.views.contents.contents_view import add_comment, add_to_playlist, content_stats_for_church, content_stats_global, create_category, create_content, create_playlist, create_tag, delete_category, delete_comment, delete_content, delete_tag, feed_for_church, get_category, get_playlist_with_items, import_contents, list_all_playlists, list_categories, list_comments, list_content, list_tags, recommend_for_user, reorder_playlist_item, retrieve_content, set_playlist_order, toggle_like_content, trending_content, update_category, update_content, update_tag, view_content, church_feed, list_coming_soon, subscribe_to_content, unsubscribe_from_content, get_my_subscriptions, get_content_subscribers
 from api.views.contents.contents_view import list_ticket_types, create_ticket_type, update_ticket_type, delete_ticket_type
 from api.views.programmes.programmes_view import (
     create_programme, retrieve_programme, update_programme, delete_programme,
@@ -12,7 +12,8 @@ from .views.auth.auth_views import change_subscription_plan, check_subscription_
 from .views.crud.crud_views import churches_metrics,create_subchurch_view, deny_user,filter_church_members,get_current_user, join_church, leave_church, leave_commission, unban_user,update_church_by_owner,list_owners,list_users,delete_church,update_church,delete_self,update_self,delete_self,list_churches,create_church_view,list_my_churches,verify_church_view,add_church_admin,list_sub_churches
 from .views.crud.receipt_views import ReceiptViewSet, create_receipt, get_receipt, update_receipt, delete_receipt, list_all_receipts
 from .views.chat.chat_views import (
-    list_create_chat_rooms, room_detail, list_create_messages, message_detail,
+    list_create_chat_rooms, my_chat_rooms, room_detail, room_history, list_create_messages, message_detail,
+    mark_room_read, unread_counts, chat_metrics, search_messages, room_members,
     add_member_to_custom_room, remove_member_from_custom_room,
     create_programme_chat, get_programme_chat, send_programme_message, get_programme_messages
 )
@@ -104,6 +105,7 @@ urlpatterns = [
     path("contents/", list_content),
     path("contents/<str:content_id>/", retrieve_content),
     path("contents/<str:church_id>/add/", create_content,name="create_content"),
+    path("contents/<str:church_id>/import/", import_contents, name="import_contents"),
     path("contents/<str:content_id>/update/", update_content),
     path("contents/<str:content_id>/delete/", delete_content),
     path("contents/<str:content_id>/toggle_like/", toggle_like_content),
@@ -118,6 +120,7 @@ urlpatterns = [
     path("playlists/create/", create_playlist),
     path("playlists/<str:playlist_id>/", get_playlist_with_items),
     path("playlists/<str:playlist_id>/add/", add_to_playlist),
+    path("playlists/<str:playlist_id>/order/", set_playlist_order),
     path("playlist-items/<str:item_id>/reorder/", reorder_playlist_item),
     path("playlist/", list_all_playlists, name="playlist-list"),
     path("trending/<str:church_id>/", trending_content),#plus populaire
@@ -171,14 +174,21 @@ urlpatterns = [
     path("receipts/<str:receipt_id>/update/", update_receipt, name="update-receipt"),
     path("receipts/<str:receipt_id>/delete/", delete_receipt, name="delete-receipt"),
     # Chat endpoints
-    path("chat/church/<int:church_id>/rooms/", list_create_chat_rooms, name="list-create-chat-rooms"),
-    path("chat/church/<int:church_id>/rooms/create/", list_create_chat_rooms, name="create-chat-room"),
-    path("chat/room/<int:room_id>/", room_detail, name="room-detail"),
-    path("chat/room/<int:room_id>/messages/", list_create_messages, name="list-create-messages"),
-    path("chat/room/<int:room_id>/messages/create/", list_create_messages, name="create-message"),
-    path("chat/room/<int:room_id>/messages/<int:message_id>/", message_detail, name="message-detail"),
-    path("chat/room/<int:room_id>/members/add/", add_member_to_custom_room, name="add-member-to-room"),
-    path("chat/room/<int:room_id>/members/remove/", remove_member_from_custom_room, name="remove-member-from-room"),
+    path("chat/church/<uuid:church_id>/rooms/", list_create_chat_rooms, name="list-create-chat-rooms"),
+    path("chat/church/<uuid:church_id>/rooms/create/", list_create_chat_rooms, name="create-chat-room"),
+    path("chat/rooms/mine/", my_chat_rooms, name="my-chat-rooms"),
+    path("chat/rooms/unread/", unread_counts, name="chat-unread-counts"),
+    path("chat/metrics/", chat_metrics, name="chat-metrics"),
+    path("chat/search/", search_messages, name="chat-search"),
+    path("chat/room/<uuid:room_id>/", room_detail, name="room-detail"),
+    path("chat/room/<uuid:room_id>/messages/", list_create_messages, name="list-create-messages"),
+    path("chat/room/<uuid:room_id>/history/", room_history, name="room-history"),
+    path("chat/room/<uuid:room_id>/read/", mark_room_read, name="mark-room-read"),
+    path("chat/room/<uuid:room_id>/messages/create/", list_create_messages, name="create-message"),
+    path("chat/room/<uuid:room_id>/messages/<uuid:message_id>/", message_detail, name="message-detail"),
+    path("chat/room/<uuid:room_id>/members/", room_members, name="room-members"),
+    path("chat/room/<uuid:room_id>/members/add/", add_member_to_custom_room, name="add-member-to-room"),
+    path("chat/room/<uuid:room_id>/members/remove/", remove_member_from_custom_room, name="remove-member-from-room"),
     
     # Testimony endpoints
     path("church/<str:church_id>/testimonies/", list_church_testimonies, name="list-church-testimonies"),
@@ -1,13 +1,21 @@
+import uuid
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import F, Q
 
-from api.models import ChatRoom, ChatMessage, Church, ChurchAdmin, Commission
-from api.serializers import ChatRoomSerializer, ChatRoomCreateUpdateSerializer, ChatMessageSerializer
+from api.models import ChatRoom, ChatRoomMembership, ChatMessage, Church, ChurchAdmin, Commission
+from api.serializers import (
+    ChatRoomSerializer, ChatRoomListSerializer, ChatRoomCreateUpdateSerializer, ChatMessageSerializer,
+    ChatRoomMemberSerializer,
+)
 from api.permissions import IsAuthenticatedUser
+from api.pagination import KeysetPaginator
+from api.services import chat_history, chat_outbound, chat_read, chat_summary
+from api.services import search as text_search
 
 
 @api_view(['GET', 'POST'])
@@ -33,8 +41,13 @@ def list_create_chat_rooms(request, church_id):
         )
     
     if request.method == 'GET':
-        rooms = ChatRoom.objects.filter(church=church).prefetch_related('messages')
-        serializer = ChatRoomSerializer(rooms, many=True)
+        # Liste légère : résumé dénormalisé, l'historique passe par /history/, les membres par /members/
+        rooms = (
+            ChatRoom.objects.filter(church=church)
+            .select_related('last_message_user')
+            .order_by(F('last_message_at').desc(nulls_last=True), '-updated_at')
+        )
+        serializer = ChatRoomListSerializer(rooms, many=True)
         return Response(serializer.data)
     
     elif request.method == 'POST':
@@ -49,6 +62,27 @@ def list_create_chat_rooms(request, church_id):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedUser])
+def my_chat_rooms(request):
+    """Salons accessibles à l'utilisateur, le plus récemment actif d'abord"""
+    my_room_ids = ChatRoomMembership.objects.filter(user=request.user).values('room_id')
+    rooms = chat_read.with_unread(
+        ChatRoom.objects.filter(id__in=my_room_ids).select_related('last_message_user'),
+        request.user,
+    )
+    church_id = request.query_params.get('church_id')
+    if church_id:
+        try:
+            church_id = uuid.UUID(church_id)
+        except ValueError:
+            return Response({"error": "church_id invalide"}, status=status.HTTP_400_BAD_REQUEST)
+        rooms = rooms.filter(church_id=church_id)
+    rooms = rooms.order_by(F('last_message_at').desc(nulls_last=True), '-updated_at')
+    serializer = ChatRoomListSerializer(rooms, many=True)
+    return Response(serializer.data)
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticatedUser])
 def room_detail(request, room_id):
@@ -112,16 +146,12 @@ def list_create_messages(request, room_id):
         )
     
     if request.method == 'GET':
-        messages = room.messages.all()
-        
-        # Optional: limit to last N messages
-        limit = request.GET.get('limit', 50)
+        # Liste simple des `limit` derniers messages ; pagination complète : /history/
         try:
-            limit = int(limit)
-            messages = messages[:limit]
+            limit = int(request.GET.get('limit', chat_history.DEFAULT_LIMIT))
         except ValueError:
-            pass
-        
+            limit = chat_history.DEFAULT_LIMIT
+        messages, _ = chat_history.message_page(room, limit=limit)
         serializer = ChatMessageSerializer(messages, many=True)
         return Response(serializer.data)
     
@@ -137,6 +167,147 @@ def list_create_messages(request, room_id):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedUser])
+def room_history(request, room_id):
+    """
+    Historique d'un salon par curseurs (ordre chronologique).
+    Query params: limit, before=<message_id> (plus anciens), after=<message_id> (plus récents)
+    """
+    room = get_object_or_404(ChatRoom, id=room_id)
+    if not room.user_has_access(request.user):
+        return Response(
+            {"error": "You don't have access to this room"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    try:
+        limit = int(request.query_params.get('limit', chat_history.DEFAULT_LIMIT))
+    except ValueError:
+        limit = chat_history.DEFAULT_LIMIT
+    try:
+        messages, has_more = chat_history.message_page(
+            room,
+            before=request.query_params.get('before'),
+            after=request.query_params.get('after'),
+            limit=limit,
+        )
+    except chat_history.InvalidCursor:
+        return Response({"error": "Curseur invalide"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        "results": ChatMessageSerializer(messages, many=True).data,
+        "has_more": has_more,
+        "before_cursor": str(messages[0].id) if messages else None,
+        "after_cursor": str(messages[-1].id) if messages else None,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticatedUser])
+def mark_room_read(request, room_id):
+    """
+    Avance le curseur de lecture de l'utilisateur
+    Body: {"message_id": "uuid (optionnel, dernier message par défaut)"}
+    """
+    membership = ChatRoomMembership.objects.filter(room_id=room_id, user=request.user).first()
+    if membership is None:
+        return Response(
+            {"error": "You don't have access to this room"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    try:
+        membership = chat_read.mark_read(membership, request.data.get('message_id'))
+    except chat_history.InvalidCursor:
+        return Response({"error": "Message introuvable dans ce salon"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        "room_id": str(room_id),
+        "last_read_at": membership.last_read_at,
+        "last_read_message_id": membership.last_read_message_id,
+        "unread_count": chat_read.unread_count(membership),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedUser])
+def unread_counts(request):
+    """Badges de non-lus de tous les salons de l'utilisateur (une requête)"""
+    counts = chat_read.unread_counts(request.user)
+    return Response({
+        "rooms": {str(room_id): count for room_id, count in counts.items()},
+        "total": sum(counts.values()),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedUser])
+def search_messages(request):
+    """
+    Recherche plein texte dans les salons accessibles à l'utilisateur
+    Query params: q (requis), room_id, church_id, limit, cursor (plus récents d'abord)
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"error": "q requis"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        room_id = uuid.UUID(request.query_params['room_id']) if request.query_params.get('room_id') else None
+        church_id = uuid.UUID(request.query_params['church_id']) if request.query_params.get('church_id') else None
+    except ValueError:
+        return Response({"error": "room_id / church_id invalide"}, status=status.HTTP_400_BAD_REQUEST)
+
+    my_room_ids = ChatRoomMembership.objects.filter(user=request.user).values('room_id')
+    messages = ChatMessage.objects.filter(room_id__in=my_room_ids)
+    if room_id:
+        if not ChatRoomMembership.objects.filter(user=request.user, room_id=room_id).exists():
+            return Response(
+                {"error": "You don't have access to this room"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        messages = ChatMessage.objects.filter(room_id=room_id)
+    if church_id:
+        messages = messages.filter(room__church_id=church_id)
+
+    messages = text_search.search_messages(messages.select_related('user'), query)
+    paginator = KeysetPaginator(ordering=('-created_at', '-id'))
+    page = paginator.paginate_queryset(messages, request)
+    results = [
+        {**data, "room_id": str(message.room_id)}
+        for message, data in zip(page, ChatMessageSerializer(page, many=True).data)
+    ]
+    return Response(paginator.get_paginated_data(results))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedUser])
+def room_members(request, room_id):
+    """Membres d'un salon, paginés par curseur (les plus récents d'abord)"""
+    user = request.user
+    room = get_object_or_404(ChatRoom, id=room_id)
+
+    if not room.user_has_access(user) and user.role != 'SADMIN':
+        return Response(
+            {"error": "You don't have access to this room"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    memberships = ChatRoomMembership.objects.filter(room=room).select_related('user')
+    paginator = KeysetPaginator(ordering=('-joined_at', '-id'), default_limit=50)
+    page = paginator.paginate_queryset(memberships, request)
+    serializer = ChatRoomMemberSerializer(page, many=True)
+    return Response(paginator.get_paginated_data(serializer.data))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedUser])
+def chat_metrics(request):
+    """Files d'envoi WebSocket de ce processus (profondeur, trames jetées) - SADMIN"""
+    if request.user.role != 'SADMIN':
+        return Response(
+            {"error": "Only super admins can read chat metrics"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return Response(chat_outbound.metrics.snapshot())
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticatedUser])
 def message_detail(request, room_id, message_id):
@@ -187,6 +358,7 @@ def message_detail(request, room_id, message_id):
             )
         
         message.delete()
+        chat_summary.message_deleted(room.id, message_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
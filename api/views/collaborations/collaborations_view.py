@@ -11,6 +11,7 @@ from api.serializers import (
     ChurchCollaborationListSerializer,
     ChurchCollaborationApprovalSerializer
 )
+from api.pagination import KeysetPaginator
 
 
 # =====================================================
@@ -233,6 +234,7 @@ def list_church_collaborations(request, church_id):
     Query params:
     - status: PENDING|ACCEPTED|REJECTED|ENDED
     - type: PARTNERSHIP|EVENT|RESOURCE_SHARING|MINISTRY|OTHER
+    - limit, cursor, offset, count: pagination (default limit: 100)
     """
     try:
         church = Church.objects.get(id=church_id)
@@ -265,11 +267,12 @@ def list_church_collaborations(request, church_id):
     if type_filter:
         collaborations = collaborations.filter(collaboration_type=type_filter)
     
-    serializer = ChurchCollaborationListSerializer(collaborations, many=True)
-    return Response({
-        "count": collaborations.count(),
-        "results": serializer.data
-    })
+    # Cursor pagination (default page: 100)
+    paginator = KeysetPaginator(ordering=('-created_at', '-id'), default_limit=100)
+    page = paginator.paginate_queryset(collaborations, request)
+    
+    serializer = ChurchCollaborationListSerializer(page, many=True)
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 # =====================================================
@@ -304,11 +307,12 @@ def list_pending_collaborations(request, church_id):
         status="PENDING"
     )
     
-    serializer = ChurchCollaborationListSerializer(collaborations, many=True)
-    return Response({
-        "count": collaborations.count(),
-        "results": serializer.data
-    })
+    # Cursor pagination (default page: 100)
+    paginator = KeysetPaginator(ordering=('-created_at', '-id'), default_limit=100)
+    page = paginator.paginate_queryset(collaborations, request)
+    
+    serializer = ChurchCollaborationListSerializer(page, many=True)
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 # =====================================================
@@ -7,7 +7,7 @@ from django.utils.text import slugify
 from api.permissions import IsAuthenticatedUser, IsSuperAdmin, user_is_church_admin
 from api.serializers import CategorySerializer, CommentSerializer, ContentCreateUpdateSerializer, ContentDetailSerializer, ContentListSerializer, PlaylistItemSerializer, PlaylistSerializer, TagSerializer, ContentNotificationSerializer, ContentComingSoonSerializer
 # imports communs pour serializers + views
-from django.db.models import Count, Q
+from django.db.models import Count, Max, Q, Sum
 from django.db.models.functions import TruncMonth
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
@@ -15,15 +15,28 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework import status
-from django.db import models
+from django.db import models, transaction
+from django.db.models import prefetch_related_objects
+from django.db.models.functions import Greatest
+import io
 import random
+import uuid
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
 # tes modèles (adaptés à ton projet)
 from api.models import (
     ChurchAdmin, Content, Category, Tag, ContentTag, Playlist, PlaylistItem,
-    ContentView, ContentLike, Comment, Church, User, ContentNotification
+    ContentView, ContentLike, Comment, Church, User, ContentNotification,
+    ChurchFeedEntry
 )
 from api.models import TicketType
-from api.serializers import TicketTypeSerializer
+from api.conditional import make_etag, most_recent, not_modified, with_validators
+from api.pagination import KeysetPaginator
+from api.services import content_import, content_stats, content_version, playlist_order, recommender, trending
+from api.services import search as content_search
+from api.services.content_views import record_view
+from api.serializers import PlaylistItemNestedSerializer, TicketTypeSerializer, parse_fields_param, sparse_queryset
 # permissions existantes
 from api.permissions import IsAuthenticatedUser
 # utilitaires si besoin
@@ -35,13 +48,10 @@ from itertools import zip_longest
 def exclude_coming_soon(queryset):
     """
     Exclure les contenus 'Coming Soon' d'une queryset
-    Un contenu est 'coming soon' s'il est publié et sa date prévue > maintenant
+    Un contenu est 'coming soon' s'il est publié et sa date prévue > maintenant ;
+    is_released est tenu à jour par save() et la commande release_scheduled_content
     """
-    return queryset.exclude(
-        published=True,
-        planned_release_date__isnull=False,
-        planned_release_date__gt=timezone.now()
-    )
+    return queryset.filter(is_released=True)
 
 
 @api_view(["POST"])
@@ -61,8 +71,14 @@ def create_category(request):
 @api_view(["GET"])
 def list_categories(request):
     categories = Category.objects.all().order_by("name")
+    # Ajout / suppression -> count ; modification -> updated_at
+    state = categories.aggregate(total=Count("id"), modified_at=Max("updated_at"))
+    etag = make_etag("categories", state["total"], state["modified_at"])
+    cached = not_modified(request, etag, state["modified_at"])
+    if cached:
+        return cached
     serializer = CategorySerializer(categories, many=True)
-    return Response(serializer.data)
+    return with_validators(Response(serializer.data), etag, state["modified_at"])
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
@@ -94,6 +110,15 @@ def delete_category(request, category_id):
     category.delete()
     return Response({"detail": "Category deleted successfully"})
 
+# Alias acceptés par ?ordering= (sans le "-") -> compteurs dénormalisés indexés
+CONTENT_ORDERING_FIELDS = {
+    "likes": "likes_count",
+    "views": "views_count",
+    "comments": "comments_count",
+}
+CONTENT_FIELD_NAMES = {f.name for f in Content._meta.concrete_fields}
+
+
 class DefaultPagination(PageNumberPagination):
     page_size = 12
     page_size_query_param = "page_size"
@@ -109,11 +134,14 @@ def list_content(request):
       - type (ARTICLE,AUDIO,EVENT,VIDEO,POST,BOOK)
       - category_id
       - tag (name)
-      - search (title/description)
+      - search (full-text on title/description, prefix + accent-insensitive;
+        results ordered by relevance unless ordering is given)
       - ordering (created_at, likes, views) prefixed with - for desc
       - published (true/false)
+      - fields (sparse fieldset, ex: fields=id,title,cover_image_url)
     """
-    qs = Content.objects.all()
+    qs = Content.objects.select_related("category")
+    fields = parse_fields_param(request)
 
     church_id = request.GET.get("church_id")
     ctype = request.GET.get("type")
@@ -141,30 +169,46 @@ def list_content(request):
             qs = qs.filter(published=False)
 
     if search:
-        qs = qs.filter(Q(title__icontains=search) | Q(description__icontains=search))
+        # Index plein texte (voir api/services/search.py), annote search_rank
+        qs = content_search.search_contents(qs, search)
 
     # Exclure les contenus coming soon
     qs = exclude_coming_soon(qs)
 
-    # annotate likes & views for ordering if requested
-    qs = qs.annotate(likes_count=Count("contentlike"), views_count=Count("contentview"))
-
+    # likes/views/comments are denormalized counters on Content (indexed)
     ordering = request.GET.get("ordering")
-    if ordering:
-        qs = qs.order_by(ordering)
+    if search and not ordering:
+        qs = qs.order_by("-search_rank", "-created_at")
     else:
-        qs = qs.order_by("-created_at")
-
+        ordering = ordering or "-created_at"
+        direction = "-" if ordering.startswith("-") else ""
+        field = CONTENT_ORDERING_FIELDS.get(ordering.lstrip("-"), ordering.lstrip("-"))
+        if field not in CONTENT_FIELD_NAMES:
+            return Response({"error": "invalid ordering"}, status=400)
+        qs = qs.order_by(f"{direction}{field}", f"{direction}id")
+
+    qs = sparse_queryset(qs, ContentListSerializer, fields)
     paginator = DefaultPagination()
     page = paginator.paginate_queryset(qs, request)
-    serializer = ContentListSerializer(page, many=True)
+    serializer = ContentListSerializer(page, many=True, fields=fields)
     return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
 def retrieve_content(request, content_id):
-    obj = get_object_or_404(Content, id=content_id)
+    fields = parse_fields_param(request)
+    # Colonnes lues par la vue elle-même (Coming Soon, ETag)
+    qs = sparse_queryset(
+        Content.objects.select_related("church", "category", "created_by"),
+        ContentDetailSerializer,
+        fields,
+        extra=(
+            "published", "planned_release_date", "updated_at", "church__updated_at",
+            "category__updated_at", "created_by__updated_at",
+        ),
+    )
+    obj = get_object_or_404(qs, id=content_id)
     
     # Vérifier si c'est un contenu coming soon
     if obj.is_coming_soon():
@@ -176,8 +220,25 @@ def retrieve_content(request, content_id):
                 status=status.HTTP_404_NOT_FOUND
             )
     
-    serializer = ContentDetailSerializer(obj)
-    return Response(serializer.data)
+    # La version de l'église couvre les tags et les compteurs (modifiés sans save())
+    version = content_version.get(obj.church_id)
+    etag = make_etag(
+        "content", obj.id, version.version, obj.updated_at,
+        obj.church.updated_at,
+        obj.category.updated_at if obj.category else None,
+        obj.created_by.updated_at if obj.created_by else None,
+    )
+    last_modified = most_recent(
+        version.modified_at, obj.updated_at, obj.church.updated_at,
+        obj.category.updated_at if obj.category else None,
+        obj.created_by.updated_at if obj.created_by else None,
+    )
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    serializer = ContentDetailSerializer(obj, fields=fields)
+    return with_validators(Response(serializer.data), etag, last_modified)
 
 
 @api_view(["POST"])
@@ -214,6 +275,54 @@ def create_content(request,church_id):
     return Response(serializer.errors, status=400)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticatedUser])
+def import_contents(request, church_id):
+    """
+    Import en masse de contenus dans une église (admins de l'église ou SADMIN).
+
+    - multipart : champ `file` (.jsonl / .ndjson ou .csv, ou param `format`)
+    - JSON : {"items": [{...}, ...]} ou directement une liste d'objets
+    Chaque ligne a les champs de create_content ; `category` accepte un id, un slug
+    ou un nom, `tags` une liste ou une chaîne "a, b". Query param : dry_run=true.
+
+    Réponse : {"created": n, "errors": [{"row": n, "errors": {...}}], "dry_run": bool}
+    """
+    church = get_object_or_404(Church, id=church_id)
+    if not getattr(church, "is_verified", False):
+        return Response({"detail": "Church not verified"}, status=403)
+    if not user_is_church_admin(request.user, church):
+        return Response({"detail": "Forbidden"}, status=403)
+
+    upload = request.FILES.get("file")
+    if upload is not None:
+        fmt = request.data.get("format") or content_import.detect_format(upload.name)
+        if fmt not in content_import.FORMATS:
+            return Response(
+                {"error": "Format non supporté (jsonl ou csv)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        rows = content_import.read_rows(lines, fmt)
+    else:
+        items = request.data.get("items") if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list):
+            return Response(
+                {"error": "Envoyer un fichier (file) ou une liste d'objets (items)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = (
+            (position, item if isinstance(item, dict) else "Chaque élément doit être un objet JSON")
+            for position, item in enumerate(items, start=1)
+        )
+
+    dry_run = request.query_params.get("dry_run", "").lower() in ("1", "true", "yes")
+    result = content_import.import_contents(church, rows, created_by=request.user, dry_run=dry_run)
+    result["dry_run"] = dry_run
+    code = status.HTTP_201_CREATED if result["created"] and not dry_run else status.HTTP_200_OK
+    return Response(result, status=code)
+
+
 @api_view(["PUT","PATCH"])
 @permission_classes([IsAuthenticatedUser])
 def update_content(request, content_id):
@@ -246,13 +355,22 @@ def toggle_like_content(request, content_id):
     content = get_object_or_404(Content, id=content_id)
     like_qs = ContentLike.objects.filter(user=request.user, content=content)
     
-    if like_qs.exists():
+    with transaction.atomic():
         # Supprimer le like existant
-        like_qs.delete()
-        return Response({"liked": False, "note": "like removed"})
-    else:
+        deleted, _ = like_qs.delete()
+        if deleted:
+            Content.objects.filter(id=content.id).update(
+                likes_count=Greatest(F("likes_count") - deleted, 0)
+            )
+            trending.record_like(content, liked=False)
+            content_version.bump([content.church_id])
+            return Response({"liked": False, "note": "like removed"})
+
         # Créer un nouveau like
         ContentLike.objects.create(user=request.user, content=content)
+        Content.objects.filter(id=content.id).update(likes_count=F("likes_count") + 1)
+        trending.record_like(content)
+        content_version.bump([content.church_id])
         return Response({"liked": True, "note": "like added"})
 
 
@@ -262,8 +380,8 @@ def toggle_like_content(request, content_id):
 @permission_classes([IsAuthenticatedUser])
 def view_content(request, content_id):
     content = get_object_or_404(Content, id=content_id)
-    # Create a new view record on each call so a user can view multiple times (YouTube-like)
-    ContentView.objects.create(user=request.user, content=content)
+    # Each call counts as a view (YouTube-like); rows are written in batches by the view buffer
+    record_view(request.user, content)
     return Response({"viewed": True})
 
 @api_view(["GET"])
@@ -282,7 +400,10 @@ def add_comment(request, content_id):
     if not text:
         return Response({"error":"text required"}, status=400)
     content = get_object_or_404(Content, id=content_id)
-    c = Comment.objects.create(user=request.user, content=content, text=text)
+    with transaction.atomic():
+        c = Comment.objects.create(user=request.user, content=content, text=text)
+        Content.objects.filter(id=content.id).update(comments_count=F("comments_count") + 1)
+        content_version.bump([content.church_id])
     return Response(CommentSerializer(c).data, status=201)
 
 @api_view(["DELETE"])
@@ -291,7 +412,12 @@ def delete_comment(request, comment_id):
     c = get_object_or_404(Comment, id=comment_id)
     if c.user != request.user and request.user.role != "SADMIN":
         return Response({"error":"forbidden"}, status=403)
-    c.delete()
+    with transaction.atomic():
+        c.delete()
+        Content.objects.filter(id=c.content_id).update(
+            comments_count=Greatest(F("comments_count") - 1, 0)
+        )
+        content_version.bump_for_contents([c.content_id])
     return Response({"deleted": True})
 
 
@@ -363,23 +489,32 @@ def create_playlist(request):
 def add_to_playlist(request, playlist_id):
     playlist = get_object_or_404(Playlist, id=playlist_id)
     content_id = request.data.get("content_id")
-    pos = request.data.get("position", 0)
+    pos = request.data.get("position")
 
     if not content_id:
         return Response({"detail": "content_id is required"}, status=400)
+    if pos is not None:
+        try:
+            pos = int(pos)
+        except (TypeError, ValueError):
+            return Response({"detail": "Invalid position"}, status=400)
 
     content = get_object_or_404(Content, id=content_id)
 
-    # Vérifie si le contenu est déjà dans la playlist
+    # Vérifie si le contenu est déjà dans la playlist (ajout en fin de playlist)
     item, created = PlaylistItem.objects.get_or_create(
         playlist=playlist,
         content=content,
-        defaults={"position": pos}
+        defaults={"position": playlist_order.append_position(playlist.id)}
     )
 
     if not created:
         return Response({"detail": "This content is already in the playlist"}, status=400)
 
+    # Rang demandé : même sémantique que reorder_playlist_item
+    if pos is not None:
+        playlist_order.move_item(item, pos)
+
     return Response(PlaylistItemSerializer(item).data, status=201)
 
 
@@ -388,111 +523,87 @@ def add_to_playlist(request, playlist_id):
 def reorder_playlist_item(request, item_id):
     # Récupère l'item
     item = get_object_or_404(PlaylistItem, id=item_id)
-    playlist = item.playlist
 
-    # Récupère le nouveau rang demandé
+    if request.data.get("position") is None:
+        return Response(PlaylistItemSerializer(item).data)
+
+    # Récupère le nouveau rang demandé (0 = premier, au-delà de la fin = dernier)
     try:
-        new_pos = int(request.data.get("position", item.position))
+        new_pos = int(request.data.get("position"))
     except (TypeError, ValueError):
         return Response({"detail": "Invalid position"}, status=400)
 
-    # Limite la position dans la plage valide
-    playlist_items = list(PlaylistItem.objects.filter(playlist=playlist).order_by("position"))
-    max_index = len(playlist_items) - 1
-    new_pos = max(0, min(new_pos, max_index))
+    # Positions espacées : seule la ligne déplacée est écrite
+    playlist_order.move_item(item, new_pos)
 
-    # Supprime l'item de sa position actuelle
-    playlist_items.remove(item)
-    # Insère l'item à la nouvelle position
-    playlist_items.insert(new_pos, item)
+    return Response(PlaylistItemSerializer(item).data)
 
-    # Réattribue les positions pour éviter les doublons
-    for index, it in enumerate(playlist_items):
-        if it.position != index:
-            it.position = index
-            it.save(update_fields=["position"])
 
-    return Response(PlaylistItemSerializer(item).data)
+@api_view(["POST"])
+@permission_classes([IsAuthenticatedUser])
+def set_playlist_order(request, playlist_id):
+    """
+    Ordre complet d'une playlist en une requête : {"items": [item_id, ...]}
+    (tous les éléments de la playlist, chacun une fois). Un seul bulk_update.
+    """
+    playlist = get_object_or_404(Playlist, id=playlist_id)
+    item_ids = request.data.get("items")
+    if not isinstance(item_ids, list):
+        return Response({"detail": "items must be a list of playlist item ids"}, status=400)
+
+    try:
+        playlist_order.set_order(playlist, item_ids)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=400)
+
+    items = PlaylistItem.objects.filter(playlist=playlist).select_related("content")
+    return Response(PlaylistItemNestedSerializer(items, many=True).data)
 
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
 def trending_content(request, church_id):
+    fields = parse_fields_param(request)
     qs = Content.objects.filter(church_id=church_id)
     
     # Exclure les coming soon AVANT de scorer/trier
     qs = exclude_coming_soon(qs)
+    qs = sparse_queryset(qs.select_related("category"), ContentListSerializer, fields, values=False)
     
-    qs = (
-        qs.annotate(
-            likes_count=Count("contentlike", distinct=True),
-            views_count=Count("contentview", distinct=True),
-        )
-        .annotate(
-            score=F("views_count") + F("likes_count") * 2
+    # Top-N par score de tendance décroissant (ContentScore, index church/-rank),
+    # complété par les plus récents si peu de contenus ont de l'engagement
+    items = trending.top_contents(church_id, qs, limit=20)
+    if len(items) < 20:
+        items += list(
+            qs.exclude(id__in=[c.id for c in items])
+            .order_by("-created_at")[:20 - len(items)]
         )
-        .order_by("-score")[:20]
-    )
 
-    serializer = ContentListSerializer(qs, many=True)
+    serializer = ContentListSerializer(items, many=True, fields=fields)
     return Response(serializer.data)
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
 def recommend_for_user(request,church_id):
-    # Récupérer les derniers contenus vus par l'utilisateur dans cette église
-    last_views_qs = (
-        ContentView.objects
-        .filter(user=request.user, content__church_id=church_id)
-        .order_by("-viewed_at")[:50]
-    )
-    last_content_ids = list(last_views_qs.values_list("content_id", flat=True))
-
-    # Si pas de vues récentes, fallback sur trending/latest
-    if not last_content_ids:
-        qs = Content.objects.filter(church_id=church_id, published=True, is_public=True)
-        qs = exclude_coming_soon(qs)
-        qs = (
-            qs.annotate(views_count=Count("contentview"), likes_count=Count("contentlike"))
-            .order_by("-views_count", "-likes_count")[:20]
-        )
-        serializer = ContentListSerializer(qs, many=True)
-        return Response(serializer.data)
+    # Fusion des voisins précalculés (ContentNeighbor) des derniers contenus vus
+    candidate_ids = recommender.recommend(request.user, church_id, limit=20)
+    fields = parse_fields_param(request)
 
-    # Récupérer les tags les plus fréquents dans ces contenus
-    tag_counts = (
-        ContentTag.objects.filter(content_id__in=last_content_ids)
-        .values("tag_id")
-        .annotate(freq=Count("id"))
-        .order_by("-freq")
-    )
-    tag_ids = [t["tag_id"] for t in tag_counts]
-
-    # Construire une requête candidate: contenus de la même église, publiés et publics,
-    # avec au moins un tag en commun, et que l'utilisateur n'a pas déjà vus
-    candidates = Content.objects.filter(
-        church_id=church_id,
-        published=True,
-        is_public=True,
-        contenttag__tag_id__in=tag_ids
-    ).exclude(id__in=last_content_ids)
-    
-    # Exclure les coming soon AVANT d'annoter
-    candidates = exclude_coming_soon(candidates)
-    
-    candidates = (
-        candidates.annotate(
-            tag_matches=Count("contenttag", filter=Q(contenttag__tag_id__in=tag_ids)),
-            views_count=Count("contentview", distinct=True),
-            likes_count=Count("contentlike", distinct=True),
-        )
-        .distinct()
-    )
+    qs = Content.objects.filter(church_id=church_id, published=True, is_public=True)
+    qs = exclude_coming_soon(qs).select_related("category")
+    qs = sparse_queryset(qs, ContentListSerializer, fields, values=False)
 
-    # Score simple: prefer contenus avec plus de matching tags, puis vues, puis likes
-    qs = candidates.order_by("-tag_matches", "-views_count", "-likes_count")[:20]
-    serializer = ContentListSerializer(qs, many=True)
+    items = []
+    if candidate_ids:
+        by_id = qs.in_bulk(candidate_ids)
+        items = [by_id[cid] for cid in candidate_ids if cid in by_id][:20]
+
+    # Pas d'historique, modèle pas encore calculé ou voisins tous filtrés (dépubliés,
+    # privés, coming soon) : fallback sur les plus populaires
+    if not items:
+        items = qs.order_by("-views_count", "-likes_count")[:20]
+    serializer = ContentListSerializer(items, many=True, fields=fields)
     return Response(serializer.data)
 
 
@@ -500,26 +611,58 @@ def recommend_for_user(request,church_id):
 def feed_for_church(request, church_id):
     # Feed PUBLIC - Pas besoin d'authentification
     # Respecter uniquement les contenus publiés et publics (et pas coming soon)
+    try:
+        church_id = uuid.UUID(str(church_id))
+    except ValueError:
+        return Response({"error": "Église non trouvée"}, status=status.HTTP_404_NOT_FOUND)
+
+    use_cache = settings.FEED_CACHE_ENABLED
+    if use_cache:
+        # Réponse mise en cache par (église, page, jeton de version) : le jeton change à chaque
+        # modification des contenus de l'église (compteurs et tendance compris) ou des
+        # catégories, donc un visiteur anonyme est servi sans requête SQL
+        token = content_version.cache_token(church_id)
+        etag = make_etag("feed", church_id, token)
+        page_params = urlencode(sorted(
+            (name, request.query_params[name])
+            for name in (DefaultPagination.page_query_param, DefaultPagination.page_size_query_param, "fields")
+            if name in request.query_params
+        ))
+        cache_key = f"feed:{church_id}:{token}:{request.get_host()}:{page_params}"
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return not_modified(request, etag, cached["last_modified"]) or with_validators(
+                Response(cached["data"]), etag, cached["last_modified"]
+            )
+
+    version = content_version.get(church_id)
+    categories_modified_at = Category.objects.aggregate(modified_at=Max("updated_at"))["modified_at"]
+    last_modified = most_recent(version.modified_at if version else None, categories_modified_at)
+    if not use_cache:
+        # Sans cache partagé, le jeton serait propre au processus : ETag tiré de la version en base
+        etag = make_etag("feed", church_id, version.version if version else None, categories_modified_at)
+        if version is not None:
+            cached = not_modified(request, etag, last_modified)
+            if cached:
+                return cached
+
+    fields = parse_fields_param(request)
     base_qs = Content.objects.filter(church_id=church_id, published=True, is_public=True)
-    base_qs = exclude_coming_soon(base_qs)
+    base_qs = exclude_coming_soon(base_qs).select_related("category")
+    base_qs = sparse_queryset(base_qs, ContentListSerializer, fields, values=False)
 
     # Derniers contenus (récent)
     latest = list(base_qs.order_by("-created_at")[:30])
 
     used_ids = {c.id for c in latest}
 
-    # Trending : vues sur les 7 derniers jours
-    threshold = timezone.now() - timedelta(days=7)
-    trending = list(
-        base_qs
-        .exclude(id__in=used_ids)
-        .annotate(views_7d=Count("contentview", filter=Q(contentview__viewed_at__gte=threshold)))
-        .order_by("-views_7d")[:20]
-    )
+    # Trending : score de tendance à décroissance exponentielle
+    trending_items = trending.top_contents(church_id, base_qs.exclude(id__in=used_ids), limit=20)
 
     # Interleave latest and trending for diversity (keep latest first)
     items = []
-    for a, b in zip_longest(latest, trending):
+    for a, b in zip_longest(latest, trending_items):
         if a is not None:
             items.append(a)
         if b is not None:
@@ -528,20 +671,35 @@ def feed_for_church(request, church_id):
     # Paginate the combined list
     paginator = DefaultPagination()
     page = paginator.paginate_queryset(items, request)
-    serializer = ContentListSerializer(page, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    serializer = ContentListSerializer(page, many=True, fields=fields)
+    response = paginator.get_paginated_response(serializer.data)
+
+    # Pas de mise en cache pour une église inexistante (liens invalides)
+    if use_cache and version is not None:
+        cache.set(
+            cache_key,
+            {"data": response.data, "last_modified": last_modified},
+            timeout=settings.FEED_CACHE_TIMEOUT,
+        )
+    return with_validators(response, etag, last_modified)
+
+def _stats_by_type(rollups):
+    return list(rollups.values("type").annotate(total=Sum("contents")).order_by("-total"))
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
 def content_stats_global(request):
-    qs = exclude_coming_soon(Content.objects.all())
-    total = qs.count()
-    by_type = qs.values("type").annotate(total=Count("id")).order_by("-total")
-    by_month = qs.annotate(month=TruncMonth("created_at")).values("month").annotate(count=Count("id")).order_by("month")
-    top_liked = qs.annotate(likes=Count("contentlike")).order_by("-likes")[:10].values("id","title","likes")
+    # Lignes pré-agrégées (refresh_content_stats) : indépendant du nombre de contenus
+    rollups = content_stats.global_rollups()
+    total = rollups.aggregate(total=Sum("contents"))["total"] or 0
+    by_type = _stats_by_type(rollups)
+    by_month = rollups.values("month").annotate(count=Sum("contents")).order_by("month")
+    # Top 10 : parcours de l'index -likes_count, borné
+    top_liked = exclude_coming_soon(Content.objects.all()).order_by("-likes_count")[:10].values("id","title",likes=F("likes_count"))
     return Response({
         "total": total,
-        "by_type": list(by_type),
+        "by_type": by_type,
         "by_month": list(by_month),
         "top_liked": list(top_liked)
     })
@@ -554,16 +712,17 @@ def content_stats_for_church(request, church_id):
     if not getattr(church, "is_verified", False):
         return Response({"detail": "Church not verified"}, status=403)
     
-    qs = exclude_coming_soon(Content.objects.filter(church=church))
-    total = qs.count()
-    by_type = qs.values("type").annotate(total=Count("id")).order_by("-total")
-    top_liked = qs.annotate(likes=Count("contentlike")).order_by("-likes")[:10].values("id","title","likes")
-    views = ContentView.objects.filter(content__church=church, content__in=qs).count()
+    content_stats.ensure_church(church.id)
+    rollups = content_stats.church_rollups(church.id)
+    totals = rollups.aggregate(total=Sum("contents"), views=Sum("views"))
+    by_type = _stats_by_type(rollups)
+    # Top 10 : parcours de l'index (church, -likes_count), borné
+    top_liked = exclude_coming_soon(Content.objects.filter(church=church)).order_by("-likes_count")[:10].values("id","title",likes=F("likes_count"))
     return Response({
-        "total": total,
-        "by_type": list(by_type),
+        "total": totals["total"] or 0,
+        "by_type": by_type,
         "top_liked": list(top_liked),
-        "views": views
+        "views": totals["views"] or 0
     })
 
 @api_view(["GET"])
@@ -588,9 +747,28 @@ def list_all_playlists(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
 def get_playlist_with_items(request, playlist_id):
-    playlist = get_object_or_404(Playlist, id=playlist_id)
+    playlist = get_object_or_404(Playlist.objects.select_related("church"), id=playlist_id)
+
+    # Les éléments peuvent venir d'autres églises : version de chacune
+    church_ids = {playlist.church_id}
+    church_ids.update(
+        PlaylistItem.objects.filter(playlist=playlist).values_list("content__church_id", flat=True)
+    )
+    versions = content_version.get_many(church_ids)
+    etag = make_etag(
+        "playlist", playlist.id, playlist.updated_at, playlist.church.updated_at,
+        sorted((str(church_id), v.version) for church_id, v in versions.items()),
+    )
+    last_modified = most_recent(
+        playlist.updated_at, playlist.church.updated_at, *(v.modified_at for v in versions.values())
+    )
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+
+    prefetch_related_objects([playlist], "playlistitem_set__content")
     serializer = PlaylistSerializer(playlist)
-    return Response(serializer.data)
+    return with_validators(Response(serializer.data), etag, last_modified)
 
 
 @api_view(["GET"])
@@ -664,9 +842,12 @@ def church_feed(request, church_id):
     
     Query params:
     - limit: nombre de contenus par requête (défaut 20)
-    - offset: position de départ (défaut 0)
+    - cursor: curseur renvoyé dans next_cursor (page suivante)
+    - offset: position de départ (ancien mode, défaut 0)
+    - count: false pour ne pas calculer le total
+    - fields: champs à renvoyer (ex: fields=id,title,cover_image_url)
     
-    Utilisation : GET /api/church/<id>/feed/?limit=20&offset=0
+    Utilisation : GET /api/church/<id>/feed/?limit=20&cursor=<next_cursor>
     """
     try:
         church = Church.objects.get(id=church_id)
@@ -683,92 +864,27 @@ def church_feed(request, church_id):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    from api.models import ChurchCollaboration
-    from django.db.models import Q
-    
-    # Récupérer les IDs des églises : courante, sous-églises, et parents
-    church_ids_internal = [church.id]
-    
-    # Ajouter les sous-églises
-    sub_churches = church.sub_churches.all().values_list('id', flat=True)
-    church_ids_internal.extend(sub_churches)
-    
-    # Ajouter les églises parentes (remonter l'arborescence)
-    parent = church.parent
-    while parent:
-        church_ids_internal.append(parent.id)
-        parent = parent.parent
-    
-    # Récupérer les IDs des églises collaboratrices
-    collaborations = ChurchCollaboration.objects.filter(
-        Q(initiator_church=church, status="ACCEPTED") |
-        Q(target_church=church, status="ACCEPTED")
+    # Le fil est matérialisé (ChurchFeedEntry, voir api/services/feed.py) :
+    # une seule plage d'index sur (church, -created_at), Coming Soon exclus.
+    now = timezone.now()
+    entries = ChurchFeedEntry.objects.filter(church=church).filter(
+        Q(planned_release_date__isnull=True) | Q(planned_release_date__lte=now)
     )
     
-    church_ids_collaborators = []
-    for collab in collaborations:
-        if collab.initiator_church.id == church.id:
-            church_ids_collaborators.append(collab.target_church.id)
-        else:
-            church_ids_collaborators.append(collab.initiator_church.id)
-    
-    # Requête pour les iglises internes (pas besoin d'is_public)
-    internal_contents = Content.objects.filter(
-        church_id__in=church_ids_internal,
-        published=True
-    )
-    
-    # Requête pour les églises collaboratrices (besoin d'is_public)
-    collaborator_contents = Content.objects.filter(
-        church_id__in=church_ids_collaborators,
-        is_public=True,
-        published=True
+    # Pagination infinie par curseur (offset accepté pour la compatibilité)
+    paginator = KeysetPaginator(ordering=('-created_at', '-content_id'))
+    page = paginator.paginate_queryset(entries.only('created_at', 'content_id'), request)
+    page_ids = [entry.content_id for entry in page]
+    fields = parse_fields_param(request)
+    contents = sparse_queryset(
+        Content.objects.select_related('category'), ContentListSerializer, fields, values=False
     )
+    contents_by_id = contents.in_bulk(page_ids)
+    paginated_contents = [contents_by_id[cid] for cid in page_ids if cid in contents_by_id]
     
-    # Combiner les deux requêtes
-    from django.db.models import Q as DjangoQ
-    all_contents = Content.objects.filter(
-        DjangoQ(
-            church_id__in=church_ids_internal,
-            published=True
-        ) |
-        DjangoQ(
-            church_id__in=church_ids_collaborators,
-            is_public=True,
-            published=True
-        )
-    ).select_related(
-        'church', 'category', 'created_by'
-    ).prefetch_related(
-        'tags'
-    ).order_by('-created_at').distinct()
+    serializer = ContentListSerializer(paginated_contents, many=True, fields=fields)
     
-    # Exclure les contenus coming soon
-    all_contents = exclude_coming_soon(all_contents)
-    
-    # Pagination infinie (offset/limit)
-    try:
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
-    except ValueError:
-        limit = 20
-        offset = 0
-    
-    # Limiter le limit à 100 pour éviter les abus
-    limit = min(limit, 100)
-    
-    total_count = all_contents.count()
-    paginated_contents = all_contents[offset:offset + limit]
-    
-    serializer = ContentListSerializer(paginated_contents, many=True)
-    
-    return Response({
-        "count": total_count,
-        "limit": limit,
-        "offset": offset,
-        "next_offset": offset + limit if offset + limit < total_count else None,
-        "results": serializer.data
-    }, status=status.HTTP_200_OK)
+    return Response(paginator.get_paginated_data(serializer.data), status=status.HTTP_200_OK)
 
 
 # =====================================================
@@ -780,7 +896,7 @@ def church_feed(request, church_id):
 def list_coming_soon(request, church_id):
     """
     Lister tous les contenus 'Coming Soon' d'une église
-    Query params: limit, offset, type
+    Query params: limit, cursor, offset, count, type
     """
     try:
         church = Church.objects.get(id=church_id)
@@ -800,27 +916,17 @@ def list_coming_soon(request, church_id):
     # Récupérer les contenus coming soon
     coming_soon = Content.objects.filter(
         church=church,
-        published=True,
-        planned_release_date__isnull=False,
-        planned_release_date__gt=timezone.now()
-    ).select_related('church', 'category', 'created_by').order_by('planned_release_date')
+        is_released=False,
+    ).select_related('church', 'category', 'created_by')
     
     # Filtrer par type
     content_type = request.query_params.get('type')
     if content_type:
         coming_soon = coming_soon.filter(type=content_type)
     
-    # Pagination
-    try:
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
-    except ValueError:
-        limit = 20
-        offset = 0
-    
-    limit = min(limit, 100)
-    total_count = coming_soon.count()
-    paginated_contents = coming_soon[offset:offset + limit]
+    # Pagination par curseur
+    paginator = KeysetPaginator(ordering=('planned_release_date', 'id'))
+    paginated_contents = paginator.paginate_queryset(coming_soon, request)
     
     serializer = ContentComingSoonSerializer(
         paginated_contents,
@@ -828,13 +934,7 @@ def list_coming_soon(request, church_id):
         context={'request': request}
     )
     
-    return Response({
-        "count": total_count,
-        "limit": limit,
-        "offset": offset,
-        "next_offset": offset + limit if offset + limit < total_count else None,
-        "results": serializer.data
-    })
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 @api_view(['POST'])
@@ -912,34 +1012,20 @@ def unsubscribe_from_content(request, content_id):
 def get_my_subscriptions(request):
     """
     Récupérer les contenus auxquels l'utilisateur est abonné
-    Query params: limit, offset
+    Query params: limit, cursor, offset, count
     """
     subscriptions = ContentNotification.objects.filter(
         user=request.user,
         is_notified=False
-    ).select_related('content').order_by('-subscribed_at')
+    ).select_related('content')
     
-    # Pagination
-    try:
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
-    except ValueError:
-        limit = 20
-        offset = 0
-    
-    limit = min(limit, 100)
-    total_count = subscriptions.count()
-    paginated_subs = subscriptions[offset:offset + limit]
+    # Pagination par curseur
+    paginator = KeysetPaginator(ordering=('-subscribed_at', '-id'))
+    paginated_subs = paginator.paginate_queryset(subscriptions, request)
     
     serializer = ContentNotificationSerializer(paginated_subs, many=True)
     
-    return Response({
-        "count": total_count,
-        "limit": limit,
-        "offset": offset,
-        "next_offset": offset + limit if offset + limit < total_count else None,
-        "results": serializer.data
-    })
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 @api_view(['GET'])
@@ -949,7 +1035,7 @@ def get_content_subscribers(request, content_id):
     Récupérer les abonnés d'un contenu (ADMIN ONLY)
     Seuls les admins de l'église peuvent voir qui est abonné à leurs contenus
     
-    Query params: limit, offset
+    Query params: limit, cursor, offset, count
     """
     try:
         content = Content.objects.get(id=content_id)
@@ -970,19 +1056,11 @@ def get_content_subscribers(request, content_id):
     # Récupérer les abonnés
     subscribers = ContentNotification.objects.filter(
         content=content
-    ).select_related('user').order_by('-subscribed_at')
-    
-    # Pagination
-    try:
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
-    except ValueError:
-        limit = 20
-        offset = 0
+    ).select_related('user')
     
-    limit = min(limit, 100)
-    total_count = subscribers.count()
-    paginated_subscribers = subscribers[offset:offset + limit]
+    # Pagination par curseur
+    paginator = KeysetPaginator(ordering=('-subscribed_at', '-id'))
+    paginated_subscribers = paginator.paginate_queryset(subscribers, request)
     
     # Créer un serializer custom pour les abonnés avec infos utilisateur
     data = []
@@ -999,9 +1077,10 @@ def get_content_subscribers(request, content_id):
     return Response({
         "content_id": content_id,
         "content_title": content.title,
-        "total_subscribers": total_count,
-        "limit": limit,
-        "offset": offset,
-        "next_offset": offset + limit if offset + limit < total_count else None,
+        "total_subscribers": paginator.count,
+        "limit": paginator.limit,
+        "offset": paginator.offset,
+        "next_offset": paginator.next_offset,
+        "next_cursor": paginator.next_cursor,
         "subscribers": data
     })
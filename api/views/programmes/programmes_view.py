@@ -2,7 +2,9 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Count, Max, Q
+from datetime import datetime, time
+from django.utils import timezone
 from api.models import Programme, Church, User, Content, ProgrammeMember
 from api.serializers import (
     ProgrammeSerializer,
@@ -11,9 +13,13 @@ from api.serializers import (
     ProgrammeListSerializer,
     ProgrammeContentSerializer,
     ProgrammeMemberSerializer,
-    ProgrammeWithMembersSerializer
+    ProgrammeWithMembersSerializer,
+    parse_fields_param,
+    sparse_queryset,
 )
 from api.permissions import IsAuthenticatedUser
+from api.conditional import make_etag, most_recent, not_modified, with_validators
+from api.pagination import KeysetPaginator
 
 
 # =====================================================
@@ -83,8 +89,17 @@ def retrieve_programme(request, church_id, programme_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
+    fields = parse_fields_param(request)
+    # Colonnes lues par la vue elle-même (visibilité, ETag)
+    qs = sparse_queryset(
+        Programme.objects.select_related("created_by"),
+        ProgrammeSerializer,
+        fields,
+        extra=("status", "updated_at", "created_by__updated_at"),
+        values=False,
+    )
     try:
-        programme = Programme.objects.get(id=programme_id, church=church)
+        programme = qs.get(id=programme_id, church=church)
     except Programme.DoesNotExist:
         return Response(
             {"error": "Programme non trouvé"},
@@ -98,8 +113,26 @@ def retrieve_programme(request, church_id, programme_id):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    serializer = ProgrammeSerializer(programme)
-    return Response(serializer.data)
+    # updated_at du programme est aussi touché quand ses contenus changent (event_count) ;
+    # l'église sérialisée inclut ses sous-églises ; is_active dépend du jour
+    sub_churches = church.sub_churches.aggregate(total=Count("id"), modified_at=Max("updated_at"))
+    created_by_updated_at = programme.created_by.updated_at if programme.created_by else None
+    today = timezone.localdate()
+    etag = make_etag(
+        "programme", programme.id, programme.updated_at, church.updated_at,
+        sub_churches["total"], sub_churches["modified_at"], created_by_updated_at, today,
+    )
+    last_modified = most_recent(
+        programme.updated_at, church.updated_at, sub_churches["modified_at"], created_by_updated_at,
+        timezone.make_aware(datetime.combine(today, time.min)),
+    )
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+    
+    programme.church = church
+    serializer = ProgrammeSerializer(programme, fields=fields)
+    return with_validators(Response(serializer.data), etag, last_modified)
 
 
 # =====================================================
@@ -192,7 +225,7 @@ def delete_programme(request, church_id, programme_id):
 def list_church_programmes(request, church_id):
     """
     Lister tous les programmes d'une église
-    Query params: status, is_public, limit, offset
+    Query params: status, is_public, limit, cursor, offset, count, fields
     """
     try:
         church = Church.objects.get(id=church_id)
@@ -213,7 +246,7 @@ def list_church_programmes(request, church_id):
         'church', 'created_by'
     ).prefetch_related(
         'content_items'
-    ).order_by('-start_date')
+    )
     
     # Filtrer par statut
     status_filter = request.query_params.get('status')
@@ -225,27 +258,16 @@ def list_church_programmes(request, church_id):
     if is_public:
         programmes = programmes.filter(is_public=is_public.lower() == 'true')
     
-    # Pagination infinie
-    try:
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
-    except ValueError:
-        limit = 20
-        offset = 0
+    fields = parse_fields_param(request)
+    programmes = sparse_queryset(programmes, ProgrammeListSerializer, fields, extra=('start_date',))
     
-    limit = min(limit, 100)
-    total_count = programmes.count()
-    paginated_programmes = programmes[offset:offset + limit]
+    # Pagination infinie par curseur
+    paginator = KeysetPaginator(ordering=('-start_date', '-id'))
+    paginated_programmes = paginator.paginate_queryset(programmes, request)
     
-    serializer = ProgrammeListSerializer(paginated_programmes, many=True)
+    serializer = ProgrammeListSerializer(paginated_programmes, many=True, fields=fields)
     
-    return Response({
-        "count": total_count,
-        "limit": limit,
-        "offset": offset,
-        "next_offset": offset + limit if offset + limit < total_count else None,
-        "results": serializer.data
-    })
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 # =====================================================
@@ -584,7 +606,7 @@ def leave_programme(request, church_id, programme_id):
 def get_programme_members(request, church_id, programme_id):
     """
     Récupérer la liste des membres d'un programme
-    Query params: limit, offset
+    Query params: limit, cursor, offset, count
     """
     try:
         church = Church.objects.get(id=church_id)
@@ -611,29 +633,15 @@ def get_programme_members(request, church_id, programme_id):
     
     members = ProgrammeMember.objects.filter(
         programme=programme
-    ).select_related('user').order_by('-joined_at')
-    
-    # Pagination
-    try:
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
-    except ValueError:
-        limit = 20
-        offset = 0
+    ).select_related('user')
     
-    limit = min(limit, 100)
-    total_count = members.count()
-    paginated_members = members[offset:offset + limit]
+    # Pagination par curseur
+    paginator = KeysetPaginator(ordering=('-joined_at', '-id'))
+    paginated_members = paginator.paginate_queryset(members, request)
     
     serializer = ProgrammeMemberSerializer(paginated_members, many=True)
     
-    return Response({
-        "count": total_count,
-        "limit": limit,
-        "offset": offset,
-        "next_offset": offset + limit if offset + limit < total_count else None,
-        "results": serializer.data
-    })
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 # =====================================================
@@ -646,7 +654,7 @@ def get_programme_content_notifications(request, church_id, programme_id):
     """
     Récupérer les notifications de contenu du programme
     L'utilisateur ne voit que SES notifications
-    Query params: limit, offset, is_read
+    Query params: limit, cursor, offset, count, is_read
     """
     try:
         church = Church.objects.get(id=church_id)
@@ -677,7 +685,7 @@ def get_programme_content_notifications(request, church_id, programme_id):
     notifications = ProgrammeContentNotification.objects.filter(
         programme=programme,
         user=request.user
-    ).select_related('content').order_by('-created_at')
+    ).select_related('content')
     
     # Filtrer par is_read si fourni
     is_read = request.query_params.get('is_read')
@@ -685,28 +693,14 @@ def get_programme_content_notifications(request, church_id, programme_id):
         is_read_bool = is_read.lower() in ['true', '1', 'yes']
         notifications = notifications.filter(is_read=is_read_bool)
     
-    # Pagination
-    try:
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
-    except ValueError:
-        limit = 20
-        offset = 0
-    
-    limit = min(limit, 100)
-    total_count = notifications.count()
-    paginated = notifications[offset:offset + limit]
+    # Pagination par curseur
+    paginator = KeysetPaginator(ordering=('-created_at', '-id'))
+    paginated = paginator.paginate_queryset(notifications, request)
     
     from api.serializers import ProgrammeContentNotificationListSerializer
     serializer = ProgrammeContentNotificationListSerializer(paginated, many=True)
     
-    return Response({
-        "count": total_count,
-        "limit": limit,
-        "offset": offset,
-        "next_offset": offset + limit if offset + limit < total_count else None,
-        "results": serializer.data
-    })
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 @api_view(['POST'])
@@ -11,9 +11,12 @@ from api.serializers import (
     TestimonyUpdateSerializer,
     TestimonyListSerializer,
     TestimonyApprovalSerializer,
-    TestimonyLikeSerializer
+    TestimonyLikeSerializer,
+    parse_fields_param,
+    sparse_queryset,
 )
 from api.permissions import IsTestimonyOwner
+from api.pagination import KeysetPaginator
 
 
 # =====================================================
@@ -172,8 +175,16 @@ def retrieve_testimony(request, church_id, testimony_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
+    fields = parse_fields_param(request)
+    qs = sparse_queryset(
+        Testimony.objects.select_related("user", "church", "approved_by"),
+        TestimonySerializer,
+        fields,
+        extra=("status", "user"),
+        values=False,
+    )
     try:
-        testimony = Testimony.objects.get(id=testimony_id, church=church)
+        testimony = qs.get(id=testimony_id, church=church)
     except Testimony.DoesNotExist:
         return Response(
             {"error": "Testimony not found"},
@@ -182,13 +193,13 @@ def retrieve_testimony(request, church_id, testimony_id):
     
     # Check visibility
     if request.user.role != "SADMIN":
-        if testimony.status != "APPROVED" and testimony.user != request.user:
+        if testimony.status != "APPROVED" and testimony.user_id != request.user.id:
             return Response(
                 {"error": "This testimony is not yet approved"},
                 status=status.HTTP_403_FORBIDDEN
             )
     
-    serializer = TestimonySerializer(testimony)
+    serializer = TestimonySerializer(testimony, fields=fields)
     return Response(serializer.data)
 
 
@@ -204,7 +215,10 @@ def list_church_testimonies(request, church_id):
     Query params:
     - type: TEXT, AUDIO
     - limit: number of results (default: 20)
-    - offset: pagination offset (default: 0)
+    - cursor: next_cursor from the previous page
+    - offset: pagination offset (legacy, default: 0)
+    - count: false to skip the total count
+    - fields: sparse fieldset (e.g. fields=id,title,type)
     """
     try:
         church = Church.objects.get(id=church_id)
@@ -226,21 +240,16 @@ def list_church_testimonies(request, church_id):
     if testimony_type in ['TEXT', 'AUDIO']:
         qs = qs.filter(type=testimony_type)
     
-    # Pagination
-    limit = int(request.query_params.get('limit', 20))
-    offset = int(request.query_params.get('offset', 0))
+    fields = parse_fields_param(request)
+    qs = sparse_queryset(qs.select_related('user'), TestimonyListSerializer, fields, extra=('created_at',))
     
-    total_count = qs.count()
-    testimonies = qs[offset:offset + limit]
+    # Cursor pagination (offset still accepted)
+    paginator = KeysetPaginator(ordering=('-created_at', '-id'))
+    testimonies = paginator.paginate_queryset(qs, request)
     
-    serializer = TestimonyListSerializer(testimonies, many=True)
+    serializer = TestimonyListSerializer(testimonies, many=True, fields=fields)
     
-    return Response({
-        "count": total_count,
-        "limit": limit,
-        "offset": offset,
-        "results": serializer.data
-    })
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 # =====================================================
@@ -293,8 +302,11 @@ def list_user_testimonies(request, user_id):
     
     # Get user's testimonies
     qs = Testimony.objects.filter(user=user)
+    fields = parse_fields_param(request)
     
-    serializer = TestimonyListSerializer(qs, many=True)
+    serializer = TestimonyListSerializer(
+        sparse_queryset(qs.select_related('user'), TestimonyListSerializer, fields), many=True, fields=fields
+    )
     
     return Response({
         "count": qs.count(),
@@ -313,7 +325,7 @@ def my_testimonies(request):
     List all testimonies of the currently authenticated user
     """
     # Get current user's testimonies
-    qs = Testimony.objects.filter(user=request.user).order_by('-created_at')
+    qs = Testimony.objects.filter(user=request.user)
     
     # Optional filters
     status_filter = request.query_params.get('status')
@@ -324,12 +336,16 @@ def my_testimonies(request):
     if type_filter:
         qs = qs.filter(type=type_filter)
     
-    serializer = TestimonyListSerializer(qs, many=True)
+    fields = parse_fields_param(request)
+    qs = sparse_queryset(qs.select_related('user'), TestimonyListSerializer, fields, extra=('created_at',))
     
-    return Response({
-        "count": qs.count(),
-        "results": serializer.data
-    })
+    # Cursor pagination (default page: 100)
+    paginator = KeysetPaginator(ordering=('-created_at', '-id'), default_limit=100)
+    testimonies = paginator.paginate_queryset(qs, request)
+    
+    serializer = TestimonyListSerializer(testimonies, many=True, fields=fields)
+    
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 # =====================================================
@@ -447,14 +463,17 @@ def list_pending_testimonies(request, church_id):
         )
     
     # Get pending testimonies
-    qs = Testimony.objects.filter(church=church, status="PENDING").order_by('-created_at')
+    qs = Testimony.objects.filter(church=church, status="PENDING")
+    fields = parse_fields_param(request)
+    qs = sparse_queryset(qs.select_related('user'), TestimonyListSerializer, fields, extra=('created_at',))
     
-    serializer = TestimonyListSerializer(qs, many=True)
+    # Cursor pagination (default page: 100)
+    paginator = KeysetPaginator(ordering=('-created_at', '-id'), default_limit=100)
+    testimonies = paginator.paginate_queryset(qs, request)
     
-    return Response({
-        "count": qs.count(),
-        "results": serializer.data
-    })
+    serializer = TestimonyListSerializer(testimonies, many=True, fields=fields)
+    
+    return Response(paginator.get_paginated_data(serializer.data))
 
 
 # =====================================================
@@ -25,7 +25,7 @@ application = ProtocolTypeRouter({
     'http': django_asgi_app,
     'websocket': AuthMiddlewareStack(
         URLRouter([
-            path('ws/chat/<int:room_id>/', ChatConsumer.as_asgi()),
+            path('ws/chat/<uuid:room_id>/', ChatConsumer.as_asgi()),
         ])
     ),
 })
@@ -88,12 +88,22 @@ TEMPLATES = [
 WSGI_APPLICATION = 'christlumen.wsgi.application'
 ASGI_APPLICATION = 'christlumen.asgi.application'
 
-# Channels configuration
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
+# Cache - Redis partagé en production (REDIS_URL), mémoire locale par processus sinon (dev, tests)
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'christlumen',
+        }
     }
-}
 
 
 # Database
@@ -103,6 +113,39 @@ DATABASES = {
     'default': dj_database_url.parse(os.getenv('DATABASE_URL', 'sqlite:///db.sqlite3'), conn_max_age=600)
 }
 
+# Channel layer - en mémoire (un seul processus) par défaut. CHANNEL_LAYER=postgres active
+# la diffusion entre processus/nœuds par PostgreSQL LISTEN/NOTIFY (api/channel_layers.py),
+# sur une base PostgreSQL seulement
+CHANNEL_LAYER = os.getenv('CHANNEL_LAYER', 'memory')
+if CHANNEL_LAYER == 'postgres':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'api.channel_layers.PostgresChannelLayer',
+            'CONFIG': {
+                'capacity': int(os.getenv('CHANNEL_LAYER_CAPACITY', '100')),
+                'expiry': int(os.getenv('CHANNEL_LAYER_EXPIRY', '60')),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer'
+        }
+    }
+
+# Chat - écriture groupée des messages WebSocket (api/services/chat_writer.py)
+CHAT_WRITE_BATCH_SIZE = int(os.getenv('CHAT_WRITE_BATCH_SIZE', '50'))
+CHAT_WRITE_FLUSH_MS = int(os.getenv('CHAT_WRITE_FLUSH_MS', '20'))
+
+# Chat - présence (battement par processus, en secondes) et indicateurs de saisie
+CHAT_PRESENCE_HEARTBEAT = int(os.getenv('CHAT_PRESENCE_HEARTBEAT', '20'))
+CHAT_TYPING_INTERVAL = int(os.getenv('CHAT_TYPING_INTERVAL', '3'))
+
+# Chat - file d'envoi bornée par connexion ; file pleine : drop_oldest, drop_new ou disconnect
+CHAT_OUTBOUND_QUEUE_SIZE = int(os.getenv('CHAT_OUTBOUND_QUEUE_SIZE', '200'))
+CHAT_SLOW_CONSUMER_POLICY = os.getenv('CHAT_SLOW_CONSUMER_POLICY', 'drop_oldest')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -189,6 +232,30 @@ FREEMOPAY_RETRY_DELAY = float(os.getenv('FREEMOPAY_RETRY_DELAY', '1.0'))
 # Notification Preferences
 DEFAULT_NOTIFICATION_CHANNEL = os.getenv('DEFAULT_NOTIFICATION_CHANNEL', 'whatsapp')
 
+# Content Views - buffer d'écriture différée (flush par lots)
+CONTENT_VIEW_BUFFER_SIZE = int(os.getenv('CONTENT_VIEW_BUFFER_SIZE', '200'))
+CONTENT_VIEW_FLUSH_INTERVAL = float(os.getenv('CONTENT_VIEW_FLUSH_INTERVAL', '5.0'))
+# Vues seules : version des contenus (ETag, cache du fil) incrémentée au plus toutes les N secondes
+CONTENT_VIEW_VERSION_INTERVAL = int(os.getenv('CONTENT_VIEW_VERSION_INTERVAL', '300'))
+
+# Trending - demi-vie du score de tendance (heures)
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '48'))
+
+# Cache du fil public - invalidé par version ; le délai ne sert qu'à purger les pages orphelines.
+# Il suppose un cache partagé entre processus (REDIS_URL) : avec le cache mémoire local, une
+# invalidation n'atteindrait que le processus qui l'a faite. Désactivé hors DEBUG sans Redis
+FEED_CACHE_ENABLED = os.getenv('FEED_CACHE_ENABLED', str(bool(REDIS_URL) or DEBUG)).lower() == 'true'
+FEED_CACHE_TIMEOUT = int(os.getenv('FEED_CACHE_TIMEOUT', '86400'))
+
+# Rétention - âge (jours) au-delà duquel les lignes brutes sont archivées (0 = jamais)
+RETENTION_DAYS = {
+    'content_views': int(os.getenv('RETENTION_CONTENT_VIEW_DAYS', '180')),
+    'chat_messages': int(os.getenv('RETENTION_CHAT_MESSAGE_DAYS', '365')),
+    'notifications': int(os.getenv('RETENTION_NOTIFICATION_DAYS', '90')),
+    'programme_content_notifications': int(os.getenv('RETENTION_PROGRAMME_NOTIFICATION_DAYS', '90')),
+}
+RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', str(BASE_DIR / 'archives'))
+
 #Token
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=7),
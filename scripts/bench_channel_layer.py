@@ -0,0 +1,133 @@
+"""
+Banc de latence du channel layer : 1, 4, 16 processus récepteurs abonnés au même
+groupe, un émetteur qui fait group_send. Affiche p50/p95/p99/max de la latence
+de bout en bout (émission -> réception) pour chaque nombre de processus.
+
+    DATABASE_URL=postgres://... python scripts/bench_channel_layer.py --workers 1 4 16
+    python scripts/bench_channel_layer.py --backend memory   # référence, un seul processus
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'christlumen.settings')
+
+GROUP = 'bench'
+
+
+def _layer(backend):
+    from channels.layers import InMemoryChannelLayer
+    from api.channel_layers import PostgresChannelLayer
+
+    if backend == 'postgres':
+        return PostgresChannelLayer(capacity=10000)
+    return InMemoryChannelLayer(capacity=10000)
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _worker(backend, messages, ready, results):
+    import django
+
+    django.setup()
+
+    async def main():
+        layer = _layer(backend)
+        channel = await layer.new_channel()
+        await layer.group_add(GROUP, channel)
+        ready.put(True)
+        latencies = []
+        while len(latencies) < messages:
+            message = await layer.receive(channel)
+            latencies.append(time.time() - message['sent_at'])
+        await layer.close()
+        results.put(latencies)
+
+    asyncio.run(main())
+
+
+async def _send_all(layer, messages, interval):
+    for index in range(messages):
+        await layer.group_send(GROUP, {'type': 'bench', 'index': index, 'sent_at': time.time()})
+        if interval:
+            await asyncio.sleep(interval)
+
+
+def run_postgres(workers, messages, interval):
+    import django
+
+    django.setup()
+    ready = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_worker, args=('postgres', messages, ready, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get(timeout=30)
+
+    async def send():
+        layer = _layer('postgres')
+        await _send_all(layer, messages, interval)
+        await layer.close()
+
+    asyncio.run(send())
+    latencies = []
+    for _ in processes:
+        latencies.extend(results.get(timeout=60))
+    for process in processes:
+        process.join()
+    return latencies
+
+
+def run_memory(messages, interval):
+    async def main():
+        layer = _layer('memory')
+        channel = await layer.new_channel()
+        await layer.group_add(GROUP, channel)
+        sender = asyncio.create_task(_send_all(layer, messages, interval))
+        latencies = []
+        while len(latencies) < messages:
+            message = await layer.receive(channel)
+            latencies.append(time.time() - message['sent_at'])
+        await sender
+        return latencies
+
+    return asyncio.run(main())
+
+
+def report(label, latencies):
+    ms = [value * 1000 for value in latencies]
+    print(
+        f"{label:>12} | {len(ms):>6} msgs | p50 {statistics.median(ms):7.2f} ms | "
+        f"p95 {_percentile(ms, 95):7.2f} ms | p99 {_percentile(ms, 99):7.2f} ms | max {max(ms):7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=['postgres', 'memory'], default='postgres')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--interval', type=float, default=0.002, help='Pause entre deux envois (secondes)')
+    args = parser.parse_args()
+
+    if args.backend == 'memory':
+        report('memory x1', run_memory(args.messages, args.interval))
+        return
+    for workers in args.workers:
+        report(f'postgres x{workers}', run_postgres(workers, args.messages, args.interval))
+
+
+if __name__ == '__main__':
+    main()